@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import Student, Group
+from .models import Student, StudentConstraint, Group, Generation, GenerationJob
 
 # This tells Django: "Show these tables in the Admin Panel"
 admin.site.register(Student)
-admin.site.register(Group)
\ No newline at end of file
+admin.site.register(Group)
+admin.site.register(StudentConstraint)
+admin.site.register(Generation)
+admin.site.register(GenerationJob)
\ No newline at end of file
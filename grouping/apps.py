@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class GroupingConfig(AppConfig):
     name = 'grouping'
+
+    def ready(self):
+        from . import profiling
+
+        # Query counting for GROUPING_PROFILING (a no-op unless a request is being measured)
+        connection_created.connect(profiling.install, dispatch_uid='grouping.profiling')
@@ -0,0 +1,156 @@
+"""
+Batch regeneration of many sections at once (e.g. every class at term start).
+
+1. Load: one query reads the skills of every section (and one their
+   grouping rules, see constraints.py).
+2. Plan: each section is planned in a worker process. planner.plan_matrix
+   has no ORM access; only numpy arrays cross the process boundary.
+3. Save: the plans are written back BATCH_SIZE sections per transaction,
+   with one bulk INSERT / UPDATE per batch instead of per section.
+
+A section whose roster changed between loading and saving is skipped
+(the same check as save_groups(replace=True)), sections with a queued or
+running GenerationJob are left alone, and sections whose grouping rules
+can't be met keep their groups (reported in BatchResult.failed).
+"""
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+from django.db.models import F
+
+from . import jobs, stats
+from .constraints import Rules
+from .models import Generation, GenerationJob, Group, Section, Student
+from .planner import plan_task
+from .skillmatrix import SKILL_FIELDS, SectionMatrix
+
+BATCH_SIZE = 25
+# Sections per task sent to a worker (amortizes pickling for small sections)
+TASKS_PER_WORKER = 4
+
+
+class BatchResult:
+    """What regenerate_all did: section ids regenerated / skipped, and timings."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.regenerated = []
+        self.skipped = []
+        self.busy = []
+        self.failed = {}  # section id -> why its rules can't be met
+        self.timings = {}
+
+    def as_dict(self):
+        return {
+            'workers': self.workers,
+            'regenerated': len(self.regenerated),
+            'skipped': self.skipped,
+            'busy': self.busy,
+            'failed': self.failed,
+            'timings': {phase: round(seconds, 4) for phase, seconds in self.timings.items()},
+        }
+
+
+def load_matrices(section_ids):
+    """{section_id: SectionMatrix} for every id, from one query."""
+    rows = defaultdict(list)
+    students = (Student.objects.filter(section_id__in=section_ids)
+                .order_by('section_id', 'id')
+                .values_list('section_id', 'id', 'assigned_group_id', *SKILL_FIELDS))
+    for section_id, *row in students.iterator(chunk_size=5000):
+        rows[section_id].append(row)
+    return {section_id: SectionMatrix.from_rows(rows.get(section_id, ())) for section_id in section_ids}
+
+
+def plan_all(tasks, workers):
+    """Runs planner.plan_task over `tasks`, in a process pool when workers > 1."""
+    if workers <= 1 or len(tasks) <= 1:
+        return dict(map(plan_task, tasks))
+    chunksize = max(1, len(tasks) // (workers * TASKS_PER_WORKER))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(plan_task, tasks, chunksize=chunksize))
+
+
+def save_batch(sections, plans):
+    """
+    Writes the plans of several sections in one transaction.
+    Returns the ids of the sections that were skipped because their roster changed.
+    """
+    with transaction.atomic():
+        current = load_matrices([section.id for section in sections])
+        fresh = [section for section in sections if current[section.id].same_roster(plans[section.id].matrix)]
+        skipped = [section.id for section in sections if section not in fresh]
+
+        Group.objects.filter(section__in=fresh).delete()
+        groups = Group.objects.bulk_create([
+            Group(section=section, name=f"Group {i+1}")
+            for section in fresh for i in range(plans[section.id].k_value)
+        ])
+
+        # Group indexes are offset by the groups of the sections before
+        students = []
+        rows_by_group = {}
+        offset = 0
+        for section in fresh:
+            plan = plans[section.id]
+            for sid, row, idx in zip(plan.student_ids, plan.rows, plan.assignment):
+                students.append(Student(id=sid, assigned_group=groups[offset + idx]))
+                rows_by_group.setdefault(offset + idx, []).append(row)
+            offset += plan.k_value
+        if students:
+            Student.objects.bulk_update(students, ['assigned_group'], batch_size=1000)
+        stats.create_for_groups(groups, rows_by_group)
+        fresh_ids = [section.id for section in fresh]
+        Section.objects.filter(id__in=fresh_ids).update(version=F('version') + 1)
+
+        # One Generation record per section (see services.save_groups)
+        versions = dict(Section.objects.filter(id__in=fresh_ids).values_list('id', 'version'))
+        Generation.objects.bulk_create([
+            Generation.from_plan(section.id, plans[section.id], versions[section.id]) for section in fresh
+        ])
+    return skipped
+
+
+def regenerate_all(sections, k_value, weights=None, engine=None, workers=None, batch_size=BATCH_SIZE):
+    """
+    Replaces the groups of every section in `sections` (a queryset) with
+    `k_value` freshly generated ones. `workers=1` plans in this process;
+    the default uses one worker process per CPU.
+    """
+    if k_value < 1:
+        raise ValueError("k_value must be at least 1")
+
+    sections = list(sections.order_by('id'))
+    # A job whose worker died doesn't keep its section busy
+    jobs.recover_stale()
+    busy = set(GenerationJob.objects
+               .filter(section__in=sections, status__in=[GenerationJob.QUEUED, GenerationJob.RUNNING])
+               .values_list('section_id', flat=True))
+    result = BatchResult(workers or min(os.cpu_count() or 1, max(len(sections), 1)))
+    result.busy = sorted(busy)
+    sections = [section for section in sections if section.id not in busy]
+
+    start = time.perf_counter()
+    matrices = load_matrices([section.id for section in sections])
+    rules = Rules.load_many(sections)
+    result.timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tasks = [(section.id, matrices[section.id], k_value, weights, engine, rules[section.id])
+             for section in sections]
+    plans = plan_all(tasks, result.workers)
+    result.timings['plan'] = time.perf_counter() - start
+    result.failed = {sid: str(plan) for sid, plan in plans.items() if isinstance(plan, Exception)}
+    sections = [section for section in sections if section.id not in result.failed]
+
+    start = time.perf_counter()
+    for i in range(0, len(sections), batch_size):
+        batch = sections[i:i + batch_size]
+        skipped = save_batch(batch, plans)
+        result.skipped += skipped
+        result.regenerated += [section.id for section in batch if section.id not in skipped]
+    result.timings['save'] = time.perf_counter() - start
+    return result
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the grouping algorithms.
+
+Each module can be run on its own, e.g.:
+    python -m grouping.benchmarks.weighted
+"""
@@ -0,0 +1,196 @@
+"""
+Requests per second of the dashboard and class list under WSGI and ASGI.
+
+Both Django handlers are driven in-process (no server, no sockets) against
+a throwaway SQLite file with a generated roster:
+
+* WSGI: `concurrency` threads, each sending requests back to back (like a
+  threaded WSGI server);
+* ASGI: `concurrency` concurrent tasks on one event loop (like uvicorn with
+  one worker), where the async views await the ORM and render in the
+  bounded CPU pool.
+
+Requests are authenticated with a real session cookie and send no
+If-None-Match, so every dashboard request is rendered (group cards still
+come from the fragment cache after the first one, as in production).
+
+    python -m grouping.benchmarks.asgi_load [--requests 200] [--concurrency 8] [--sections 4] [--students 200]
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'igf_project.settings')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402  (needs django.setup())
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from grouping.models import Section, Student  # noqa: E402
+from grouping.services import generate_groups  # noqa: E402
+
+HOST = 'localhost'
+
+
+def make_data(sections, students, group_size=5):
+    """A teacher with `sections` generated classes. Returns (session cookie, paths)."""
+    teacher = User.objects.create_user('bench-teacher', password='pw')
+    paths = [reverse('section_list')]
+    for i in range(sections):
+        section = Section.objects.create(name=f"Bench {i + 1}", teacher=teacher)
+        Student.objects.bulk_create([
+            Student(section=section, name=f"Student {j}", coding=1 + j * 7 % 5, design=1 + j * 3 % 5,
+                    writing=1 + j * 11 % 5, presenting=1 + j * 13 % 5)
+            for j in range(students)
+        ])
+        generate_groups(section, max(1, students // group_size))
+        paths.append(reverse('dashboard', args=[section.id]))
+    client = Client()
+    client.force_login(teacher)
+    return f"sessionid={client.cookies['sessionid'].value}", paths
+
+
+def wsgi_request(app, path, cookie):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': HOST,
+        'HTTP_COOKIE': cookie, 'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0),
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    status = []
+    body = app(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        size = sum(len(chunk) for chunk in body)
+    finally:
+        body.close()
+    return int(status[0].split()[0]), size
+
+
+async def asgi_request(app, path, cookie):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000), 'server': (HOST, 80),
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Never disconnects; Django cancels this wait when the response is done
+        await asyncio.Future()
+
+    status = []
+    size = 0
+
+    async def send(message):
+        nonlocal size
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body':
+            size += len(message.get('body', b''))
+
+    await app(scope, receive, send)
+    return status[0], size
+
+
+def summarize(name, latencies, elapsed, statuses):
+    latencies = sorted(latencies)
+    return {
+        'handler': name,
+        'requests': len(latencies),
+        'errors': sum(status != 200 for status in statuses),
+        'elapsed_s': elapsed,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def run_wsgi(paths, cookie, requests, concurrency):
+    app = WSGIHandler()
+    wsgi_request(app, paths[-1], cookie)  # warm-up (fragment cache, URL resolver)
+
+    def one(i):
+        start = time.perf_counter()
+        status, _ = wsgi_request(app, paths[i % len(paths)], cookie)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    return summarize('wsgi', [r[0] for r in results], elapsed, [r[1] for r in results])
+
+
+def run_asgi(paths, cookie, requests, concurrency):
+    app = ASGIHandler()
+
+    async def main():
+        await asgi_request(app, paths[-1], cookie)  # warm-up
+        results = []
+        queue = iter(range(requests))
+
+        async def client():
+            for i in queue:
+                start = time.perf_counter()
+                status, _ = await asgi_request(app, paths[i % len(paths)], cookie)
+                results.append((time.perf_counter() - start, status))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    return summarize('asgi', [r[0] for r in results], elapsed, [r[1] for r in results])
+
+
+def run(requests=200, concurrency=8, sections=4, students=200):
+    """Builds a throwaway database, runs both handlers and returns their summaries."""
+    with tempfile.TemporaryDirectory() as tmp, \
+            override_settings(DEBUG=False, ALLOWED_HOSTS=[HOST]):
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmp, 'load.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            cookie, paths = make_data(sections, students)
+            return [
+                run_wsgi(paths, cookie, requests, concurrency),
+                run_asgi(paths, cookie, requests, concurrency),
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--sections', type=int, default=4)
+    parser.add_argument('--students', type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.requests, args.concurrency, args.sections, args.students)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"{args.sections} classes x {args.students} students (+ the class list)")
+    for r in results:
+        print(f"  {r['handler']}: {r['rps']:7.1f} req/s  p50 {r['p50_ms']:6.1f} ms  "
+              f"p95 {r['p95_ms']:6.1f} ms  ({r['errors']} errors)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Batch regeneration: worker processes vs sequential planning.
+
+Plans many synthetic sections with batch.plan_all, once in this process
+and once in a process pool, and reports the wall-clock speedup. Only the
+planning phase is timed; loading and saving are the same in both modes.
+
+    python -m grouping.benchmarks.batch [--sections 60] [--students 2000] [--groups 50] [--workers N]
+"""
+import argparse
+import os
+import time
+
+import django
+import numpy as np
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'igf_project.settings')
+django.setup()
+
+from grouping.batch import plan_all  # noqa: E402  (needs django.setup())
+from grouping.skillmatrix import SectionMatrix  # noqa: E402
+
+
+def make_tasks(sections, students, groups, seed=0):
+    rng = np.random.default_rng(seed)
+    tasks = []
+    for section_id in range(1, sections + 1):
+        skills = rng.integers(1, 6, size=(students, 4), dtype=np.int8)
+        ids = np.arange(section_id * students, (section_id + 1) * students, dtype=np.int64)
+        matrix = SectionMatrix(ids, np.zeros(students, dtype=np.int64), skills)
+        tasks.append((section_id, matrix, groups, None, None, None))
+    return tasks
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(sections=60, students=2000, groups=50, workers=None):
+    """Returns the seconds taken sequentially and with `workers` processes."""
+    workers = workers or os.cpu_count() or 1
+    tasks = make_tasks(sections, students, groups)
+    sequential = timed(lambda: plan_all(tasks, 1))
+    parallel = timed(lambda: plan_all(tasks, workers))
+    return {
+        'sections': sections,
+        'students': students,
+        'groups': groups,
+        'workers': workers,
+        'sequential_s': sequential,
+        'parallel_s': parallel,
+        'speedup': sequential / parallel,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sections', type=int, default=60)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    result = run(args.sections, args.students, args.groups, args.workers)
+    print(f"{result['sections']} sections x {result['students']} students x {result['groups']} groups")
+    print(f"  sequential:          {result['sequential_s'] * 1000:8.1f} ms")
+    print(f"  {result['workers']:2d} worker process(es): {result['parallel_s'] * 1000:8.1f} ms"
+          f"  (x{result['speedup']:.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Concurrent regeneration against a file-backed SQLite database.
+
+Writer threads repeat the write pattern of save_groups (read the section,
+delete its groups, insert new ones, bump the version, all in one
+transaction) while reader threads load group lists like the dashboard
+does. Each thread goes through Django's sqlite backend and closes its
+connection the way request_finished does after every "request".
+
+The workload runs twice on a fresh temp file: with Django's stock SQLite
+options and with settings.SQLITE_OPTIONS / CONN_MAX_AGE. Stock settings
+lose writes to "database is locked" and open a connection per request.
+
+    python -m grouping.benchmarks.concurrency [--writers 8] [--readers 4] [--ops 25] [--groups 10]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'igf_project.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402  (needs django.setup())
+from django.db import OperationalError  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.db.utils import ConnectionHandler  # noqa: E402
+
+SCHEMA = (
+    'CREATE TABLE section (id INTEGER PRIMARY KEY, version INTEGER NOT NULL)',
+    'CREATE TABLE grp (id INTEGER PRIMARY KEY, section_id INTEGER NOT NULL, name TEXT, power INTEGER)',
+    'CREATE INDEX grp_section ON grp (section_id)',
+)
+
+
+def profiles():
+    return {
+        'stock': {'OPTIONS': {}, 'CONN_MAX_AGE': 0},
+        'tuned': {'OPTIONS': settings.SQLITE_OPTIONS, 'CONN_MAX_AGE': settings.CONN_MAX_AGE},
+    }
+
+
+def _handler(path, profile):
+    return ConnectionHandler({'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        **profile,
+    }})
+
+
+def _write(conn, section_id, groups, round_):
+    """One regeneration: the same statements save_groups runs, in one transaction."""
+    with conn.cursor() as cursor:
+        # What transaction.atomic() issues on this connection
+        cursor.execute(f"BEGIN {conn.transaction_mode or ''}".strip())
+        try:
+            cursor.execute('SELECT version FROM section WHERE id = %s', [section_id])
+            cursor.fetchone()
+            cursor.execute('DELETE FROM grp WHERE section_id = %s', [section_id])
+            cursor.executemany(
+                'INSERT INTO grp (section_id, name, power) VALUES (%s, %s, %s)',
+                [(section_id, f"Group {g + 1}", round_ * g) for g in range(groups)],
+            )
+            cursor.execute('UPDATE section SET version = version + 1 WHERE id = %s', [section_id])
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+
+
+def _read(conn, section_id):
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT id, name, power FROM grp WHERE section_id = %s ORDER BY name', [section_id])
+        return cursor.fetchall()
+
+
+def run_profile(name, writers=8, readers=4, ops=25, groups=10):
+    """Runs the workload with one settings profile; returns its counters."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        handler = _handler(path, profiles()[name])
+        setup = handler.create_connection('default')
+        with setup.cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            cursor.executemany('INSERT INTO section (id, version) VALUES (%s, 0)',
+                               [(i,) for i in range(1, writers + 1)])
+        setup.close()
+
+        lock = threading.Lock()
+        counts = {'writes': 0, 'reads': 0, 'locked': 0, 'connections': 0}
+        writing = threading.Event()
+
+        def opened(sender, connection, **kwargs):
+            if connection.settings_dict['NAME'] == path:
+                with lock:
+                    counts['connections'] += 1
+
+        def work(fn, key, more):
+            """Runs fn(conn, i) as one "request" while more(i) holds."""
+            conn = handler.create_connection('default')
+            try:
+                i = 0
+                while more(i):
+                    try:
+                        fn(conn, i)
+                        outcome = key
+                    except OperationalError:
+                        outcome = 'locked'
+                    with lock:
+                        counts[outcome] += 1
+                    # End of the request: what the request_finished handler does
+                    conn.close_if_unusable_or_obsolete()
+                    i += 1
+            finally:
+                conn.close()
+
+        def writer(section_id):
+            work(lambda conn, i: _write(conn, section_id, groups, i), 'writes', lambda i: i < ops)
+
+        def reader(section_id):
+            # Readers keep going until the writers are done
+            work(lambda conn, i: _read(conn, section_id), 'reads', lambda i: writing.is_set())
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(1, writers + 1)]
+        background = [threading.Thread(target=reader, args=(i % writers + 1,)) for i in range(readers)]
+        connection_created.connect(opened)
+        writing.set()
+        start = time.perf_counter()
+        try:
+            for t in background + threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            writing.clear()
+            for t in background:
+                t.join()
+            connection_created.disconnect(opened)
+
+    return {
+        'profile': name,
+        **counts,
+        'attempted_writes': writers * ops,
+        'elapsed_s': elapsed,
+        'writes_per_s': counts['writes'] / elapsed,
+    }
+
+
+def run(writers=8, readers=4, ops=25, groups=10):
+    return [run_profile(name, writers, readers, ops, groups) for name in profiles()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=25)
+    parser.add_argument('--groups', type=int, default=10)
+    args = parser.parse_args()
+
+    results = run(args.writers, args.readers, args.ops, args.groups)
+    print(f"{args.writers} writers x {args.ops} regenerations, {args.readers} readers, {args.groups} groups")
+    for r in results:
+        print(f"  {r['profile']}: {r['writes']:4d}/{r['attempted_writes']} writes ({r['writes_per_s']:7.1f}/s), "
+              f"{r['reads']:5d} reads, {r['locked']:3d} 'database is locked', "
+              f"{r['connections']:4d} connections, {r['elapsed_s']:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
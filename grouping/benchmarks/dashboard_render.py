@@ -0,0 +1,125 @@
+"""
+Dashboard render time and page size: per-student <select> vs shared group list.
+
+The old template built a full <select> of every group inside every
+student's move form (students x groups <option> tags). The page now sends
+the group list once as JSON and fills a select only when it is opened.
+This renders both versions of the template with the same in-memory
+section (no database) and compares them:
+
+    python -m grouping.benchmarks.dashboard_render [--students 1000] [--groups 100]
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'igf_project.settings')
+django.setup()
+
+from django.contrib.auth.models import AnonymousUser  # noqa: E402  (needs django.setup())
+from django.template import engines  # noqa: E402
+from django.template.loader import get_template  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from grouping.forms import RosterImportForm, StudentForm  # noqa: E402
+from grouping.models import Group, Section, Student  # noqa: E402
+
+CURRENT_SELECT = '''<select name="new_group_id" data-current="{{ item.group.id }}" style="font-size: 0.8em; padding: 5px; width:100%;">
+                                    <option value="" disabled selected>Move...</option>
+                                </select>'''
+LEGACY_SELECT = '''<select name="new_group_id" style="font-size: 0.8em; padding: 5px; width:100%;">
+                                    <option value="" disabled selected>Move...</option>
+                                    {% for g in group_data %}
+                                        {% if g.group.id != item.group.id %}
+                                            <option value="{{ g.group.id }}">{{ g.group.name }}</option>
+                                        {% endif %}
+                                    {% endfor %}
+                                </select>'''
+
+
+def legacy_template():
+    """dashboard.html with the old per-student <select> put back."""
+    source = get_template('grouping/dashboard.html').template.source
+    assert CURRENT_SELECT in source, "dashboard.html changed: update CURRENT_SELECT"
+    return engines['django'].from_string(source.replace(CURRENT_SELECT, LEGACY_SELECT))
+
+
+def make_context(students, groups):
+    section = Section(id=1, name='Benchmark', version=0)
+    group_objs = [Group(id=i + 1, section=section, name=f"Group {i + 1}") for i in range(groups)]
+    members = {g.id: [] for g in group_objs}
+    all_students = []
+    for i in range(students):
+        group = group_objs[i % groups]
+        student = Student(id=i + 1, section=section, name=f"Student {i + 1}", coding=1 + i % 5,
+                          design=1 + i * 3 % 5, writing=1 + i * 7 % 5, presenting=1 + i * 11 % 5,
+                          assigned_group=group)
+        members[group.id].append(student)
+        all_students.append(student)
+
+    group_data = [{
+        'group': g,
+        'students': members[g.id],
+        'skill_values': [10, 10, 10, 10],
+        'compatibility_score': 1.0,
+        'is_unbalanced': False,
+        'suggestion': None,
+        'weakness': 'Coding (10 pts)',
+    } for g in group_objs]
+    return {
+        'section': section,
+        'group_data': group_data,
+        'all_students': all_students,
+        'form': StudentForm(),
+        'import_form': RosterImportForm(),
+        'job': None,
+        'group_options': [[g.id, g.name] for g in group_objs],
+        'csrf_key': 'benchmark',
+        'card_cache_seconds': 0,  # measure rendering, not the fragment cache
+    }
+
+
+def best_render(template, context, repeat):
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    best, html = float('inf'), ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = template.render(context, request)
+        best = min(best, time.perf_counter() - start)
+    return best, len(html.encode())
+
+
+def run(students=1000, groups=100, repeat=3):
+    """Best-of-`repeat` render seconds and page bytes, before and after."""
+    context = make_context(students, groups)
+    before_s, before_bytes = best_render(legacy_template(), context, repeat)
+    after_s, after_bytes = best_render(get_template('grouping/dashboard.html'), context, repeat)
+    return {
+        'students': students,
+        'groups': groups,
+        'before_s': before_s,
+        'before_bytes': before_bytes,
+        'after_s': after_s,
+        'after_bytes': after_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    r = run(args.students, args.groups, args.repeat)
+    print(f"{r['students']} students x {r['groups']} groups")
+    print(f"  before: {r['before_s'] * 1000:8.1f} ms  {r['before_bytes'] / 1024:9.1f} KiB")
+    print(f"  after:  {r['after_s'] * 1000:8.1f} ms  {r['after_bytes'] / 1024:9.1f} KiB"
+          f"  (x{r['before_s'] / r['after_s']:.1f} faster, x{r['before_bytes'] / r['after_bytes']:.1f} smaller)")
+
+
+if __name__ == '__main__':
+    main()
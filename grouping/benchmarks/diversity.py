@@ -0,0 +1,112 @@
+"""
+Quality report: power scoring vs diversity scoring on synthetic rosters.
+
+For each roster shape, both scoring modes group the same students and the
+report compares how evenly every skill ends up spread (variance across
+groups of each group's mean coding, design, writing, presenting; lower is
+better), how even the groups' mean power stays, and the time taken:
+
+    python -m grouping.benchmarks.diversity [--students 500] [--groups 100] [--json]
+
+Diversity scoring scans every group for every student (O(n*k*4)), like the
+linear engine, so it is meant for class-sized sections, not 100k rosters.
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from grouping.planner import plan_matrix
+from grouping.skillmatrix import SKILL_FIELDS, SectionMatrix, group_counts, power, skill_spread
+
+MODES = ('power', 'diversity')
+
+
+def uniform(rng):
+    """Every skill 1-5, independently."""
+    return [rng.randint(1, 5) for _ in range(4)]
+
+
+def specialists(rng):
+    """One strong skill (4-5), the others weak (1-2)."""
+    row = [rng.randint(1, 2) for _ in range(4)]
+    row[rng.randrange(4)] = rng.choice((4, 5))
+    return row
+
+
+def lopsided(rng):
+    """A coding-heavy class: most strong students are coders."""
+    row = uniform(rng)
+    if rng.random() < 0.4:
+        row[0] = 5
+        row[3] = rng.randint(1, 2)
+    return row
+
+
+ROSTERS = {
+    'uniform': uniform,
+    'specialists': specialists,
+    'lopsided': lopsided,
+}
+
+
+def make_matrix(shape, n, seed=0):
+    rng = random.Random(seed)
+    return SectionMatrix.from_rows((i, None, *ROSTERS[shape](rng)) for i in range(1, n + 1))
+
+
+def quality(matrix, plan, k_value):
+    """Spread of each skill and of the mean power across the plan's groups."""
+    labels = np.empty(len(matrix), dtype=np.int64)
+    position = {sid: j for j, sid in enumerate(matrix.ids.tolist())}
+    for sid, idx in zip(plan.student_ids, plan.assignment):
+        labels[position[sid]] = idx
+    spread = skill_spread(matrix.skills, labels, k_value)
+    counts = group_counts(labels, k_value)
+    mean_power = np.bincount(labels, weights=power(matrix.skills), minlength=k_value)[counts > 0] / counts[counts > 0]
+    return {
+        'skill_variance': dict(zip(SKILL_FIELDS, spread.round(4).tolist())),
+        'worst_skill_variance': round(float(spread.max()), 4),
+        'power_variance': round(float(mean_power.var()), 4),
+    }
+
+
+def run(students=500, groups=100, seed=0, shapes=None):
+    """Returns one row per (roster shape, scoring mode)."""
+    results = []
+    for shape in shapes or ROSTERS:
+        matrix = make_matrix(shape, students, seed)
+        for mode in MODES:
+            start = time.perf_counter()
+            plan = plan_matrix(matrix, groups, scoring=mode)
+            elapsed = time.perf_counter() - start
+            results.append({'roster': shape, 'scoring': mode, 'students': students, 'groups': groups,
+                            'seconds': elapsed, **quality(matrix, plan, groups)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print the raw results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.students, args.groups, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.students} students x {args.groups} groups (variance across groups, lower is better)")
+    print(f"{'roster':<12} {'scoring':<10} " + ' '.join(f"{field:>10}" for field in SKILL_FIELDS)
+          + f" {'power':>8} {'ms':>8}")
+    for r in results:
+        print(f"{r['roster']:<12} {r['scoring']:<10} "
+              + ' '.join(f"{v:>10.4f}" for v in r['skill_variance'].values())
+              + f" {r['power_variance']:>8.4f} {r['seconds'] * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Reproducible benchmark suite: generation (with and without grouping rules),
+dashboard stats and roster parsing.
+
+Everything runs on synthetic data with a fixed seed against the pure parts
+of the app (planner.py, constraints.py, skillmatrix.py, roster.parse_row), so no database
+is touched and timings are comparable between releases:
+
+    python manage.py run_benchmarks [--sizes 100 1000] [--output results.json] [--baseline old.json]
+"""
+import csv
+import io
+import platform
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from grouping.constraints import Rules
+from grouping.planner import plan_matrix, plan_students
+from grouping.roster import parse_row
+from grouping.skillmatrix import SKILL_FIELDS, SectionMatrix, group_outliers, group_stdev, group_sums, power
+
+SIZES = (100, 1000, 10000, 100000)
+GROUP_SIZE = 5
+# A result this much slower than the baseline counts as a regression
+TOLERANCE = 0.25
+
+
+def make_students(n, seed=0):
+    """(id, coding, design, writing, presenting) tuples."""
+    rng = random.Random(seed)
+    return [(i, *(rng.randint(1, 5) for _ in range(4))) for i in range(1, n + 1)]
+
+
+def make_rules(students, seed=0):
+    """
+    Rules in the proportions of a busy section: keep-together sets of 2-3
+    students (n/5 pairs), 3n/5 keep-apart pairs, group sizes within one of
+    GROUP_SIZE. Always satisfiable.
+    """
+    rng = random.Random(seed)
+    ids = [sid for sid, *_ in students]
+    rng.shuffle(ids)
+    together, set_of = [], {}
+    i = 0
+    while len(together) < len(ids) // 5 and i + 3 <= len(ids):
+        size = rng.choice((2, 2, 3))
+        for a, b in zip(ids[i:i + size - 1], ids[i + 1:i + size]):
+            together.append((a, b))
+            set_of[b] = set_of.setdefault(a, a)
+        i += size
+    apart = []
+    while len(apart) < 3 * len(ids) // 5:
+        a, b = rng.choice(ids), rng.choice(ids)
+        if set_of.get(a, a) != set_of.get(b, b):
+            apart.append((a, b))
+    return Rules(together, apart, min_size=GROUP_SIZE - 1, max_size=GROUP_SIZE + 1)
+
+
+def make_csv(students):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(('name',) + SKILL_FIELDS)
+    for sid, *skills in students:
+        writer.writerow((f"Student {sid}", *skills))
+    return out.getvalue()
+
+
+def bench_generation(students, k_value):
+    """Sort + weakest-first assignment (planner.plan_students)."""
+    return lambda: plan_students(students, k_value)
+
+
+def bench_constraints(students, k_value):
+    """Generation under keep-together / keep-apart rules and size caps (constraints.solve)."""
+    matrix = SectionMatrix.from_rows((sid, None, c, d, w, p) for sid, c, d, w, p in students)
+    rules = make_rules(students)
+    return lambda: plan_matrix(matrix, k_value, rules=rules)
+
+
+def bench_dashboard_stats(students, k_value):
+    """The dashboard's vectorized pass: per-group sums, spread and outliers."""
+    assignment = plan_students(students, k_value)
+    rows = [(sid, assignment[sid] + 1, c, d, w, p) for sid, c, d, w, p in students]
+
+    def run():
+        matrix = SectionMatrix.from_rows(rows)
+        labels = matrix.labels_for(range(1, k_value + 1))
+        values = power(matrix.skills)
+        group_sums(matrix.skills, labels, k_value)
+        group_stdev(values, labels, k_value)
+        group_outliers(values, labels, k_value)
+    return run
+
+
+def bench_parse(students, k_value):
+    """
+    CSV parsing and validation of a roster file (roster.parse_row per row).
+    The bulk insert of an import is database time, so it is not timed here.
+    """
+    text = make_csv(students)
+
+    def run():
+        for row in csv.DictReader(io.StringIO(text)):
+            parse_row(row)
+    return run
+
+
+BENCHMARKS = {
+    'generation': bench_generation,
+    'constraints': bench_constraints,
+    'dashboard_stats': bench_dashboard_stats,
+    'parse': bench_parse,
+}
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(sizes=SIZES, repeat=3, names=None, seed=0):
+    """Runs the suite and returns a JSON-serializable dict."""
+    results = []
+    for n in sizes:
+        students = make_students(n, seed)
+        k_value = max(1, n // GROUP_SIZE)
+        for name in names or BENCHMARKS:
+            times = measure(BENCHMARKS[name](students, k_value), repeat)
+            results.append({
+                'benchmark': name,
+                'students': n,
+                'groups': k_value,
+                'repeat': repeat,
+                'best_s': min(times),
+                'median_s': statistics.median(times),
+            })
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance=TOLERANCE):
+    """
+    Results of `report` slower than the same benchmark/size in `baseline`
+    by more than `tolerance` (on the best time). Returns (name, students, old, new) tuples.
+    """
+    old = {(r['benchmark'], r['students']): r['best_s'] for r in baseline['results']}
+    regressions = []
+    for r in report['results']:
+        before = old.get((r['benchmark'], r['students']))
+        if before and r['best_s'] > before * (1 + tolerance):
+            regressions.append((r['benchmark'], r['students'], before, r['best_s']))
+    return regressions
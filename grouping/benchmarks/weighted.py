@@ -0,0 +1,69 @@
+"""
+Weighted vs unweighted generation at 5k students x 100 groups.
+
+Weighted scoring precomputes each student's power, best skill and clash
+penalty once (engines.score_rows), so the assignment loop does the same
+work in both modes. This benchmark checks that claim:
+
+    python -m grouping.benchmarks.weighted [--students 5000] [--groups 100]
+"""
+import argparse
+import random
+import time
+
+from grouping.engines import get_engine, normalize_weights
+
+WEIGHTS = {'c': 3, 'd': 1, 'w': 2, 'p': 5}
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    return [tuple(rng.randint(1, 5) for _ in range(4)) for _ in range(n)]
+
+
+def strongest_first(rows, weights=None):
+    w = normalize_weights(weights)
+    return sorted(rows, key=lambda r: r[0] * w[0] + r[1] * w[1] + r[2] * w[2] + r[3] * w[3],
+                  reverse=True)
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(students=5000, groups=100, repeat=5, engine=None):
+    """Returns the best-of-`repeat` seconds for both modes (sort + assignment)."""
+    assign = get_engine(engine)
+    rows = make_rows(students)
+    plain = best_time(lambda: assign(strongest_first(rows), groups), repeat)
+    weighted = best_time(lambda: assign(strongest_first(rows, WEIGHTS), groups, WEIGHTS), repeat)
+    return {
+        'students': students,
+        'groups': groups,
+        'unweighted_s': plain,
+        'weighted_s': weighted,
+        'ratio': weighted / plain,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--engine', default=None)
+    args = parser.parse_args()
+
+    result = run(args.students, args.groups, args.repeat, args.engine)
+    print(f"{result['students']} students x {result['groups']} groups")
+    print(f"  unweighted: {result['unweighted_s'] * 1000:8.1f} ms")
+    print(f"  weighted:   {result['weighted_s'] * 1000:8.1f} ms  (x{result['ratio']:.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,449 @@
+"""
+Constraint-aware assignment: keep-together / keep-apart rules and group size caps.
+
+A section can carry rules (StudentConstraint rows plus the section's
+min/max group size). When it does, planning goes through solve() instead
+of the greedy engine:
+
+1. Keep-together pairs are merged with union-find into blocks: students
+   who must share a group are placed as one unit.
+2. Keep-apart pairs become conflicts between blocks, kept as bitsets
+   (Python ints, bit b = block b). Every group keeps the bitset of the
+   blocks placed in it, so "may block b join group g?" is a single AND.
+3. Blocks are placed with the engines' scoring (fewest members first, then
+   the weakest group, then the Role Clash penalty): constrained blocks
+   first, most constrained first (DSatur: keep-apart partners in the most
+   different groups, then the most partners, then the biggest), then the
+   free students Strongest -> Weakest. A heap ordered by (size, power)
+   yields the best group; full or conflicting groups are skipped.
+   If a constrained block finds no group, or the constrained blocks leave
+   more places short of min_size than there are free students to fill
+   them, a bounded backtracking search (REPAIR_STEPS) looks for any valid
+   arrangement of the constrained blocks and the groups are rebuilt from
+   it before the free students join.
+4. Free students always join the smallest group with room, so they fill
+   the groups under min_size first and min_size holds.
+
+Without rules solve() is the heap engine. Rules that can't be met (an
+apart pair inside a together set, a set bigger than max_size, sizes that
+can't add up to the roster, or no arrangement found within REPAIR_STEPS)
+raise ConstraintError.
+Like planner.py, nothing here needs the ORM except Rules.load().
+"""
+import heapq
+
+from .engines import CLASH_THRESHOLD, heap_engine, score_rows
+
+# Most backtracking steps solve() spends on rules its greedy pass can't place
+REPAIR_STEPS = 20000
+
+
+class ConstraintError(ValueError):
+    """The section's rules can't be satisfied (or are malformed)."""
+
+
+class Rules:
+    """
+    A section's constraints as plain data (cheap to pickle for worker processes).
+    `together` / `apart` are (student id, student id) pairs.
+    """
+
+    def __init__(self, together=(), apart=(), min_size=None, max_size=None):
+        self.together = sorted({tuple(sorted(pair)) for pair in together})
+        self.apart = sorted({tuple(sorted(pair)) for pair in apart})
+        self.min_size = min_size or None
+        self.max_size = max_size or None
+
+    def __bool__(self):
+        return bool(self.together or self.apart or self.min_size or self.max_size)
+
+    @property
+    def students(self):
+        """Ids of every student named in a pair."""
+        return {sid for pair in self.together + self.apart for sid in pair}
+
+    def key(self):
+        """Canonical text of the rules, for planner.fingerprint."""
+        together = ','.join(f"{a}-{b}" for a, b in self.together)
+        apart = ','.join(f"{a}-{b}" for a, b in self.apart)
+        return f"together={together};apart={apart};min={self.min_size};max={self.max_size}"
+
+    def as_dict(self):
+        return {
+            'together': [list(pair) for pair in self.together],
+            'apart': [list(pair) for pair in self.apart],
+            'min_group_size': self.min_size,
+            'max_group_size': self.max_size,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Parses the as_dict() format (JSON API). Raises ConstraintError on malformed input."""
+        if not isinstance(data, dict):
+            raise ConstraintError("Rules must be a JSON object.")
+        pairs = {}
+        for field in ('together', 'apart'):
+            value = data.get(field, [])
+            if not isinstance(value, list) or not all(
+                    isinstance(pair, list) and len(pair) == 2 and all(type(sid) is int for sid in pair)
+                    for pair in value):
+                raise ConstraintError(f"'{field}' must be a list of [student_id, student_id] pairs.")
+            if any(a == b for a, b in value):
+                raise ConstraintError(f"'{field}' pairs need two different students.")
+            pairs[field] = value
+        sizes = []
+        for field in ('min_group_size', 'max_group_size'):
+            value = data.get(field)
+            if value is not None and (type(value) is not int or value < 1):
+                raise ConstraintError(f"'{field}' must be a positive integer or null.")
+            sizes.append(value)
+        if sizes[0] and sizes[1] and sizes[0] > sizes[1]:
+            raise ConstraintError("min_group_size can't be bigger than max_group_size.")
+        return cls(pairs['together'], pairs['apart'], *sizes)
+
+    @classmethod
+    def load(cls, section):
+        """One query: the section's pairs (sizes come from the section row itself)."""
+        return cls.load_many([section])[section.pk]
+
+    @classmethod
+    def load_many(cls, sections):
+        """{section id: Rules} for several sections, from one query."""
+        # Imported here so the rest of this module works without Django (worker processes)
+        from .models import StudentConstraint
+
+        pairs = {section.pk: {StudentConstraint.TOGETHER: [], StudentConstraint.APART: []} for section in sections}
+        rows = (StudentConstraint.objects.filter(section__in=list(pairs))
+                .values_list('section_id', 'kind', 'student_a_id', 'student_b_id'))
+        for section_id, kind, a, b in rows:
+            pairs[section_id][kind].append((a, b))
+        return {
+            section.pk: cls(pairs[section.pk][StudentConstraint.TOGETHER], pairs[section.pk][StudentConstraint.APART],
+                            section.min_group_size, section.max_group_size)
+            for section in sections
+        }
+
+
+def _find(parent, x):
+    # Path halving: every lookup shortens the path for the next one
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def blocks(student_ids, rules):
+    """
+    Union-find over the keep-together pairs.
+    Returns (block index per row, member rows per block). Blocks are numbered
+    in row order, so with rows sorted Strongest -> Weakest a block's number
+    follows its strongest member. Pairs naming unknown students are ignored.
+    """
+    n = len(student_ids)
+    position = {sid: j for j, sid in enumerate(student_ids)}
+    parent = list(range(n))
+    for a, b in rules.together:
+        if a in position and b in position:
+            ra, rb = _find(parent, position[a]), _find(parent, position[b])
+            if ra != rb:
+                # The lower row (the stronger student) stays the root
+                parent[max(ra, rb)] = min(ra, rb)
+
+    block_of = [0] * n
+    members = []
+    numbers = {}
+    for j in range(n):
+        root = _find(parent, j)
+        if root not in numbers:
+            numbers[root] = len(members)
+            members.append([])
+        block_of[j] = numbers[root]
+        members[block_of[j]].append(j)
+    return block_of, members
+
+
+def conflicts(student_ids, rules, block_of):
+    """
+    Keep-apart pairs as one bitset per block (bit c set = must not share a group with block c).
+    Raises ConstraintError for an apart pair inside a keep-together set.
+    """
+    position = {sid: j for j, sid in enumerate(student_ids)}
+    bits = [0] * (max(block_of) + 1 if block_of else 0)
+    for a, b in rules.apart:
+        if a in position and b in position:
+            ba, bb = block_of[position[a]], block_of[position[b]]
+            if ba == bb:
+                raise ConstraintError(
+                    f"Students {a} and {b} must be kept apart but are in the same keep-together set.")
+            bits[ba] |= 1 << bb
+            bits[bb] |= 1 << ba
+    return bits
+
+
+def _neighbours(student_ids, rules, block_of, block_count):
+    """Keep-apart partners of every block, as lists of block numbers."""
+    position = {sid: j for j, sid in enumerate(student_ids)}
+    result = [set() for _ in range(block_count)]
+    for a, b in rules.apart:
+        if a in position and b in position:
+            ba, bb = block_of[position[a]], block_of[position[b]]
+            result[ba].add(bb)
+            result[bb].add(ba)
+    return [sorted(c) for c in result]
+
+
+def _shortfall(counts, min_size):
+    """Places still missing for every group to reach min_size."""
+    return sum(min_size - c for c in counts if c < min_size)
+
+
+def _search(order, neighbours, sizes, k_value, max_size, min_size=0, spare=0, budget=REPAIR_STEPS):
+    """
+    Backtracking over the blocks in `order` (most keep-apart partners first):
+    {block: group} with no keep-apart pair sharing a group, no group over
+    max_size and at most `spare` places (the free students) short of
+    min_size, or None if there is none, or none within `budget` steps.
+    Only the first empty group is ever tried (empty groups are interchangeable).
+    """
+    order = sorted(order, key=lambda b: (-len(neighbours[b]), -sizes[b], b))
+    group_of = {}
+    counts = [0] * k_value
+    # Members of the blocks from position i on: what can still fill the short groups
+    remaining = [0] * (len(order) + 1)
+    for i in range(len(order) - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + sizes[order[i]]
+
+    def options(b):
+        taken = {group_of[c] for c in neighbours[b] if c in group_of}
+        result, empty_tried = [], False
+        for g in sorted(range(k_value), key=lambda g: (counts[g], g)):
+            if g in taken or (max_size and counts[g] + sizes[b] > max_size):
+                continue
+            if not counts[g]:
+                if empty_tried:
+                    continue
+                empty_tried = True
+            result.append(g)
+        return iter(result)
+
+    if not order:
+        return group_of
+    frames = [options(order[0])]
+    steps = 0
+    while frames:
+        b = order[len(frames) - 1]
+        if b in group_of:  # coming back to this block: undo its last try
+            counts[group_of.pop(b)] -= sizes[b]
+        g = next(frames[-1], None)
+        if g is None:
+            frames.pop()
+            continue
+        steps += 1
+        if steps > budget:
+            return None
+        group_of[b] = g
+        counts[g] += sizes[b]
+        if min_size and _shortfall(counts, min_size) > remaining[len(frames)] + spare:
+            continue  # the blocks left can't fill the short groups: try the next group
+        if len(frames) == len(order):
+            return group_of
+        frames.append(options(order[len(frames)]))
+    return None
+
+
+def check(rules):
+    """Raises ConstraintError if the rules contradict each other, whatever the roster."""
+    named = sorted(rules.students)
+    block_of, members = blocks(named, rules)
+    conflicts(named, rules, block_of)
+    largest = max((len(m) for m in members), default=0)
+    if rules.max_size and largest > rules.max_size:
+        raise ConstraintError(f"A keep-together set of {largest} students doesn't fit in groups of {rules.max_size}.")
+
+
+def solve(rows, student_ids, k_value, weights=None, rules=None):
+    """
+    Assignment that respects `rules`: group index per row, like an engine.
+    `rows` / `student_ids` are parallel, sorted Strongest -> Weakest.
+    """
+    n = len(rows)
+    if n and k_value < 1:
+        raise ValueError("k_value must be at least 1")
+    if not rules:
+        return heap_engine(rows, k_value, weights)
+    min_size = rules.min_size or 0
+    max_size = rules.max_size
+
+    # --- 1. Pre-merge keep-together sets ---
+    block_of, members = blocks(student_ids, rules)
+
+    # --- 2. Keep-apart pairs as block conflict bitsets ---
+    apart = conflicts(student_ids, rules, block_of)
+
+    if max_size and k_value * max_size < n:
+        raise ConstraintError(f"{k_value} groups of at most {max_size} can't hold {n} students.")
+    if min_size * k_value > n:
+        raise ConstraintError(f"{n} students can't fill {k_value} groups of at least {min_size}.")
+    largest = max((len(m) for m in members), default=0)
+    if max_size and largest > max_size:
+        raise ConstraintError(f"A keep-together set of {largest} students doesn't fit in groups of {max_size}.")
+
+    # --- 3. Greedy placement ---
+    student_powers, best_skills, clashes = score_rows(rows, weights)
+    block_power = [sum(student_powers[j] for j in m) for m in members]
+    # (skill, penalty) of every Expert in the block, for the Role Clash rule
+    block_experts = [[(best_skills[j], clashes[j]) for j in m if clashes[j]] for m in members]
+
+    counts = [0] * k_value
+    powers = [0] * k_value
+    sums = [[0, 0, 0, 0] for _ in range(k_value)]
+    placed = [0] * k_value  # bitset of the blocks in each group
+    versions = [0] * k_value
+    # Entries are (count, power, group, version), stale once the group's version moves on.
+    # Like heap_engine, one heap of every group plus, per skill, a heap of the groups
+    # that would NOT trigger a Role Clash for that skill.
+    heap = [(0, 0, g, 0) for g in range(k_value)]
+    open_heaps = [list(heap) for _ in range(4)]
+
+    def usable(count, g, size, bits):
+        return not (max_size and count + size > max_size) and not placed[g] & bits
+
+    def head(queue, size, bits, skill=None):
+        """The first entry of `queue` the block may join (left on the queue), or None."""
+        skipped = []
+        found = None
+        while queue:
+            count, power, g, version = queue[0]
+            if version != versions[g] or (max_size and count >= max_size) or (
+                    skill is not None and sums[g][skill] >= CLASH_THRESHOLD):
+                heapq.heappop(queue)  # stale, full or clashing: gone for good
+            elif usable(count, g, size, bits):
+                found = queue[0]
+                break
+            else:
+                skipped.append(heapq.heappop(queue))
+        for entry in skipped:
+            heapq.heappush(queue, entry)
+        return found
+
+    def best_for_student(j, bits):
+        # The heap engine's rule: the head of the heap, unless it clashes and the
+        # best non-clashing group (head of the skill's open heap) scores lower.
+        first = head(heap, 1, bits)
+        if first is None:
+            return None
+        count, power, g, _ = first
+        best = (count, power, g)
+        skill, clash = best_skills[j], clashes[j]
+        if clash and sums[g][skill] >= CLASH_THRESHOLD:
+            best = (count, power + clash, g)
+            clear = head(open_heaps[skill], 1, bits, skill)
+            if clear is not None and clear[:3] < best:
+                best = clear[:3]
+        return best[2]
+
+    def best_for_block(b, bits):
+        # Several members (so possibly several clashes): scan the heap in order until
+        # no later group can beat the best one so far.
+        size = len(members[b])
+        best = None  # (count, score, group)
+        popped = []
+        while heap:
+            entry = heapq.heappop(heap)
+            count, power, g, version = entry
+            if version != versions[g] or (max_size and count >= max_size):
+                continue  # stale or full: gone for good
+            popped.append(entry)
+            if best is not None and (count, power, g) > best:
+                break
+            if usable(count, g, size, bits):
+                score = power + sum(p for skill, p in block_experts[b] if sums[g][skill] >= CLASH_THRESHOLD)
+                if best is None or (count, score, g) < best:
+                    best = (count, score, g)
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return best and best[2]
+
+    def put(b, g):
+        for j in members[b]:
+            assignment[j] = g
+            for s in range(4):
+                sums[g][s] += rows[j][s]
+        counts[g] += len(members[b])
+        powers[g] += block_power[b]
+        placed[g] |= 1 << b
+        versions[g] += 1
+        entry = (counts[g], powers[g], g, versions[g])
+        heapq.heappush(heap, entry)
+        for s in range(4):
+            if sums[g][s] < CLASH_THRESHOLD:
+                heapq.heappush(open_heaps[s], entry)
+
+    def best_for(b):
+        if len(members[b]) == 1:
+            return best_for_student(members[b][0], apart[b])
+        return best_for_block(b, apart[b])
+
+    assignment = [0] * n
+    neighbours = _neighbours(student_ids, rules, block_of, len(members))
+    constrained = [b for b, m in enumerate(members) if len(m) > 1 or apart[b]]
+    free = [b for b, m in enumerate(members) if len(m) == 1 and not apart[b]]
+
+    # 3a. Constrained blocks, most constrained first (DSatur): the block whose
+    # keep-apart partners already sit in the most different groups, then the one
+    # with the most keep-apart partners, then the biggest.
+    stuck = None
+    saturation = {b: set() for b in constrained}
+    queue = [(0, -len(neighbours[b]), -len(members[b]), b) for b in constrained]
+    heapq.heapify(queue)
+    done = set()
+    while queue:
+        sat, _, _, b = heapq.heappop(queue)
+        if b in done or -sat != len(saturation[b]):
+            continue  # placed already, or an outdated entry
+        g = best_for(b)
+        if g is None:
+            stuck = b
+            break
+        put(b, g)
+        done.add(b)
+        for c in neighbours[b]:
+            if c not in done and g not in saturation[c]:
+                saturation[c].add(g)
+                heapq.heappush(queue, (-len(saturation[c]), -len(neighbours[c]), -len(members[c]), c))
+
+    # 3b. The greedy order painted itself into a corner (a block with no group, or
+    # groups the free students are too few to bring up to min_size): search for any
+    # arrangement of the constrained blocks (bounded), then start the groups over from it.
+    short = stuck is None and min_size and _shortfall(counts, min_size) > len(free)
+    if stuck is not None or short:
+        sizes = [len(m) for m in members]
+        found = _search(constrained, neighbours, sizes, k_value, max_size, min_size, len(free))
+        if found is None and stuck is not None and not (
+                min_size and _search(constrained, neighbours, sizes, k_value, max_size) is not None):
+            ids = ', '.join(str(student_ids[j]) for j in members[stuck])
+            raise ConstraintError(f"No group can take student(s) {ids}: every group with room "
+                                  "already has someone they must be kept apart from.")
+        if found is None:
+            raise ConstraintError(f"The keep-together and keep-apart rules can't be met with at least "
+                                  f"{min_size} students in every group.")
+        for g in range(k_value):
+            counts[g] = powers[g] = placed[g] = versions[g] = 0
+            sums[g] = [0, 0, 0, 0]
+        heap[:] = [(0, 0, g, 0) for g in range(k_value)]
+        for queue in open_heaps:
+            queue[:] = heap
+        for b in constrained:
+            put(b, found[b])
+
+    # 3c. Everyone else, Strongest -> Weakest. They have no keep-apart partners,
+    # so the only limit is max_size (and the capacity check above leaves room).
+    for b in free:
+        put(b, best_for_student(members[b][0], 0))
+
+    # --- 4. Every group reached min_size? Free students always join the smallest
+    # group with room and 3b left enough of them, so this is only a safety net.
+    if min_size and counts and min(counts) < min_size:
+        raise ConstraintError(f"The keep-together and keep-apart rules can't be met with at least "
+                              f"{min_size} students in every group.")
+    return assignment
@@ -0,0 +1,298 @@
+"""
+Assignment Engines for the Power Balancing Algorithm.
+
+Every engine receives the students as plain skill tuples
+(coding, design, writing, presenting), already sorted Strongest -> Weakest,
+plus the optional skill weights, and returns the group index picked for
+each student (same order).
+Engines never touch the database, so they can be swapped freely.
+
+Scoring (shared by all engines, lowest score wins, lowest index breaks ties):
+    RULE 1: +100000 if the group is bigger than the smallest group (Keep sizes even)
+    RULE 2: +total_power of the group (Fill the Weakest Group)
+    RULE 3: +5 if the student is an Expert (5) in their best skill and the
+            group already has 4+ points in that skill (Role Clash)
+
+Weighted mode: power is sum(weight * skill), the best skill is the one with
+the highest weighted value, and the clash penalty is scaled by that skill's
+weight. With all weights at 1 this is exactly the unweighted algorithm.
+
+Diversity mode (diversity_engine) keeps RULE 1 but replaces RULES 2-3 with
+the distance between each group's skills and the section's mean, so all
+four skills are balanced instead of power plus the best-skill clash.
+"""
+import heapq
+
+SIZE_PENALTY = 100000
+CLASH_PENALTY = 5
+EXPERT_LEVEL = 5
+CLASH_THRESHOLD = 4
+
+# Keys used by the dashboard form (weight_c, weight_d, weight_w, weight_p)
+WEIGHT_KEYS = ('c', 'd', 'w', 'p')
+DEFAULT_WEIGHTS = (1, 1, 1, 1)
+
+
+def normalize_weights(weights=None):
+    """
+    Turns the {'c': 1, 'd': 1, 'w': 1, 'p': 1} dict from the view into a
+    (coding, design, writing, presenting) tuple. Missing keys count as 1.
+    """
+    if not weights:
+        return DEFAULT_WEIGHTS
+    if isinstance(weights, dict):
+        weights = tuple(int(weights.get(key, 1)) for key in WEIGHT_KEYS)
+    else:
+        weights = tuple(int(w) for w in weights)
+    if len(weights) != 4 or any(w < 0 for w in weights):
+        raise ValueError("weights must be four non-negative numbers")
+    return weights
+
+
+def best_skill_index(row):
+    """Index of the student's strongest skill (first one wins on ties)."""
+    best = 0
+    for i in range(1, len(row)):
+        if row[i] > row[best]:
+            best = i
+    return best
+
+
+def score_rows(rows, weights=None):
+    """
+    Precomputes everything the inner loop needs, once per student:
+    (power, best_skill, clash_penalty) lists. clash_penalty is 0 for
+    students who are not Experts in their best skill.
+    """
+    w = normalize_weights(weights)
+    powers, best_skills, clashes = [], [], []
+    for row in rows:
+        weighted = [row[0] * w[0], row[1] * w[1], row[2] * w[2], row[3] * w[3]]
+        best = best_skill_index(weighted)
+        powers.append(sum(weighted))
+        best_skills.append(best)
+        clashes.append(CLASH_PENALTY * w[best] if row[best] >= EXPERT_LEVEL else 0)
+    return powers, best_skills, clashes
+
+
+def linear_engine(rows, k_value, weights=None):
+    """
+    The original engine: scans every group for every student. O(n*k).
+    Kept as the reference implementation the faster engines are checked against.
+    """
+    if rows and k_value < 1:
+        raise ValueError("k_value must be at least 1")
+
+    student_powers, best_skills, clashes = score_rows(rows, weights)
+    counts = [0] * k_value
+    powers = [0] * k_value
+    sums = [[0, 0, 0, 0] for _ in range(k_value)]
+
+    assignment = []
+    for j, row in enumerate(rows):
+        best_skill = best_skills[j]
+        clash = clashes[j]
+        min_size = min(counts)
+
+        best_group = None
+        best_score = float('inf')
+        for i in range(k_value):
+            score = SIZE_PENALTY if counts[i] > min_size else 0
+            score += powers[i]
+            if clash and sums[i][best_skill] >= CLASH_THRESHOLD:
+                score += clash
+            if score < best_score:
+                best_score = score
+                best_group = i
+
+        assignment.append(best_group)
+        counts[best_group] += 1
+        powers[best_group] += student_powers[j]
+        for s in range(4):
+            sums[best_group][s] += row[s]
+
+    return assignment
+
+
+def heap_engine(rows, k_value, weights=None):
+    """
+    Priority-queue engine: O(n log k), same groups as `linear_engine`.
+
+    Groups are split into two size tiers: the smallest groups (no size penalty)
+    and everyone else. Each tier keeps a heap ordered by (total_power, index),
+    plus one heap per skill holding only the groups that would NOT trigger a
+    Role Clash for that skill. The best group in a tier is therefore either
+    the top of the tier heap, or - when that one clashes - the top of the
+    matching "no clash" heap.
+
+    Heap entries are invalidated lazily: every assignment bumps the group's
+    version, and stale entries are dropped when they reach the top.
+    """
+    if rows and k_value < 1:
+        raise ValueError("k_value must be at least 1")
+
+    student_powers, best_skills, clashes = score_rows(rows, weights)
+    counts = [0] * k_value
+    powers = [0] * k_value
+    sums = [[0, 0, 0, 0] for _ in range(k_value)]
+    versions = [0] * k_value
+
+    # Tier 0 = groups with count == min_size, Tier 1 = bigger groups
+    state = {'min_size': 0, 'in_min_tier': k_value}
+    main_heaps = [[], []]
+    open_heaps = [[[], [], [], []], [[], [], [], []]]
+
+    def push(tier, i):
+        entry = (powers[i], i, versions[i])
+        heapq.heappush(main_heaps[tier], entry)
+        for s in range(4):
+            if sums[i][s] < CLASH_THRESHOLD:
+                heapq.heappush(open_heaps[tier][s], entry)
+
+    def rebuild():
+        # The smallest tier just filled up: re-split every group into tiers.
+        min_size = min(counts)
+        state['min_size'] = min_size
+        state['in_min_tier'] = 0
+        for tier in (0, 1):
+            main_heaps[tier] = []
+            open_heaps[tier] = [[], [], [], []]
+        for i in range(k_value):
+            tier = 0 if counts[i] == min_size else 1
+            if tier == 0:
+                state['in_min_tier'] += 1
+            entry = (powers[i], i, versions[i])
+            main_heaps[tier].append(entry)
+            for s in range(4):
+                if sums[i][s] < CLASH_THRESHOLD:
+                    open_heaps[tier][s].append(entry)
+        for tier in (0, 1):
+            heapq.heapify(main_heaps[tier])
+            for s in range(4):
+                heapq.heapify(open_heaps[tier][s])
+
+    def top(heap):
+        while heap and heap[0][2] != versions[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def best_in_tier(tier, best_skill, clash):
+        head = top(main_heaps[tier])
+        if head is None:
+            return None
+        score, idx = head[0], head[1]
+        if clash and sums[idx][best_skill] >= CLASH_THRESHOLD:
+            score += clash
+            clear = top(open_heaps[tier][best_skill])
+            if clear is not None and (clear[0], clear[1]) < (score, idx):
+                score, idx = clear[0], clear[1]
+        return (score + tier * SIZE_PENALTY, idx)
+
+    rebuild()
+
+    assignment = []
+    for j, row in enumerate(rows):
+        best_skill = best_skills[j]
+        clash = clashes[j]
+
+        candidates = [c for c in (best_in_tier(0, best_skill, clash),
+                                  best_in_tier(1, best_skill, clash)) if c is not None]
+        idx = min(candidates)[1]
+        assignment.append(idx)
+
+        was_min_tier = counts[idx] == state['min_size']
+        counts[idx] += 1
+        powers[idx] += student_powers[j]
+        for s in range(4):
+            sums[idx][s] += row[s]
+        versions[idx] += 1
+
+        if was_min_tier:
+            state['in_min_tier'] -= 1
+            if state['in_min_tier'] == 0:
+                rebuild()
+                continue
+        push(1, idx)
+
+    return assignment
+
+
+def diversity_engine(rows, k_value, weights=None):
+    """
+    Diversity scoring: balances every group's whole skill vector, not only its
+    total power and its Experts. O(n*k*4).
+
+    RULE 1 still holds (only the smallest groups are candidates). Among them the
+    student joins the group they pull furthest towards the section's mean skill
+    vector: the one whose (squared) distance from the mean grows least, so the
+    total distance of all groups stays as small as possible. Lowest index on ties.
+
+    Each group keeps dev = n * sums - count * section_total (all four skills,
+    weighted), i.e. its centroid's offset from the mean scaled by n * count, so
+    everything stays in integers. A student with (weighted) skills v moves dev
+    by step = n * v - section_total, and the squared distance grows by
+    2 * dev . step + |step|^2; the second term is the same for every group, so
+    the best group is the one with the lowest dev . step. Every placement
+    updates one dev vector: O(4).
+    """
+    if rows and k_value < 1:
+        raise ValueError("k_value must be at least 1")
+
+    w = normalize_weights(weights)
+    n = len(rows)
+    vectors = [(row[0] * w[0], row[1] * w[1], row[2] * w[2], row[3] * w[3]) for row in rows]
+    total = [sum(v[s] for v in vectors) for s in range(4)]
+    counts = [0] * k_value
+    devs = [[0, 0, 0, 0] for _ in range(k_value)]
+
+    assignment = []
+    for v in vectors:
+        step = (n * v[0] - total[0], n * v[1] - total[1], n * v[2] - total[2], n * v[3] - total[3])
+        min_size = min(counts)
+
+        best_group = None
+        best_score = None
+        for i in range(k_value):
+            if counts[i] != min_size:
+                continue
+            dev = devs[i]
+            score = dev[0] * step[0] + dev[1] * step[1] + dev[2] * step[2] + dev[3] * step[3]
+            if best_score is None or score < best_score:
+                best_score = score
+                best_group = i
+
+        assignment.append(best_group)
+        counts[best_group] += 1
+        dev = devs[best_group]
+        for s in range(4):
+            dev[s] += step[s]
+
+    return assignment
+
+
+ENGINES = {
+    'linear': linear_engine,
+    'heap': heap_engine,
+}
+
+DEFAULT_ENGINE = 'heap'
+
+# What "the best group" means. 'power' is RULE 1-3 above (run by any of ENGINES,
+# which all give the same groups); 'diversity' is diversity_engine.
+SCORING_MODES = ('power', 'diversity')
+DEFAULT_SCORING = 'power'
+
+
+def get_engine(name=None):
+    """Looks up an engine by name (None means the default one)."""
+    try:
+        return ENGINES[name or DEFAULT_ENGINE]
+    except KeyError:
+        raise ValueError(f"Unknown assignment engine: {name}")
+
+
+def normalize_scoring(name=None):
+    """Checks a scoring mode name (None means the default one)."""
+    if (name or DEFAULT_SCORING) not in SCORING_MODES:
+        raise ValueError(f"Unknown scoring mode: {name}")
+    return name or DEFAULT_SCORING
@@ -0,0 +1,92 @@
+"""
+Streaming CSV / JSON exports of sections, groups and members.
+
+Students are read with .iterator(chunk_size=...) over one
+select_related('assigned_group') queryset and turned into text as they
+arrive, so the first bytes go out immediately and memory stays flat
+whatever the roster size.
+"""
+import csv
+import json
+
+from .models import Group, Student
+from .skillmatrix import SKILL_FIELDS
+
+CHUNK_SIZE = 2000
+CSV_HEADER = ['section', 'group', 'student_id', 'name', *SKILL_FIELDS, 'power']
+
+
+class Echo:
+    """A file-like object that hands each written line straight back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def _students(sections):
+    """All students of `sections`, section by section, with their group (one streaming query)."""
+    return (Student.objects.filter(section__in=sections)
+            .select_related('assigned_group')
+            .order_by('section_id', 'id')
+            .iterator(chunk_size=CHUNK_SIZE))
+
+
+def _by_section(sections, students):
+    """
+    Pairs every section with an iterator over its own students, walking the
+    single ordered student stream once (sections without students included).
+    """
+    students = iter(students)
+    pending = next(students, None)
+    for section in sections:
+        def members(section_id=section.id):
+            nonlocal pending
+            while pending is not None and pending.section_id == section_id:
+                yield pending
+                pending = next(students, None)
+        yield section, members()
+
+
+def csv_rows(sections):
+    """CSV lines (strings) for every student of `sections`."""
+    sections = list(sections.order_by('id'))
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for section, members in _by_section(sections, _students(sections)):
+        for s in members:
+            skills = [getattr(s, field) for field in SKILL_FIELDS]
+            group = s.assigned_group.name if s.assigned_group else ''
+            yield writer.writerow([section.name, group, s.id, s.name, *skills, sum(skills)])
+
+
+def json_chunks(sections):
+    """
+    A JSON document, piece by piece:
+    {"sections": [{"id", "name", "groups": [{"id", "name"}], "students": [...]}]}
+    """
+    sections = list(sections.order_by('id'))
+    groups = {}
+    for group in Group.objects.filter(section__in=sections).order_by('id'):
+        groups.setdefault(group.section_id, []).append({'id': group.id, 'name': group.name})
+
+    yield '{"sections": ['
+    for n, (section, members) in enumerate(_by_section(sections, _students(sections))):
+        head = {
+            'id': section.id,
+            'name': section.name,
+            'created_at': section.created_at.isoformat(),
+            'groups': groups.get(section.id, []),
+        }
+        # Open the section object and its "students" list, then stream the members
+        yield ('' if n == 0 else ', ') + json.dumps(head)[:-1] + ', "students": ['
+        for i, s in enumerate(members):
+            student = {
+                'id': s.id,
+                'name': s.name,
+                'group_id': s.assigned_group_id,
+                'group': s.assigned_group.name if s.assigned_group else None,
+                **{field: getattr(s, field) for field in SKILL_FIELDS},
+            }
+            yield ('' if i == 0 else ', ') + json.dumps(student)
+        yield ']}'
+    yield ']}\n'
@@ -36,4 +36,11 @@ class TeacherSignUpForm(UserCreationForm):
 
     class Meta:
         model = User
-        fields = ('username', 'first_name', 'last_name', 'email')
\ No newline at end of file
+        fields = ('username', 'first_name', 'last_name', 'email')
+
+class RosterImportForm(forms.Form):
+    roster = forms.FileField(
+        label="CSV file",
+        help_text="Columns: name, coding, design, writing, presenting (1-5)",
+        widget=forms.ClearableFileInput(attrs={'accept': '.csv,text/csv', 'style': 'color: #aaa; width: 100%;'}),
+    )
@@ -0,0 +1,158 @@
+"""
+Background group generation.
+
+The GenerationJob table is the queue: trigger_generation inserts a row and
+returns immediately, and a small in-process thread pool (no external
+broker) runs the job once the request's transaction has committed.
+Queued jobs left behind by a restart can be drained with:
+    python manage.py run_generation_jobs
+
+A job whose worker died (crash, restart) would stay queued or running
+forever and block its section: after GENERATION_STALE_AFTER seconds it
+counts as stale. enqueue() fails a stale job and queues a fresh one;
+run_generation_jobs puts stale jobs back in the queue and runs them.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .engines import normalize_scoring
+from .models import GenerationJob
+from .services import RosterChanged, plan_groups, save_groups
+
+logger = logging.getLogger(__name__)
+
+# Planning is retried if students change while a job runs.
+MAX_ATTEMPTS = 3
+
+# Seconds after which a queued or running job is presumed dead (planning
+# takes seconds at most: the optimizer's time budget is capped at 10)
+STALE_AFTER = getattr(settings, 'GENERATION_STALE_AFTER', 600)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'GENERATION_WORKERS', 2),
+    thread_name_prefix='generation',
+)
+
+
+def enqueue(section, k_value, weights=None, optimize=False, time_budget=1.0, scoring=None):
+    """
+    Queues a (re)generation of `section` and returns its job.
+    If the section already has a queued or running job, that job is returned instead
+    (unless it is stale: then it is marked failed and a new job is queued).
+    """
+    recover_stale(section=section)
+    active = (GenerationJob.objects
+              .filter(section=section, status__in=[GenerationJob.QUEUED, GenerationJob.RUNNING])
+              .order_by('-id').first())
+    if active:
+        return active
+    job = GenerationJob.objects.create(section=section, k_value=k_value, weights=weights or {},
+                                       optimize=optimize, time_budget=time_budget,
+                                       scoring=normalize_scoring(scoring))
+    # Only hand the job to a worker once the row is visible to other connections
+    transaction.on_commit(lambda: _executor.submit(_run_in_thread, job.id))
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # Worker threads get their own DB connection; don't leak it.
+        connection.close()
+
+
+def run_job(job_id):
+    """
+    Runs one queued job to completion (in the calling thread).
+    Returns False if the job was not queued anymore (e.g. another worker took it).
+    """
+    claimed = GenerationJob.objects.filter(id=job_id, status=GenerationJob.QUEUED).update(
+        status=GenerationJob.RUNNING, started_at=timezone.now(), progress=5,
+    )
+    if not claimed:
+        return False
+
+    job = GenerationJob.objects.select_related('section').get(id=job_id)
+
+    def report(percent):
+        GenerationJob.objects.filter(id=job_id).update(progress=percent)
+
+    try:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            plan = plan_groups(job.section, job.k_value, job.weights, progress=report,
+                               optimize=job.optimize, time_budget=job.time_budget, scoring=job.scoring)
+            try:
+                # Old groups are swapped for the new ones in a single transaction.
+                save_groups(job.section, plan, replace=True)
+                break
+            except RosterChanged:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+    except Exception as exc:
+        logger.exception("Generation job %s failed", job_id)
+        GenerationJob.objects.filter(id=job_id).update(
+            status=GenerationJob.FAILED, error=str(exc), finished_at=timezone.now(),
+        )
+    else:
+        GenerationJob.objects.filter(id=job_id).update(
+            status=GenerationJob.DONE, progress=100, finished_at=timezone.now(),
+            result=_result(plan),
+        )
+    return True
+
+
+def _result(plan):
+    """What the job stores about its plan: the inputs fingerprint, whether it was reused, how it was scored."""
+    result = {
+        'fingerprint': plan.fingerprint,
+        'generation': plan.generation.id,
+        'reused': plan.source is not None,
+        'unchanged': plan.unchanged,
+    }
+    if plan.optimization:
+        result['optimization'] = plan.optimization
+    # The scoring that actually ran, and why if it isn't the one asked for
+    result['scoring'] = plan.scoring
+    if plan.notes:
+        result['notes'] = plan.notes
+    return result
+
+
+def stale_jobs(section=None):
+    """Queued jobs nobody picked up and running jobs nobody finished within STALE_AFTER."""
+    cutoff = timezone.now() - timedelta(seconds=STALE_AFTER)
+    jobs = GenerationJob.objects.filter(
+        Q(status=GenerationJob.QUEUED, created_at__lt=cutoff)
+        | Q(status=GenerationJob.RUNNING, started_at__lt=cutoff)
+    )
+    if section is not None:
+        jobs = jobs.filter(section=section)
+    return jobs
+
+
+def recover_stale(section=None, requeue=False):
+    """
+    Marks stale jobs failed (or, with requeue=True, puts them back in the queue
+    to be run again). Returns how many were recovered.
+    """
+    if requeue:
+        return stale_jobs(section).update(status=GenerationJob.QUEUED, started_at=None, progress=0)
+    return stale_jobs(section).update(
+        status=GenerationJob.FAILED, finished_at=timezone.now(),
+        error=f"The worker stopped responding (no result after {STALE_AFTER} seconds).",
+    )
+
+
+def run_queued():
+    """Runs every queued job, oldest first. Returns how many were run."""
+    ran = 0
+    for job_id in GenerationJob.objects.filter(status=GenerationJob.QUEUED).order_by('id').values_list('id', flat=True):
+        ran += run_job(job_id)
+    return ran
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from grouping import stats
+from grouping.models import Group
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the GroupStats table from the students and verifies it against ground truth."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', type=int, help="Only this section id (default: every section).")
+        parser.add_argument('--check', action='store_true',
+                            help="Only verify; exit with an error if any group is out of sync.")
+
+    def handle(self, *args, **options):
+        groups = Group.objects.all()
+        if options['section']:
+            groups = groups.filter(section_id=options['section'])
+
+        if not options['check']:
+            fixed = stats.rebuild(groups)
+            self.stdout.write(f"Rebuilt stats: {fixed} group(s) were out of sync.")
+
+        wrong = stats.verify(groups)
+        if wrong:
+            raise CommandError(f"{len(wrong)} group(s) out of sync: {', '.join(map(str, wrong))}")
+        self.stdout.write(self.style.SUCCESS(f"Verified stats of {groups.count()} group(s)."))
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from grouping import batch
+from grouping.models import Section
+
+
+class Command(BaseCommand):
+    help = "Regenerates the groups of many sections at once, planning them in parallel worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('groups', type=int, help="Number of groups per section.")
+        parser.add_argument('--teacher', help="Only this teacher's sections (username; default: every section).")
+        parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU; 1 = no pool).")
+        parser.add_argument('--batch-size', type=int, default=batch.BATCH_SIZE,
+                            help="Sections written per transaction.")
+
+    def handle(self, *args, **options):
+        sections = Section.objects.all()
+        if options['teacher']:
+            try:
+                sections = sections.filter(teacher=User.objects.get(username=options['teacher']))
+            except User.DoesNotExist:
+                raise CommandError(f"No teacher named '{options['teacher']}'.")
+
+        try:
+            result = batch.regenerate_all(sections, options['groups'], workers=options['workers'],
+                                          batch_size=options['batch_size'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        timings = ', '.join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in result.timings.items())
+        self.stdout.write(f"Workers: {result.workers} ({timings})")
+        if result.busy:
+            self.stdout.write(f"Left alone (generation job running): {', '.join(map(str, result.busy))}")
+        if result.skipped:
+            self.stdout.write(f"Skipped (roster changed): {', '.join(map(str, result.skipped))}")
+        for section_id, error in result.failed.items():
+            self.stdout.write(f"Skipped section {section_id} (rules can't be met): {error}")
+        self.stdout.write(self.style.SUCCESS(f"Regenerated {len(result.regenerated)} section(s)."))
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from grouping.benchmarks import suite
+
+
+class Command(BaseCommand):
+    help = "Times generation, dashboard stats and roster parsing on synthetic sections (no database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=list(suite.SIZES),
+                            help="Section sizes, in students.")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--only', nargs='+', choices=sorted(suite.BENCHMARKS),
+                            help="Run only these benchmarks.")
+        parser.add_argument('--output', help="Write the results as JSON to this file ('-' for stdout).")
+        parser.add_argument('--baseline', help="Earlier --output file; fail if anything got slower.")
+        parser.add_argument('--tolerance', type=float, default=suite.TOLERANCE,
+                            help="Allowed slowdown vs the baseline (0.25 = 25%%).")
+
+    def handle(self, *args, **options):
+        report = suite.run(options['sizes'], options['repeat'], options['only'])
+
+        if options['output'] == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for r in report['results']:
+                self.stdout.write(f"{r['benchmark']:<16} {r['students']:>7} students  "
+                                  f"best {r['best_s'] * 1000:9.2f} ms  median {r['median_s'] * 1000:9.2f} ms")
+            if options['output']:
+                with open(options['output'], 'w') as f:
+                    json.dump(report, f, indent=2)
+                self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = suite.compare(report, baseline, options['tolerance'])
+            if regressions:
+                lines = [f"{name} @ {n}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms"
+                         for name, n, old, new in regressions]
+                raise CommandError("Slower than the baseline:\n  " + "\n  ".join(lines))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from grouping import jobs
+
+
+class Command(BaseCommand):
+    help = "Runs queued group generation jobs (e.g. ones left behind by a server restart), stale ones included."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue instead of exiting.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            # Jobs whose worker died (queued/running past GENERATION_STALE_AFTER) are run again
+            requeued = jobs.recover_stale(requeue=True)
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale generation job(s).")
+            ran = jobs.run_queued()
+            if ran:
+                self.stdout.write(f"Ran {ran} generation job(s).")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,54 @@
+# Generated by Django 6.0 on 2026-10-18 11:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_group_stats(apps, schema_editor):
+    """Computes the running totals of groups that already exist."""
+    Group = apps.get_model('grouping', 'Group')
+    GroupStats = apps.get_model('grouping', 'GroupStats')
+    Student = apps.get_model('grouping', 'Student')
+
+    totals = {}
+    rows = (Student.objects.exclude(assigned_group=None)
+            .values_list('assigned_group_id', 'coding', 'design', 'writing', 'presenting')
+            .iterator())
+    for group_id, c, d, w, p in rows:
+        t = totals.setdefault(group_id, [0, 0, 0, 0, 0, 0, 0])
+        power = c + d + w + p
+        for i, value in enumerate((1, c, d, w, p, power, power * power)):
+            t[i] += value
+
+    GroupStats.objects.bulk_create([
+        GroupStats(
+            group_id=group_id,
+            **dict(zip(('count', 'coding', 'design', 'writing', 'presenting', 'power', 'power_sq'),
+                       totals.get(group_id, [0] * 7))),
+        )
+        for group_id in Group.objects.values_list('id', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grouping', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='grouping.group')),
+                ('count', models.IntegerField(default=0)),
+                ('coding', models.IntegerField(default=0)),
+                ('design', models.IntegerField(default=0)),
+                ('writing', models.IntegerField(default=0)),
+                ('presenting', models.IntegerField(default=0)),
+                ('power', models.BigIntegerField(default=0)),
+                ('power_sq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grouping', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='optimize',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='result',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='time_budget',
+            field=models.FloatField(default=1.0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grouping', '0005_section_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
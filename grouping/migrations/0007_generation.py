@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 12:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grouping', '0006_section_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Generation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('k_value', models.PositiveIntegerField()),
+                ('weights', models.JSONField(blank=True, default=dict)),
+                ('optimize', models.BooleanField(default=False)),
+                ('time_budget', models.FloatField(default=1.0)),
+                ('student_count', models.PositiveIntegerField()),
+                ('assignment', models.JSONField(default=list)),
+                ('optimization', models.JSONField(blank=True, default=dict)),
+                ('section_version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generations', to='grouping.section')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['section', 'fingerprint'], name='generation_fingerprint_idx')],
+            },
+        ),
+    ]
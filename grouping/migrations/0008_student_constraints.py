@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 12:34
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grouping', '0007_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='max_group_size',
+            field=models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='min_group_size',
+            field=models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.CreateModel(
+            name='StudentConstraint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('together', 'Keep together'), ('apart', 'Keep apart')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='constraints', to='grouping.section')),
+                ('student_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='grouping.student')),
+                ('student_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='grouping.student')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('section', 'kind', 'student_a', 'student_b'), name='student_constraint_unique_pair'), models.CheckConstraint(condition=models.Q(('student_a', models.F('student_b')), _negated=True), name='student_constraint_two_students')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grouping', '0008_student_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generation',
+            name='scoring',
+            field=models.CharField(choices=[('power', 'Power balance'), ('diversity', 'Skill diversity')], default='power', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='scoring',
+            field=models.CharField(choices=[('power', 'Power balance'), ('diversity', 'Skill diversity')], default='power', max_length=10),
+        ),
+    ]
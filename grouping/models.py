@@ -1,7 +1,15 @@
+import math
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
 
+# engines.SCORING_MODES, as model choices
+SCORING_CHOICES = [
+    ('power', 'Power balance'),
+    ('diversity', 'Skill diversity'),
+]
+
 class Section(models.Model):
     """
     Represents a specific class or section (e.g., 'BSCS-2A').
@@ -10,10 +18,25 @@ class Section(models.Model):
     name = models.CharField(max_length=100)
     teacher = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every change to the section's students or groups (drives ETags and fragment caching)
+    version = models.PositiveIntegerField(default=0)
+    # Optional hard limits on group sizes, enforced by generation (see constraints.py)
+    min_group_size = models.PositiveIntegerField(null=True, blank=True, validators=[MinValueValidator(1)])
+    max_group_size = models.PositiveIntegerField(null=True, blank=True, validators=[MinValueValidator(1)])
+
+    class Meta:
+        indexes = [
+            # section_list: one teacher's classes, oldest first
+            models.Index(fields=['teacher', 'created_at'], name='section_teacher_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def bump_version(self):
+        """Marks the section's roster/groups as changed (one UPDATE, safe under concurrency)."""
+        Section.objects.filter(pk=self.pk).update(version=models.F('version') + 1)
+
 class Group(models.Model):
     """
     Represents a formed team within a specific Section.
@@ -41,5 +64,201 @@ class Student(models.Model):
     # Link to a Group within the same section
     assigned_group = models.ForeignKey(Group, on_delete=models.SET_NULL, null=True, blank=True, related_name='students')
 
+    class Meta:
+        indexes = [
+            # Dashboard roster: filter by section, already sorted by name
+            models.Index(fields=['section', 'name'], name='student_section_name_idx'),
+            # Members / unassigned students of a section
+            models.Index(fields=['section', 'assigned_group'], name='student_section_group_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class StudentConstraint(models.Model):
+    """
+    A grouping rule between two students of the same section: they must
+    share a group (TOGETHER) or must not (APART). A larger keep-together set
+    is stored as a chain of pairs; generation merges them (constraints.py).
+    """
+    TOGETHER = 'together'
+    APART = 'apart'
+    KIND_CHOICES = [
+        (TOGETHER, 'Keep together'),
+        (APART, 'Keep apart'),
+    ]
+
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='constraints')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    student_a = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    student_b = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['section', 'kind', 'student_a', 'student_b'],
+                                    name='student_constraint_unique_pair'),
+            models.CheckConstraint(condition=~models.Q(student_a=models.F('student_b')),
+                                   name='student_constraint_two_students'),
+        ]
+
+    def __str__(self):
+        return f"{self.section}: {self.student_a_id} {self.kind} {self.student_b_id}"
+
+class GroupStats(models.Model):
+    """
+    Running totals for one Group (denormalized for the dashboard).
+    Updated with small +/- deltas whenever a student joins or leaves the group,
+    so reading a group's balance never has to touch its students.
+    Rebuild/verify with: python manage.py rebuild_group_stats
+    """
+    group = models.OneToOneField(Group, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    count = models.IntegerField(default=0)
+
+    # Per-skill totals
+    coding = models.IntegerField(default=0)
+    design = models.IntegerField(default=0)
+    writing = models.IntegerField(default=0)
+    presenting = models.IntegerField(default=0)
+
+    # Sum of each member's power, and of its square (for the variance)
+    power = models.BigIntegerField(default=0)
+    power_sq = models.BigIntegerField(default=0)
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"Stats for {self.group}"
+
+    @property
+    def skill_values(self):
+        return [self.coding, self.design, self.writing, self.presenting]
+
+    @property
+    def variance(self):
+        """Sample variance of the members' power (same as statistics.variance)."""
+        if self.count < 2:
+            return 0
+        return (self.count * self.power_sq - self.power ** 2) / (self.count * (self.count - 1))
+
+    @property
+    def stdev(self):
+        return math.sqrt(max(self.variance, 0))
+
+    @property
+    def mean_power(self):
+        return self.power / self.count if self.count else 0
+
+    @property
+    def weakness(self):
+        """The group's lowest skill, e.g. 'Design (7 pts)'. None if all skills are equal."""
+        skill_values = self.skill_values
+        skill_labels = ['Coding', 'Design', 'Writing', 'Speaking']
+
+        # Only calculate if there are students
+        if sum(skill_values) > 0:
+            min_score = min(skill_values)
+            max_score = max(skill_values)
+
+            # LOGIC FIX: If all skills are equal (e.g. 5,5,5,5), don't show a weakness
+            if min_score < max_score:
+                # Find the skill with the minimum score
+                min_skill = min(zip(skill_labels, skill_values), key=lambda x: x[1])
+                return f"{min_skill[0]} ({min_skill[1]} pts)"
+        return None
+
+class Generation(models.Model):
+    """
+    One saved run of the grouping algorithm: its inputs (as a fingerprint,
+    see planner.fingerprint, and in clear) and the assignment it produced.
+    Regenerating with identical inputs reuses it instead of recomputing.
+    """
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='generations')
+    fingerprint = models.CharField(max_length=64)
+    k_value = models.PositiveIntegerField()
+    weights = models.JSONField(default=dict, blank=True)
+    optimize = models.BooleanField(default=False)
+    time_budget = models.FloatField(default=1.0)
+    scoring = models.CharField(max_length=10, choices=SCORING_CHOICES, default='power')
+    student_count = models.PositiveIntegerField()
+    # [[student_id, group index], ...] in Strongest -> Weakest order
+    assignment = models.JSONField(default=list)
+    optimization = models.JSONField(default=dict, blank=True)
+    # Section.version right after these groups were saved
+    section_version = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['section', 'fingerprint'], name='generation_fingerprint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.section} / k={self.k_value} / {self.fingerprint[:12]}"
+
+    @classmethod
+    def from_plan(cls, section_id, plan, section_version):
+        return cls(
+            section_id=section_id,
+            fingerprint=plan.fingerprint,
+            k_value=plan.k_value,
+            weights=plan.weights or {},
+            optimize=plan.optimize,
+            time_budget=plan.time_budget,
+            scoring=plan.scoring,
+            student_count=len(plan.student_ids),
+            assignment=[[sid, idx] for sid, idx in zip(plan.student_ids, plan.assignment)],
+            optimization=plan.optimization or {},
+            section_version=section_version,
+        )
+
+class GenerationJob(models.Model):
+    """
+    One request to (re)generate a section's groups.
+    The row is the queue entry: it is created by the view, picked up by a
+    background worker (see jobs.py) and polled by the dashboard for progress.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='generation_jobs')
+    k_value = models.PositiveIntegerField()
+    weights = models.JSONField(default=dict, blank=True)
+    optimize = models.BooleanField(default=False)
+    time_budget = models.FloatField(default=1.0)  # seconds, for the optimizer
+    scoring = models.CharField(max_length=10, choices=SCORING_CHOICES, default='power')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    error = models.TextField(blank=True)
+    result = models.JSONField(default=dict, blank=True)  # e.g. the optimizer's objective
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Generation #{self.id} for {self.section} ({self.status})"
+
+    @property
+    def is_active(self):
+        return self.status in (self.QUEUED, self.RUNNING)
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'k_value': self.k_value,
+            'scoring': self.scoring,
+            'result': self.result,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
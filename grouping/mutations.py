@@ -0,0 +1,132 @@
+"""
+Batch edits of a section: many moves and skill edits in one request.
+
+The payload is validated in full before anything is written: every
+student and group id is checked against the section with one id__in
+query each, and a single bad entry rejects the whole batch. The changes
+are then applied with one bulk_update, the net GroupStats delta of each
+affected group and one version bump, all in one transaction.
+
+Payload:
+    {"moves": [{"student": 12, "group": 3}, ...],
+     "edits": [{"student": 12, "coding": 4, "presenting": 2}, ...]}
+"""
+from django.db import transaction
+
+from . import stats
+from .models import Group, Student
+from .roster import SKILL_MAX, SKILL_MIN
+from .skillmatrix import SKILL_FIELDS
+
+MAX_OPERATIONS = 5000
+
+
+class BatchError(ValueError):
+    """The batch is invalid; `errors` lists every problem found."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class BatchResult:
+    def __init__(self, moved, edited, group_ids):
+        self.moved = moved
+        self.edited = edited
+        self.group_ids = group_ids
+
+
+def _as_id(value):
+    return value if isinstance(value, int) and not isinstance(value, bool) and value > 0 else None
+
+
+def parse_batch(data):
+    """
+    Checks the shape of a payload.
+    Returns ({student_id: group_id}, {student_id: {field: value}}) or raises BatchError.
+    """
+    if not isinstance(data, dict):
+        raise BatchError(["The body must be a JSON object."])
+    moves_in, edits_in = data.get('moves', []), data.get('edits', [])
+    if not isinstance(moves_in, list) or not isinstance(edits_in, list):
+        raise BatchError(["'moves' and 'edits' must be lists."])
+    if len(moves_in) + len(edits_in) > MAX_OPERATIONS:
+        raise BatchError([f"At most {MAX_OPERATIONS} operations per batch."])
+
+    errors = []
+    moves, edits = {}, {}
+    for i, move in enumerate(moves_in):
+        student_id = _as_id(move.get('student')) if isinstance(move, dict) else None
+        group_id = _as_id(move.get('group')) if isinstance(move, dict) else None
+        if student_id is None or group_id is None:
+            errors.append(f"moves[{i}]: needs integer 'student' and 'group' ids")
+        elif student_id in moves:
+            errors.append(f"moves[{i}]: student {student_id} is moved twice")
+        else:
+            moves[student_id] = group_id
+
+    for i, edit in enumerate(edits_in):
+        student_id = _as_id(edit.get('student')) if isinstance(edit, dict) else None
+        if student_id is None:
+            errors.append(f"edits[{i}]: needs an integer 'student' id")
+            continue
+        if student_id in edits:
+            errors.append(f"edits[{i}]: student {student_id} is edited twice")
+            continue
+        fields = {key: value for key, value in edit.items() if key != 'student'}
+        unknown = sorted(set(fields) - set(SKILL_FIELDS))
+        if unknown or not fields:
+            errors.append(f"edits[{i}]: expected some of {', '.join(SKILL_FIELDS)}"
+                          + (f" (unknown: {', '.join(unknown)})" if unknown else ""))
+            continue
+        bad = [f for f, v in fields.items()
+               if not isinstance(v, int) or isinstance(v, bool) or not SKILL_MIN <= v <= SKILL_MAX]
+        if bad:
+            errors.append(f"edits[{i}]: {', '.join(bad)} must be whole numbers from {SKILL_MIN} to {SKILL_MAX}")
+            continue
+        edits[student_id] = fields
+
+    if errors:
+        raise BatchError(errors)
+    return moves, edits
+
+
+def apply_batch(section, moves, edits):
+    """
+    Applies parsed moves and edits to `section` in one transaction.
+    Raises BatchError (and writes nothing) if an id doesn't belong to the section.
+    """
+    student_ids = set(moves) | set(edits)
+    if not student_ids:
+        return BatchResult(moved=0, edited=0, group_ids=[])
+    with transaction.atomic():
+        # Ownership: one query for the students (with their current state), one for the groups
+        current = {
+            row[0]: row[1:] for row in Student.objects.select_for_update()
+            .filter(section=section, id__in=student_ids)
+            .values_list('id', 'assigned_group_id', *SKILL_FIELDS)
+        }
+        owned_groups = set(Group.objects.filter(section=section, id__in=set(moves.values()))
+                           .values_list('id', flat=True))
+        errors = [f"student {sid} is not in this section" for sid in sorted(student_ids - set(current))]
+        errors += [f"group {gid} is not in this section" for gid in sorted(set(moves.values()) - owned_groups)]
+        if errors:
+            raise BatchError(errors)
+
+        before, after, students = [], [], []
+        for sid in sorted(student_ids):
+            group_id, *skills = current[sid]
+            new_group_id = moves.get(sid, group_id)
+            edit = edits.get(sid, {})
+            new_skills = [edit.get(field, value) for field, value in zip(SKILL_FIELDS, skills)]
+            before.append((group_id, *skills))
+            after.append((new_group_id, *new_skills))
+            students.append(Student(id=sid, assigned_group_id=new_group_id,
+                                    **dict(zip(SKILL_FIELDS, new_skills))))
+
+        fields = (['assigned_group'] if moves else []) + sorted({f for edit in edits.values() for f in edit},
+                                                               key=SKILL_FIELDS.index)
+        Student.objects.bulk_update(students, fields, batch_size=500)
+        group_ids = stats.replace_students(before, after)
+        section.bump_version()
+    return BatchResult(moved=len(moves), edited=len(edits), group_ids=group_ids)
@@ -0,0 +1,158 @@
+"""
+Local-Search Optimizer (optional second pass after the greedy engines).
+
+The greedy pass places every student once and never looks back. This pass
+starts from its result and keeps swapping pairs of students between groups
+whenever the swap lowers the objective:
+
+    objective = sum over groups of (group power - mean group power)^2
+              + CLASH_WEIGHT * (redundant experts)
+
+A "redundant expert" is every Expert beyond the first one in the same
+skill in the same group (the Role Clash rule of the greedy pass).
+
+Swaps keep every group's size, so the mean never changes and each swap is
+scored in O(1) from running totals. The search stops after `max_iterations`
+attempts, after `patience` attempts in a row without improvement, or when
+`time_budget` seconds have passed, whichever comes first. With the same
+seed and an iteration limit, the result is reproducible.
+
+`movable` restricts the swaps to some rows (e.g. the students named in no
+grouping rule, see constraints.py); the others never change group.
+"""
+import random
+import time
+
+from .engines import CLASH_PENALTY, score_rows
+
+CLASH_WEIGHT = CLASH_PENALTY ** 2
+DEFAULT_TIME_BUDGET = 1.0
+# Check the clock every this many attempts (time.perf_counter is not free)
+CLOCK_EVERY = 256
+
+
+class OptimizeResult:
+    def __init__(self, assignment, before, after, iterations, swaps, elapsed, k_value):
+        self.assignment = assignment
+        self.objective_before = before
+        self.objective_after = after
+        self.iterations = iterations
+        self.swaps = swaps
+        self.elapsed = elapsed
+        self.k_value = k_value
+
+    def as_dict(self):
+        return {
+            'objective_before': self.objective_before,
+            'objective_after': self.objective_after,
+            'iterations': self.iterations,
+            'swaps': self.swaps,
+            'elapsed': round(self.elapsed, 4),
+        }
+
+
+def _redundant(count):
+    return count - 1 if count > 1 else 0
+
+
+def objective(rows, assignment, k_value, weights=None):
+    """Computes the objective of an assignment from scratch (O(n))."""
+    powers, best_skills, clashes = score_rows(rows, weights)
+    totals = [0] * k_value
+    experts = [[0, 0, 0, 0] for _ in range(k_value)]
+    for j, g in enumerate(assignment):
+        totals[g] += powers[j]
+        if clashes[j]:
+            experts[g][best_skills[j]] += 1
+    mean = sum(totals) / k_value if k_value else 0
+    variance = sum((t - mean) ** 2 for t in totals)
+    redundant = sum(_redundant(e) for group in experts for e in group)
+    return variance + CLASH_WEIGHT * redundant
+
+
+def optimize(rows, assignment, k_value, weights=None, time_budget=DEFAULT_TIME_BUDGET,
+             max_iterations=None, patience=None, seed=0, movable=None):
+    """
+    Improves `assignment` (group index per row) by pairwise swaps.
+    Returns an OptimizeResult; the input list is not modified.
+    """
+    start = time.perf_counter()
+    n = len(rows)
+    assignment = list(assignment)
+    before = objective(rows, assignment, k_value, weights)
+    m = n if movable is None else len(movable)
+    if m < 2 or k_value < 2:
+        return OptimizeResult(assignment, before, before, 0, 0, time.perf_counter() - start, k_value)
+
+    if max_iterations is None:
+        max_iterations = 200 * m
+    if patience is None:
+        patience = 20 * m
+
+    powers, best_skills, clashes = score_rows(rows, weights)
+    # Expert skill per student (-1 = not an Expert, never clashes)
+    expert_skill = [best_skills[j] if clashes[j] else -1 for j in range(n)]
+
+    totals = [0] * k_value
+    experts = [[0, 0, 0, 0] for _ in range(k_value)]
+    for j, g in enumerate(assignment):
+        totals[g] += powers[j]
+        if expert_skill[j] >= 0:
+            experts[g][expert_skill[j]] += 1
+
+    def clash_delta(group, leaving, joining):
+        """Change in redundant experts of `group` when `leaving` goes out and `joining` comes in."""
+        if leaving == joining:
+            return 0
+        delta = 0
+        if leaving >= 0:
+            e = experts[group][leaving]
+            delta += _redundant(e - 1) - _redundant(e)
+        if joining >= 0:
+            e = experts[group][joining]
+            delta += _redundant(e + 1) - _redundant(e)
+        return delta
+
+    rng = random.Random(seed)
+    current = before
+    iterations = swaps = stale = 0
+    deadline = start + time_budget
+
+    while iterations < max_iterations and stale < patience:
+        if iterations % CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+            break
+        iterations += 1
+        stale += 1
+
+        a = rng.randrange(m)
+        b = rng.randrange(m)
+        if movable is not None:
+            a, b = movable[a], movable[b]
+        ga, gb = assignment[a], assignment[b]
+        if ga == gb:
+            continue
+
+        # Power variance: moving d = p_a - p_b of power from A to B
+        d = powers[a] - powers[b]
+        delta = 2 * d * (totals[gb] - totals[ga]) + 2 * d * d
+
+        ea, eb = expert_skill[a], expert_skill[b]
+        if ea != eb:
+            delta += CLASH_WEIGHT * (clash_delta(ga, ea, eb) + clash_delta(gb, eb, ea))
+
+        if delta < 0:
+            assignment[a], assignment[b] = gb, ga
+            totals[ga] -= d
+            totals[gb] += d
+            if ea >= 0:
+                experts[ga][ea] -= 1
+                experts[gb][ea] += 1
+            if eb >= 0:
+                experts[gb][eb] -= 1
+                experts[ga][eb] += 1
+            current += delta
+            swaps += 1
+            stale = 0
+
+    return OptimizeResult(assignment, before, current, iterations, swaps,
+                          time.perf_counter() - start, k_value)
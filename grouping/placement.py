@@ -0,0 +1,215 @@
+"""
+Auto-place: put late (unassigned) students into the existing groups.
+
+Regenerating shuffles the whole section. Placing only touches the new
+students: each one is scored against every group with the engines' rules
+(see engines.py: smallest groups first, then the weakest, then the Role
+Clash penalty, or diversity scoring if the groups were made with it) and
+joins the winner. The groups' numbers come from their GroupStats rows, so a
+student costs O(k) whatever the size of the groups, and the section is read
+with a handful of queries:
+
+    1 query  the groups with their GroupStats
+    1 query  the unassigned students
+    1 query  the weights and scoring mode of the last generation (to score like it did)
+    1-2      the grouping rules (and where their students sit), if any
+
+Students are placed Strongest -> Weakest, like generation, and each one
+updates the in-memory totals before the next is scored. The writes are one
+bulk_update, one GroupStats delta per group that grew and a version bump.
+
+The section's rules hold for placed students too: a group at max_group_size
+is skipped, a student joins their keep-together partner's group and never a
+group holding someone they must be kept apart from. A student no group can
+take stays unassigned and is reported back.
+"""
+from django.db import transaction
+
+from . import stats
+from .constraints import Rules
+from .engines import CLASH_THRESHOLD, SIZE_PENALTY, normalize_scoring, normalize_weights, score_rows
+from .models import Generation, Group, Student
+from .skillmatrix import SKILL_FIELDS
+
+
+class PlacementResult:
+    def __init__(self, placed, unplaced, group_ids):
+        self.placed = placed          # {student id: group id}
+        self.unplaced = unplaced      # ids of students no group could take
+        self.group_ids = group_ids    # groups that got new members
+
+    def as_dict(self):
+        return {
+            'placed': {str(sid): gid for sid, gid in self.placed.items()},
+            'unplaced': self.unplaced,
+            'groups': self.group_ids,
+        }
+
+
+def choose_group(counts, powers, sums, best_skill, clash, allowed=None):
+    """
+    Index of the group a student should join, scored like linear_engine, or None.
+    `counts` / `powers` / `sums` are the groups' current size, (weighted) power
+    and per-skill totals; `best_skill` / `clash` come from engines.score_rows.
+    `allowed(i)` may rule groups out (size caps, rules).
+    """
+    min_size = min(counts)
+    best_group = None
+    best_score = float('inf')
+    for i in range(len(counts)):
+        if allowed is not None and not allowed(i):
+            continue
+        score = SIZE_PENALTY if counts[i] > min_size else 0
+        score += powers[i]
+        if clash and sums[i][best_skill] >= CLASH_THRESHOLD:
+            score += clash
+        if score < best_score:
+            best_score = score
+            best_group = i
+    return best_group
+
+
+def choose_diverse_group(counts, devs, step, allowed=None):
+    """
+    Index of the group a student should join under diversity scoring, or None:
+    the smallest allowed group with the lowest dev . step (see engines.diversity_engine).
+    """
+    candidates = [i for i in range(len(counts)) if allowed is None or allowed(i)]
+    if not candidates:
+        return None
+    min_size = min(counts[i] for i in candidates)
+    return min((i for i in candidates if counts[i] == min_size),
+               key=lambda i: sum(d * s for d, s in zip(devs[i], step)))
+
+
+def place(groups, students, weights=None, rules=None, placed_at=None, scoring=None):
+    """
+    The in-memory part of place_unassigned (no DB access).
+
+    `groups` are (group id, count, coding, design, writing, presenting) totals,
+    `students` are (id, coding, design, writing, presenting) rows, and
+    `placed_at` is {student id: group id} for the students named in `rules`
+    who already have a group. Returns ({student id: group id}, [unplaced ids]).
+    """
+    w = normalize_weights(weights)
+    group_ids = [g[0] for g in groups]
+    counts = [g[1] for g in groups]
+    sums = [list(g[2:]) for g in groups]
+    powers = [sum(s * ws for s, ws in zip(skills, w)) for skills in sums]
+
+    # Diversity: every group's weighted offset from the mean of everyone (grouped or placed)
+    diversity = normalize_scoring(scoring) == 'diversity'
+    if diversity:
+        n = sum(counts) + len(students)
+        total = [ws * (sum(g[s] for g in sums) + sum(st[1 + s] for st in students)) for s, ws in enumerate(w)]
+        devs = [[n * ws * g[s] - c * total[s] for s, ws in enumerate(w)] for g, c in zip(sums, counts)]
+
+    rules = rules or Rules()
+    max_size = rules.max_size
+    partners, rivals = {}, {}
+    for a, b in rules.together:
+        partners.setdefault(a, []).append(b)
+        partners.setdefault(b, []).append(a)
+    for a, b in rules.apart:
+        rivals.setdefault(a, []).append(b)
+        rivals.setdefault(b, []).append(a)
+    index_of = {gid: i for i, gid in enumerate(group_ids)}
+    # Group index of every student named in a rule who has one (grows as we place)
+    where = {sid: index_of[gid] for sid, gid in (placed_at or {}).items() if gid in index_of}
+
+    # Strongest -> Weakest (stable on id), same order as generation
+    students = sorted(students)
+    rows = [s[1:] for s in students]
+    student_powers, best_skills, clashes = score_rows(rows, weights)
+    order = sorted(range(len(students)), key=lambda j: -student_powers[j])
+
+    placed, unplaced = {}, []
+    for j in order:
+        sid = students[j][0]
+        # Rules: a keep-together partner already placed decides the group
+        forced = {where[p] for p in partners.get(sid, ()) if p in where}
+        blocked = {where[r] for r in rivals.get(sid, ()) if r in where}
+
+        def allowed(i):
+            if max_size and counts[i] >= max_size:
+                return False
+            if forced and i not in forced:
+                return False
+            return i not in blocked
+
+        i = None
+        check = allowed if (max_size or forced or blocked) else None
+        if groups and len(forced) <= 1:
+            if diversity:
+                step = [n * ws * x - t for ws, x, t in zip(w, rows[j], total)]
+                i = choose_diverse_group(counts, devs, step, check)
+            else:
+                i = choose_group(counts, powers, sums, best_skills[j], clashes[j], check)
+        if i is None:
+            unplaced.append(sid)
+            continue
+
+        placed[sid] = group_ids[i]
+        where[sid] = i
+        counts[i] += 1
+        powers[i] += student_powers[j]
+        for s in range(4):
+            sums[i][s] += rows[j][s]
+            if diversity:
+                devs[i][s] += step[s]
+    return placed, sorted(unplaced)
+
+
+def _last_generation(section):
+    """(weights, scoring) the section's current groups were generated with."""
+    last = (Generation.objects.filter(section=section).order_by('-id')
+            .values_list('weights', 'scoring').first())
+    return last or (None, None)
+
+
+def place_unassigned(section, student_ids=None, weights=None):
+    """
+    Puts the section's unassigned students (or just `student_ids`, if they are
+    unassigned) into its existing groups, without touching anyone else.
+    `weights` and the scoring mode are those of the last generation. Returns a PlacementResult;
+    a section without groups places nobody.
+    """
+    with transaction.atomic():
+        queryset = Group.objects.filter(section=section).select_related('stats').order_by('id')
+        groups = list(queryset)
+        missing = [g.id for g in groups if not hasattr(g, 'stats')]
+        if missing:
+            # e.g. groups created through the admin: compute their stats once (like the dashboard)
+            stats.rebuild(Group.objects.filter(id__in=missing))
+            groups = list(queryset.all())
+        groups = [(g.id, g.stats.count, *g.stats.skill_values) for g in groups]
+        waiting = Student.objects.filter(section=section, assigned_group__isnull=True)
+        if student_ids is not None:
+            waiting = waiting.filter(id__in=student_ids)
+        # Locked so two concurrent placements can't both count the same student
+        students = list(waiting.select_for_update().order_by('id').values_list('id', *SKILL_FIELDS))
+        if not groups or not students:
+            return PlacementResult({}, [s[0] for s in students], [])
+
+        last_weights, scoring = _last_generation(section)
+        if weights is None:
+            weights = last_weights or None
+        rules = Rules.load(section)
+        placed_at = {}
+        if rules.together or rules.apart:
+            placed_at = dict(Student.objects.filter(id__in=rules.students, assigned_group__isnull=False)
+                             .values_list('id', 'assigned_group_id'))
+
+        placed, unplaced = place(groups, students, weights, rules, placed_at, scoring)
+        if placed:
+            Student.objects.bulk_update(
+                [Student(id=sid, assigned_group_id=gid) for sid, gid in placed.items()],
+                ['assigned_group'], batch_size=1000,
+            )
+            # Unassigned rows count for no group, so only the new memberships are added
+            skills = {s[0]: s[1:] for s in students}
+            changed = stats.replace_students([], [(gid, *skills[sid]) for sid, gid in placed.items()])
+            section.bump_version()
+        else:
+            changed = []
+    return PlacementResult(placed, unplaced, changed)
@@ -0,0 +1,180 @@
+"""
+Section planning without the database.
+
+plan_matrix() turns a section's skill matrix into a group assignment
+(sort, greedy engine, optional optimizer pass). It never touches the ORM
+and importing this module does not need Django to be set up, so it can
+run in worker processes (see batch.py).
+
+Every plan carries a fingerprint of its inputs (roster + parameters), so a
+saved result can be found and reused when the same inputs come back.
+
+A section with grouping rules (constraints.Rules) is assigned by
+constraints.solve instead of the engine. The 'diversity' scoring mode
+(engines.diversity_engine) replaces the engine too.
+"""
+import hashlib
+
+from .constraints import ConstraintError, solve
+from .engines import DEFAULT_SCORING, diversity_engine, get_engine, normalize_scoring, normalize_weights
+from .optimizer import DEFAULT_TIME_BUDGET, optimize as run_optimizer
+from .profiling import phase
+from .skillmatrix import SectionMatrix, strongest_first
+
+# Part of every fingerprint: bump it when a change to the algorithm makes
+# the same inputs produce different groups, so old results aren't reused.
+ALGORITHM_VERSION = 1
+
+
+def resolve_scoring(scoring=None, optimize=False, rules=None):
+    """
+    What actually runs for the requested scoring mode: (scoring, optimize, notes).
+    The constraint solver and the optimizer only know power scoring, so grouping
+    rules turn diversity scoring into power scoring, and diversity scoring skips
+    the optimizer. `notes` tell the user about it (empty when nothing changed).
+    """
+    scoring = normalize_scoring(scoring)
+    notes = []
+    if scoring == 'diversity' and rules:
+        scoring = DEFAULT_SCORING
+        notes.append("This class has grouping rules, which are enforced with power scoring: "
+                     "diversity scoring was not used.")
+    if scoring == 'diversity' and optimize:
+        optimize = False
+        notes.append("The optimizer only improves power balance, so it was skipped with diversity scoring.")
+    return scoring, optimize, notes
+
+
+def fingerprint(matrix, k_value, weights=None, optimize=False, time_budget=DEFAULT_TIME_BUDGET,
+                rules=None, scoring=None):
+    """
+    SHA-256 of everything that decides the groups: the students (ids and
+    skills, in id order), the parameters and the grouping rules. Equivalent
+    parameters (no weights vs all weights at 1, no rules vs empty rules,
+    no scoring mode vs 'power') give the same fingerprint. `optimize` and
+    `scoring` are taken as they will actually run (see resolve_scoring).
+    """
+    scoring, optimize, _ = resolve_scoring(scoring, optimize, rules)
+    digest = hashlib.sha256()
+    digest.update(matrix.ids.astype('<i8').tobytes())
+    digest.update(matrix.skills.astype('i1').tobytes())
+    params = f"v{ALGORITHM_VERSION};k={k_value};w={normalize_weights(weights)}"
+    if optimize:
+        params += f";optimize={float(time_budget)}"
+    if rules:
+        params += f";rules={rules.key()}"
+    if normalize_scoring(scoring) != DEFAULT_SCORING:
+        params += f";scoring={scoring}"
+    digest.update(params.encode())
+    return digest.hexdigest()
+
+
+class GroupPlan:
+    """
+    A computed (not yet saved) assignment for one section.
+    `student_ids`, `rows` and `assignment` are parallel lists in Strongest -> Weakest order.
+    `optimization` holds the optimizer's report (objective before/after...) if it ran.
+    `source` is the stored Generation the assignment was reused from, if any.
+    `rules` are the constraints.Rules it was planned under (None: no rules).
+    `scoring` / `optimize` are what actually ran (see resolve_scoring), and
+    `notes` explain where that differs from what was asked for.
+    """
+    def __init__(self, k_value, matrix, student_ids, rows, assignment, optimization=None,
+                 weights=None, optimize=False, time_budget=DEFAULT_TIME_BUDGET, source=None,
+                 rules=None, scoring=None):
+        self.k_value = k_value
+        self.matrix = matrix
+        self.student_ids = student_ids
+        self.rows = rows
+        self.assignment = assignment
+        self.optimization = optimization
+        self.weights = weights
+        self.time_budget = time_budget
+        self.source = source
+        self.rules = rules
+        self.scoring, self.optimize, self.notes = resolve_scoring(scoring, optimize, rules)
+        self.fingerprint = fingerprint(matrix, k_value, weights, optimize, time_budget, rules, scoring)
+        # Set by services.save_groups: the Generation row of the saved groups,
+        # and whether the write was skipped because nothing had changed.
+        self.generation = None
+        self.unchanged = False
+
+
+def plan_matrix(matrix, k_value, weights=None, engine=None, optimize=False,
+                time_budget=DEFAULT_TIME_BUDGET, progress=None, rules=None, scoring=None):
+    """
+    Computes the GroupPlan of a SectionMatrix.
+    `progress(percent)` is called after each phase, if given.
+    With `rules` (constraints.Rules) the constraint solver replaces `engine`.
+    scoring='diversity' balances whole skill vectors (engines.diversity_engine);
+    the solver and the optimizer only know power scoring, so with rules it
+    falls back to power scoring, and the optimizer pass is skipped
+    (recorded in the plan's scoring / optimize / notes, see resolve_scoring).
+    """
+    report = progress or (lambda percent: None)
+    diversity = resolve_scoring(scoring, optimize, rules)[0] == 'diversity'
+
+    # 3. SORTING
+    # Sort from Strongest to Weakest (by weighted power when weights are given).
+    # The sort is stable, so ties will keep their ID order. Result is 100% consistent.
+    with phase('sort'):
+        order = strongest_first(matrix.skills, weights)
+        student_ids = matrix.ids[order].tolist()
+        rows = matrix.skills[order].tolist()
+    report(30)
+
+    # 4. Compute the assignment in memory (no DB writes yet)
+    with phase('assign'):
+        if rules:
+            assignment = solve(rows, student_ids, k_value, weights, rules)
+        elif diversity:
+            assignment = diversity_engine(rows, k_value, weights)
+        else:
+            assignment = get_engine(engine)(rows, k_value, weights)
+    report(50 if optimize and not diversity else 70)
+
+    # 4b. OPTIONAL: Refine the greedy result with pairwise swaps (bounded runtime)
+    # Under rules only students named in no rule are swapped: swaps keep
+    # group sizes, so every rule still holds.
+    optimization = None
+    if optimize and not diversity:
+        movable = None
+        if rules:
+            named = rules.students
+            movable = [j for j, sid in enumerate(student_ids) if sid not in named]
+        with phase('optimize'):
+            result = run_optimizer(rows, assignment, k_value, weights, time_budget=time_budget,
+                                   movable=movable)
+        assignment = result.assignment
+        optimization = result.as_dict()
+        report(70)
+
+    return GroupPlan(k_value, matrix, student_ids, rows, assignment, optimization,
+                     weights=weights, optimize=optimize, time_budget=time_budget, rules=rules,
+                     scoring=scoring)
+
+
+def plan_students(students, k_value, weights=None, engine=None, optimize=False,
+                  time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Plain-tuple entry point: `students` are (id, coding, design, writing, presenting)
+    tuples. Returns {student id: group index (0 .. k_value - 1)}, the same
+    assignment generate_groups would save for those students.
+    """
+    matrix = SectionMatrix.from_rows((sid, None, c, d, w, p) for sid, c, d, w, p in sorted(students))
+    plan = plan_matrix(matrix, k_value, weights, engine, optimize=optimize, time_budget=time_budget)
+    return dict(zip(plan.student_ids, plan.assignment))
+
+
+def plan_task(task):
+    """
+    Process-pool entry point: (key, matrix, k_value, weights, engine, rules) -> (key, GroupPlan).
+    Only plain data and numpy arrays cross the process boundary.
+    A section whose rules can't be met gives (key, ConstraintError) instead,
+    so it doesn't sink the rest of the batch.
+    """
+    key, matrix, k_value, weights, engine, rules = task
+    try:
+        return key, plan_matrix(matrix, k_value, weights, engine, rules=rules)
+    except ConstraintError as exc:
+        return key, exc
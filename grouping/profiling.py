@@ -0,0 +1,206 @@
+"""
+Opt-in timing of views and service phases (no external APM needed).
+
+Enable with GROUPING_PROFILING = True (or the GROUPING_PROFILING=1
+environment variable, see settings.py). Then:
+
+* TimingMiddleware measures every request: wall time, SQL query count and
+  SQL time (through an execute wrapper on every connection, so DEBUG is
+  not needed), and sends them in a Server-Timing header with one entry per phase.
+* phase('name') / @profiled('name') measure a block or function the same
+  way: generation is split into load / sort / assign / optimize / persist,
+  the dashboard into groups / roster / render.
+* Totals per view and per phase are kept in memory and served as JSON by
+  the profiling_stats view (/profiling/, staff only), and each request is
+  logged on the 'grouping.profiling' logger at DEBUG level.
+
+When disabled, phase() costs one settings lookup, each query one
+contextvar lookup, and the middleware removes itself at startup.
+"""
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('grouping_profile', default=None)
+# The SqlCounters of the request / phases being measured. Kept in a contextvar rather
+# than added with connection.execute_wrapper() on the spot: the async views' queries
+# run on another thread's connection, and contextvars follow them there.
+_counters = contextvars.ContextVar('grouping_sql', default=())
+_lock = threading.Lock()
+_stats = {}
+
+
+def enabled():
+    return settings.configured and getattr(settings, 'GROUPING_PROFILING', False)
+
+
+class SqlCounter:
+    """Counts the queries run while it is active (see counting()) and the time spent in them."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper on every connection (installed by install()): feeds the active counters."""
+    counters = _counters.get()
+    if not counters:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        for counter in counters:
+            counter.queries += 1
+            counter.seconds += elapsed
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver (connected in apps.py)."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+@contextmanager
+def counting(counter):
+    """Makes `counter` count every query run in this context (threads included)."""
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
+
+
+def record(key, seconds, queries, sql_seconds):
+    """Adds one measurement to the in-memory totals of `key` ('view:...' or 'phase:...')."""
+    with _lock:
+        entry = _stats.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                        'queries': 0, 'sql_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += seconds * 1000
+        entry['max_ms'] = max(entry['max_ms'], seconds * 1000)
+        entry['queries'] += queries
+        entry['sql_ms'] += sql_seconds * 1000
+
+
+def snapshot():
+    """The totals so far, with per-call means, slowest (by total time) first."""
+    with _lock:
+        items = [(key, dict(entry)) for key, entry in _stats.items()]
+    result = {}
+    for key, entry in sorted(items, key=lambda item: -item[1]['total_ms']):
+        entry['mean_ms'] = entry['total_ms'] / entry['count']
+        entry['mean_queries'] = entry['queries'] / entry['count']
+        result[key] = {field: round(value, 3) if isinstance(value, float) else value
+                       for field, value in entry.items()}
+    return result
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+@contextmanager
+def phase(name):
+    """Measures the enclosed block as phase `name` (of the current request, if any)."""
+    if not enabled():
+        yield
+        return
+
+    counter = SqlCounter()
+    start = time.perf_counter()
+    try:
+        with counting(counter):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        record(f'phase:{name}', elapsed, counter.queries, counter.seconds)
+        profile = _current.get()
+        if profile is not None:
+            profile.append((name, elapsed, counter.queries, counter.seconds))
+
+
+def profiled(name):
+    """Decorator version of phase()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing(total, counter, phases):
+    """The Server-Timing header value: total, db, then one entry per phase."""
+    entries = [
+        f'total;dur={total * 1000:.1f}',
+        f'db;dur={counter.seconds * 1000:.1f};desc="{counter.queries} queries"',
+    ]
+    for i, (name, seconds, queries, _) in enumerate(phases):
+        entries.append(f'{name}-{i};dur={seconds * 1000:.1f};desc="{name} ({queries} queries)"')
+    return ', '.join(entries)
+
+
+class TimingMiddleware:
+    """
+    Times every request (see the module docstring). Removed at startup unless enabled.
+    Works in sync and async chains, so it doesn't force the async views back into a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        phases = []
+        token = _current.set(phases)
+        counter = SqlCounter()
+        start = time.perf_counter()
+        try:
+            with counting(counter):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, time.perf_counter() - start, counter, phases)
+
+    async def __acall__(self, request):
+        phases = []
+        token = _current.set(phases)
+        counter = SqlCounter()
+        start = time.perf_counter()
+        try:
+            with counting(counter):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, time.perf_counter() - start, counter, phases)
+
+    def _finish(self, request, response, elapsed, counter, phases):
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match and match.url_name else request.path
+        record(f'view:{view}', elapsed, counter.queries, counter.seconds)
+        response['Server-Timing'] = server_timing(elapsed, counter, phases)
+        logger.debug("%s %s: %.1f ms, %d queries (%.1f ms)", request.method, view,
+                     elapsed * 1000, counter.queries, counter.seconds * 1000)
+        return response
@@ -0,0 +1,109 @@
+"""
+Bulk roster import.
+
+Reads a CSV file row by row (never the whole file in memory), validates
+the skill ranges with plain Python instead of a ModelForm per row, and
+inserts the valid students with bulk_create in fixed-size chunks.
+
+Expected header (case-insensitive, any column order):
+    name,coding,design,writing,presenting
+"""
+import csv
+
+from django.db import transaction
+
+from .models import Student
+from .skillmatrix import SKILL_FIELDS
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+NAME_MAX_LENGTH = Student._meta.get_field('name').max_length
+SKILL_MIN, SKILL_MAX = 1, 5
+
+
+class RosterError(ValueError):
+    """The file as a whole can't be imported (e.g. missing columns)."""
+
+
+class ImportResult:
+    """What happened during an import: rows created and the (first few) bad rows."""
+
+    def __init__(self):
+        self.created = 0
+        self.error_count = 0
+        self.errors = []  # [(line number, message)], at most MAX_REPORTED_ERRORS
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def parse_row(row):
+    """
+    Validates one CSV row (dict of column -> text).
+    Returns (name, coding, design, writing, presenting) or raises ValueError.
+    """
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise ValueError("name is empty")
+    if len(name) > NAME_MAX_LENGTH:
+        raise ValueError(f"name is longer than {NAME_MAX_LENGTH} characters")
+
+    skills = []
+    for field in SKILL_FIELDS:
+        raw = (row.get(field) or '').strip()
+        try:
+            value = int(raw)
+        except ValueError:
+            raise ValueError(f"{field} must be a whole number (got '{raw}')") from None
+        if not SKILL_MIN <= value <= SKILL_MAX:
+            raise ValueError(f"{field} must be between {SKILL_MIN} and {SKILL_MAX} (got {value})")
+        skills.append(value)
+    return (name, *skills)
+
+
+def import_roster(section, lines, chunk_size=CHUNK_SIZE):
+    """
+    Imports students into `section` from an iterable of CSV text lines
+    (e.g. a text-mode file). Bad rows are skipped and reported; good rows are
+    inserted in chunks of `chunk_size`, all inside one transaction.
+    Memory use is bounded by `chunk_size`, whatever the file size.
+    """
+    reader = csv.DictReader(lines)
+    try:
+        fieldnames = reader.fieldnames
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise RosterError(f"The file could not be read ({exc})") from exc
+    if fieldnames is None:
+        raise RosterError("The file is empty.")
+    reader.fieldnames = [(f or '').strip().lower() for f in fieldnames]
+    missing = [f for f in ('name',) + SKILL_FIELDS if f not in reader.fieldnames]
+    if missing:
+        raise RosterError(f"Missing column(s): {', '.join(missing)}")
+
+    result = ImportResult()
+    batch = []
+    with transaction.atomic():
+        try:
+            for row in reader:
+                try:
+                    name, coding, design, writing, presenting = parse_row(row)
+                except ValueError as exc:
+                    result.add_error(reader.line_num, str(exc))
+                    continue
+                batch.append(Student(section=section, name=name, coding=coding, design=design,
+                                     writing=writing, presenting=presenting))
+                if len(batch) >= chunk_size:
+                    Student.objects.bulk_create(batch)
+                    result.created += len(batch)
+                    batch = []
+        except (csv.Error, UnicodeDecodeError) as exc:
+            # A broken file (binary data, wrong encoding...): nothing is imported.
+            raise RosterError(f"Line {reader.line_num}: the file could not be read ({exc})") from exc
+        if batch:
+            Student.objects.bulk_create(batch)
+            result.created += len(batch)
+        if result.created:
+            section.bump_version()
+    return result
@@ -1,92 +1,172 @@
-import statistics
-from .models import Group, Student
+from django.db import transaction
+from .models import Generation, Group, Section, Student, StudentConstraint
+from .constraints import ConstraintError, Rules, check
+from .planner import GroupPlan, fingerprint, plan_matrix, resolve_scoring
+from .skillmatrix import SectionMatrix
+from . import optimizer, stats
+from .profiling import phase, profiled
 
-def generate_groups(section, k_value, weights=None):
+def generate_groups(section, k_value, weights=None, engine=None, optimize=False,
+                    time_budget=optimizer.DEFAULT_TIME_BUDGET, scoring=None):
     """
     Stable Power Balancing Algorithm:
     1. Safety Check: If groups exist, STOP immediately (Prevents accidental shuffling).
     2. Deterministic Sort: Sorts by Power, then by ID (Ensures same result every time).
     3. Weakest-First Assignment: Balances total power perfectly.
+    4. Bulk Save: The whole assignment is computed in memory first, then written
+       with one bulk_create + one bulk_update inside a single transaction
+       (plus the GroupStats rows of the new groups).
+
+    `weights` ({'c', 'd', 'w', 'p'} multipliers from the dashboard form) switches
+    to weighted scoring: power, sort order and role clashes all use the
+    weighted skills. All weights at 1 gives exactly the unweighted result.
+
+    `engine` picks the assignment engine from engines.ENGINES (default: 'heap').
+    All engines produce the same groups; they only differ in speed.
+
+    `optimize=True` adds a local-search pass (optimizer.py) after the greedy
+    one, limited to `time_budget` seconds. Returns the saved GroupPlan.
+
+    `scoring='diversity'` balances each group's four skills against the
+    section's average instead of power + Role Clash (engines.diversity_engine).
+
+    Every save is recorded as a Generation (inputs fingerprint + assignment);
+    planning the same inputs again reuses it instead of recomputing.
+
+    The section's grouping rules (keep-together / keep-apart pairs, group
+    size limits) are always enforced: with any rule set, the constraint
+    solver (constraints.py) replaces `engine`. Raises ConstraintError if
+    they can't be met.
     """
-    
+
     # --- 1. SAFETY CHECK (The Fix for your issue) ---
-    # If groups are already made, stop the function. 
+    # If groups are already made, stop the function.
     # This prevents the button from "reshuffling" your work.
     if Group.objects.filter(section=section).exists():
         return
 
-    # 2. Create New Groups
-    groups = []
-    for i in range(k_value):
-        groups.append(Group.objects.create(section=section, name=f"Group {i+1}"))
-    
-    # 3. Get Students (DETERMINISTIC LOADING)
-    # We order by 'id' first to ensure the list is exactly the same every time we load it.
-    students = list(Student.objects.filter(section=section).order_by('id'))
-    if not students:
-        return
+    plan = plan_groups(section, k_value, weights, engine, optimize=optimize, time_budget=time_budget,
+                       scoring=scoring)
+    save_groups(section, plan)
+    return plan
+
+def save_rules(section, rules):
+    """
+    Replaces the section's grouping rules (pairs and size limits) in one transaction.
+    Raises ConstraintError, writing nothing, if the rules contradict each other
+    or name students of another section.
+    """
+    check(rules)
+    named = rules.students
+    known = set(Student.objects.filter(section=section, id__in=named).values_list('id', flat=True))
+    unknown = sorted(named - known)
+    if unknown:
+        raise ConstraintError(f"Not students of this class: {', '.join(map(str, unknown))}.")
+
+    with transaction.atomic():
+        StudentConstraint.objects.filter(section=section).delete()
+        StudentConstraint.objects.bulk_create(
+            [StudentConstraint(section=section, kind=StudentConstraint.TOGETHER, student_a_id=a, student_b_id=b)
+             for a, b in rules.together]
+            + [StudentConstraint(section=section, kind=StudentConstraint.APART, student_a_id=a, student_b_id=b)
+               for a, b in rules.apart],
+            batch_size=1000,
+        )
+        section.min_group_size, section.max_group_size = rules.min_size, rules.max_size
+        section.save(update_fields=['min_group_size', 'max_group_size'])
+
+class RosterChanged(Exception):
+    """The section's students changed between planning and saving a GroupPlan."""
+
+def plan_groups(section, k_value, weights=None, engine=None, progress=None, optimize=False,
+                time_budget=optimizer.DEFAULT_TIME_BUDGET, use_stored=True, scoring=None):
+    """
+    Steps 2-4 of generate_groups: reads the section and computes the
+    assignment in memory, without writing anything.
+    `progress(percent)` is called after each phase, if given.
+    `use_stored=False` always recomputes, even for known inputs.
+    """
+    # 2. Get Students (DETERMINISTIC LOADING)
+    # One values_list() query into an (n x 4) skill matrix, ordered by 'id'
+    # so the rows are exactly the same every time we load them.
+    with phase('load'):
+        matrix = SectionMatrix.load(section)
+        rules = Rules.load(section)
+    if progress:
+        progress(20)
+
+    # Same roster and parameters as a stored generation? Reuse its assignment.
+    if use_stored:
+        key = fingerprint(matrix, k_value, weights, optimize, time_budget, rules, scoring)
+        stored = Generation.objects.filter(section=section, fingerprint=key).order_by('-id').first()
+        if stored:
+            plan = _stored_plan(stored, matrix, rules)
+            plan.notes = resolve_scoring(scoring, optimize, rules)[2]
+            return plan
+
+    # 3-4. Sort and assign in memory (planner.py, no DB access)
+    return plan_matrix(matrix, k_value, weights, engine, optimize=optimize,
+                       time_budget=time_budget, progress=progress, rules=rules, scoring=scoring)
+
+def _stored_plan(generation, matrix, rules=None):
+    """Rebuilds the GroupPlan of a stored Generation (same fingerprint, so same students)."""
+    rows_by_id = dict(zip(matrix.ids.tolist(), matrix.skills.tolist()))
+    student_ids = [sid for sid, _ in generation.assignment]
+    return GroupPlan(
+        generation.k_value, matrix, student_ids,
+        rows=[rows_by_id[sid] for sid in student_ids],
+        assignment=[idx for _, idx in generation.assignment],
+        optimization=generation.optimization or None,
+        weights=generation.weights, optimize=generation.optimize,
+        time_budget=generation.time_budget, source=generation, rules=rules,
+        scoring=generation.scoring,
+    )
+
+def _version(section):
+    return Section.objects.values_list('version', flat=True).get(pk=section.pk)
+
+@profiled('persist')
+def save_groups(section, plan, replace=False):
+    """
+    Step 5 of generate_groups: writes a GroupPlan in one transaction.
+
+    With replace=True the section's old groups are deleted in the same
+    transaction, so readers see either the old groups or the new ones,
+    never a half-written mix. Raises RosterChanged (and writes nothing) if
+    students were added, removed or edited since the plan was computed.
+
+    A plan reused from a stored Generation whose groups are still on screen
+    untouched (same section version) writes nothing at all.
+    """
+    # 5. PERSIST (All-or-nothing)
+    # One INSERT for the groups and one batched UPDATE for the students,
+    # instead of one autocommitted write per row.
+    with transaction.atomic():
+        if replace:
+            if plan.source is not None and _version(section) == plan.source.section_version:
+                plan.generation, plan.unchanged = plan.source, True
+                return list(Group.objects.filter(section=section).order_by('id'))
+            current = SectionMatrix.load(section)
+            if not current.same_roster(plan.matrix):
+                raise RosterChanged(f"The roster of {section} changed during generation.")
+            Group.objects.filter(section=section).delete()
+
+        groups = Group.objects.bulk_create(
+            [Group(section=section, name=f"Group {i+1}") for i in range(plan.k_value)]
+        )
+        students = [Student(id=sid, assigned_group=groups[idx])
+                    for sid, idx in zip(plan.student_ids, plan.assignment)]
+        if students:
+            Student.objects.bulk_update(students, ['assigned_group'])
+
+        # Start the running totals of every new group (one more INSERT)
+        rows_by_group = {}
+        for row, idx in zip(plan.rows, plan.assignment):
+            rows_by_group.setdefault(idx, []).append(row)
+        stats.create_for_groups(groups, rows_by_group)
+        section.bump_version()
 
-    # 4. SORTING
-    # Sort from Strongest to Weakest. 
-    # Python's sort is stable, so ties will keep their ID order. Result is 100% consistent.
-    students.sort(key=lambda s: (s.coding + s.design + s.writing + s.presenting), reverse=True)
-    
-    # Track stats
-    group_stats = []
-    for i in range(k_value):
-        group_stats.append({
-            'index': i,
-            'total_power': 0,
-            'count': 0,
-            'coding': 0, 'design': 0, 'writing': 0, 'presenting': 0
-        })
-
-    # 5. ASSIGNMENT LOOP (Weakest-First Strategy)
-    for student in students:
-        student_power = student.coding + student.design + student.writing + student.presenting
-        
-        # FIND THE BEST GROUP
-        min_size = min(g['count'] for g in group_stats)
-        
-        best_group = None
-        best_score = float('inf')
-        
-        for g in group_stats:
-            # RULE 1: Size Constraint (Keep sizes even)
-            if g['count'] > min_size:
-                penalty = 100000 
-            else:
-                penalty = 0
-            
-            # RULE 2: Power Balancing (Fill the Weakest Group)
-            penalty += g['total_power']
-            
-            # RULE 3: Role Clash (Small Tie-Breaker)
-            clash_penalty = 0
-            skills = {'coding': student.coding, 'design': student.design, 
-                      'writing': student.writing, 'presenting': student.presenting}
-            best_skill = max(skills, key=skills.get)
-            
-            # If student is Expert (5) and Group has Expert (>4), add small penalty
-            if skills[best_skill] >= 5 and g[best_skill] >= 4:
-                clash_penalty = 5 
-            
-            penalty += clash_penalty
-
-            if penalty < best_score:
-                best_score = penalty
-                best_group = g
-        
-        # ASSIGN
-        idx = best_group['index']
-        target_group = groups[idx]
-        student.assigned_group = target_group
-        student.save()
-        
-        # Update Stats
-        group_stats[idx]['total_power'] += student_power
-        group_stats[idx]['count'] += 1
-        group_stats[idx]['coding'] += student.coding
-        group_stats[idx]['design'] += student.design
-        group_stats[idx]['writing'] += student.writing
-        group_stats[idx]['presenting'] += student.presenting
\ No newline at end of file
+        # Audit record + cache entry for these inputs
+        plan.generation = Generation.from_plan(section.pk, plan, _version(section))
+        plan.generation.save()
+    return groups
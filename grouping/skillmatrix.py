@@ -0,0 +1,159 @@
+"""
+Skill Matrix: a section's skills as one NumPy array.
+
+Each student becomes one row of a contiguous (n x 4) int8 matrix
+(coding, design, writing, presenting), loaded with a single values_list()
+query. Power, best skill and per-group statistics are then computed as
+vectorized operations instead of Python attribute access per student.
+"""
+from itertools import chain
+
+import numpy as np
+
+from .engines import normalize_weights
+
+SKILL_FIELDS = ('coding', 'design', 'writing', 'presenting')
+
+
+class SectionMatrix:
+    """
+    Skills of one section, ordered by student id.
+
+    ids:       (n,)  int64 - student primary keys
+    group_ids: (n,)  int64 - assigned_group_id, 0 when unassigned
+    skills:    (n,4) int8  - one row per student
+    """
+
+    def __init__(self, ids, group_ids, skills):
+        self.ids = ids
+        self.group_ids = group_ids
+        self.skills = skills
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds the matrix from (id, assigned_group_id, c, d, w, p) tuples."""
+        flat = np.fromiter(
+            chain.from_iterable((r[0], r[1] or 0, r[2], r[3], r[4], r[5]) for r in rows),
+            dtype=np.int64,
+        ).reshape(-1, 6)
+        return cls(
+            ids=flat[:, 0].copy(),
+            group_ids=flat[:, 1].copy(),
+            skills=np.ascontiguousarray(flat[:, 2:], dtype=np.int8),
+        )
+
+    @classmethod
+    def load(cls, section):
+        """One query: every student of the section, ordered by id."""
+        # Imported here so the rest of this module works without Django (worker processes)
+        from .models import Student
+
+        rows = (Student.objects.filter(section=section)
+                .order_by('id')
+                .values_list('id', 'assigned_group_id', *SKILL_FIELDS))
+        return cls.from_rows(rows)
+
+    def same_roster(self, other):
+        """True if both matrices hold the same students with the same skills."""
+        return np.array_equal(self.ids, other.ids) and np.array_equal(self.skills, other.skills)
+
+    def labels_for(self, group_ids):
+        """
+        Maps each student to the position of their group in `group_ids`
+        (-1 for unassigned students or groups not in the list).
+        """
+        lookup = {gid: i for i, gid in enumerate(group_ids)}
+        return np.fromiter((lookup.get(g, -1) for g in self.group_ids.tolist()),
+                           dtype=np.int64, count=len(self.group_ids))
+
+
+def power(skills, weights=None):
+    """
+    Total power per student: the sum of the four skills, or the weighted
+    sum when `weights` is given (see engines.normalize_weights).
+    """
+    if weights is None:
+        return skills.sum(axis=1, dtype=np.int32)
+    return skills.astype(np.int32) @ np.asarray(normalize_weights(weights), dtype=np.int32)
+
+
+def best_skill(skills):
+    """Column of each student's strongest skill (first one wins on ties)."""
+    return skills.argmax(axis=1)
+
+
+def strongest_first(skills, weights=None):
+    """
+    Row order Strongest -> Weakest by (weighted) power.
+    The sort is stable, so ties keep their original (id) order.
+    """
+    return np.argsort(-power(skills, weights), kind='stable')
+
+
+def group_counts(labels, k):
+    """Members per group. Students labelled -1 are ignored."""
+    mask = labels >= 0
+    return np.bincount(labels[mask], minlength=k)
+
+
+def group_sums(skills, labels, k):
+    """(k x 4) per-skill totals of every group."""
+    mask = labels >= 0
+    sums = np.zeros((k, skills.shape[1]), dtype=np.int64)
+    np.add.at(sums, labels[mask], skills[mask])
+    return sums
+
+
+def group_stdev(values, labels, k):
+    """
+    Sample standard deviation of `values` inside each group
+    (same as statistics.stdev). Groups with fewer than 2 members get 0.
+    """
+    mask = labels >= 0
+    lab = labels[mask]
+    vals = values[mask].astype(np.float64)
+    counts = np.bincount(lab, minlength=k)
+    sums = np.bincount(lab, weights=vals, minlength=k)
+    squares = np.bincount(lab, weights=vals * vals, minlength=k)
+
+    stdev = np.zeros(k, dtype=np.float64)
+    ok = counts > 1
+    n = counts[ok]
+    variance = (n * squares[ok] - sums[ok] ** 2) / (n * (n - 1))
+    stdev[ok] = np.sqrt(np.maximum(variance, 0.0))
+    return stdev
+
+
+def group_outliers(values, labels, k):
+    """
+    Row index of the member furthest from their group's mean, per group
+    (-1 for empty groups). Ties go to the earliest row.
+    """
+    mask = labels >= 0
+    counts = np.bincount(labels[mask], minlength=k)
+    sums = np.bincount(labels[mask], weights=values[mask].astype(np.float64), minlength=k)
+    means = np.divide(sums, counts, out=np.zeros(k), where=counts > 0)
+
+    rows = np.flatnonzero(mask)
+    lab = labels[rows]
+    distance = np.abs(values[rows] - means[lab])
+    # lexsort is stable: by group, then furthest first, then original row order
+    order = np.lexsort((-distance, lab))
+    groups, first = np.unique(lab[order], return_index=True)
+
+    outliers = np.full(k, -1, dtype=np.int64)
+    outliers[groups] = rows[order[first]]
+    return outliers
+
+
+def skill_spread(skills, labels, k):
+    """
+    Variance across groups of the mean of each skill: a (4,) array, 0 when
+    every group has the same average coding, design... Empty groups are ignored.
+    """
+    counts = group_counts(labels, k)
+    means = group_sums(skills, labels, k)[counts > 0] / counts[counts > 0, None]
+    return means.var(axis=0) if len(means) else np.zeros(skills.shape[1])
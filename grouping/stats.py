@@ -0,0 +1,156 @@
+"""
+Incremental maintenance of the GroupStats table.
+
+Every membership change is turned into a small delta
+(count, per-skill sums, power, power^2) and applied with a single
+UPDATE ... SET x = x + delta per affected group, so the cost depends on the
+number of students that moved, never on the size of the group or section.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, Sum
+
+from .models import Group, GroupStats
+
+STAT_FIELDS = ('count', 'coding', 'design', 'writing', 'presenting', 'power', 'power_sq')
+
+
+def totals(rows):
+    """
+    Adds up (coding, design, writing, presenting) rows into a
+    {field: value} dict with the same keys as GroupStats.
+    """
+    result = dict.fromkeys(STAT_FIELDS, 0)
+    for c, d, w, p in rows:
+        student_power = c + d + w + p
+        result['count'] += 1
+        result['coding'] += c
+        result['design'] += d
+        result['writing'] += w
+        result['presenting'] += p
+        result['power'] += student_power
+        result['power_sq'] += student_power * student_power
+    return result
+
+
+def apply_delta(group_id, rows, sign=1):
+    """Adds (sign=1) or removes (sign=-1) the students in `rows` from a group's stats."""
+    if group_id is None:
+        return
+    delta = totals(rows)
+    if not delta['count']:
+        return
+    GroupStats.objects.filter(group_id=group_id).update(
+        **{field: F(field) + sign * delta[field] for field in STAT_FIELDS}
+    )
+
+
+def remove_students(rows):
+    """
+    Subtracts students from their groups' stats. `rows` are
+    (assigned_group_id, coding, design, writing, presenting) tuples.
+    One UPDATE per affected group.
+    """
+    by_group = defaultdict(list)
+    for group_id, *skills in rows:
+        if group_id is not None:
+            by_group[group_id].append(skills)
+    for group_id, group_rows in by_group.items():
+        apply_delta(group_id, group_rows, sign=-1)
+
+
+def move_student(student, old_group_id, new_group_id):
+    """A single student changed groups: two O(1) updates."""
+    if old_group_id == new_group_id:
+        return
+    row = [(student.coding, student.design, student.writing, student.presenting)]
+    apply_delta(old_group_id, row, sign=-1)
+    apply_delta(new_group_id, row, sign=1)
+
+
+def replace_students(before, after):
+    """
+    A batch of changes to the same students: `before` and `after` are their
+    (assigned_group_id, coding, design, writing, presenting) rows. The net
+    delta of each group is applied with one UPDATE per affected group.
+    Returns the ids of the groups that changed.
+    """
+    net = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for sign, rows in ((-1, before), (1, after)):
+        for group_id, *skills in rows:
+            if group_id is None:
+                continue
+            for field, value in totals([skills]).items():
+                net[group_id][field] += sign * value
+
+    changed = sorted(gid for gid, delta in net.items() if any(delta.values()))
+    for group_id in changed:
+        GroupStats.objects.filter(group_id=group_id).update(
+            **{field: F(field) + net[group_id][field] for field in STAT_FIELDS}
+        )
+    return changed
+
+
+def create_for_groups(groups, rows_by_group):
+    """Creates the stats rows for freshly generated groups in one INSERT."""
+    GroupStats.objects.bulk_create([
+        GroupStats(group=group, **totals(rows_by_group.get(i, ())))
+        for i, group in enumerate(groups)
+    ])
+
+
+def ground_truth(groups):
+    """
+    Recomputes the stats of a Group queryset straight from the students,
+    in one aggregate query. Returns {group_id: {field: value}}.
+    """
+    power = F('students__coding') + F('students__design') + F('students__writing') + F('students__presenting')
+    rows = groups.annotate(
+        _count=Count('students'),
+        _coding=Sum('students__coding'),
+        _design=Sum('students__design'),
+        _writing=Sum('students__writing'),
+        _presenting=Sum('students__presenting'),
+        _power=Sum(power),
+        _power_sq=Sum(power * power),
+    ).values_list('id', *(f'_{field}' for field in STAT_FIELDS))
+    return {row[0]: {field: value or 0 for field, value in zip(STAT_FIELDS, row[1:])} for row in rows}
+
+
+def rebuild(groups=None):
+    """
+    Replaces the stats of `groups` with freshly computed values.
+    Returns the number of groups whose stored stats were wrong or missing.
+    """
+    if groups is None:
+        groups = Group.objects.all()
+    expected = ground_truth(groups)
+    stored = {s.group_id: s for s in GroupStats.objects.filter(group__in=groups)}
+    wrong = 0
+    to_create, to_update = [], []
+    for group_id, values in expected.items():
+        current = stored.get(group_id)
+        if current is None:
+            to_create.append(GroupStats(group_id=group_id, **values))
+        elif any(getattr(current, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(current, field, value)
+            to_update.append(current)
+        else:
+            continue
+        wrong += 1
+    GroupStats.objects.bulk_create(to_create)
+    GroupStats.objects.bulk_update(to_update, STAT_FIELDS)
+    return wrong
+
+
+def verify(groups=None):
+    """Returns the ids of groups whose stored stats don't match their students."""
+    if groups is None:
+        groups = Group.objects.all()
+    expected = ground_truth(groups)
+    stored = {
+        s.group_id: {field: getattr(s, field) for field in STAT_FIELDS}
+        for s in GroupStats.objects.filter(group__in=groups)
+    }
+    return sorted(gid for gid, values in expected.items() if stored.get(gid) != values)
@@ -1,3 +1,1523 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import random
+import statistics
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from urllib.parse import quote
+from unittest import skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .constraints import ConstraintError, Rules, blocks, check, solve
+from .engines import ENGINES, diversity_engine, heap_engine, linear_engine, score_rows
+from . import batch, jobs, optimizer, profiling, stats, views
+from .benchmarks import concurrency, dashboard_render, diversity, suite
+from .placement import place_unassigned
+from .planner import fingerprint, plan_matrix, plan_students
+from .models import Generation, GenerationJob, Group, GroupStats, Section, Student, StudentConstraint
+from .roster import MAX_REPORTED_ERRORS, RosterError, import_roster
+from .services import RosterChanged, generate_groups, plan_groups, save_groups, save_rules
+from .skillmatrix import (SectionMatrix, group_outliers, group_stdev, group_sums, power, skill_spread,
+                          strongest_first)
+
+# (coding, design, writing, presenting) for students 1..18
+GOLDEN_ROSTER = [
+    (5, 3, 2, 1), (2, 5, 4, 3), (3, 3, 3, 3), (5, 5, 1, 1), (1, 1, 1, 1), (4, 2, 5, 2),
+    (2, 2, 2, 5), (5, 1, 1, 5), (3, 4, 2, 1), (1, 5, 1, 5), (4, 4, 4, 4), (2, 3, 1, 2),
+    (5, 2, 3, 4), (1, 2, 5, 5), (3, 1, 4, 2), (2, 4, 3, 5), (5, 5, 5, 5), (1, 3, 2, 4),
+]
+# Members of "Group 1".."Group 4" produced by the original O(n*k) loop
+GOLDEN_GROUPS = [
+    [1, 3, 17, 18],
+    [10, 11, 14, 15],
+    [2, 8, 9, 12, 16],
+    [4, 5, 6, 7, 13],
+]
+
+
+def make_students(section, count):
+    """Creates `count` students with a deterministic spread of skills."""
+    return Student.objects.bulk_create([
+        Student(
+            section=section,
+            name=f"Student {i}",
+            coding=1 + (i * 7) % 5,
+            design=1 + (i * 3) % 5,
+            writing=1 + (i * 11) % 5,
+            presenting=1 + (i * 13) % 5,
+        )
+        for i in range(count)
+    ])
+
+
+class GenerateGroupsTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+
+    def test_every_student_is_assigned_and_sizes_are_even(self):
+        make_students(self.section, 23)
+        generate_groups(self.section, 4)
+
+        groups = Group.objects.filter(section=self.section)
+        self.assertEqual(groups.count(), 4)
+        self.assertFalse(Student.objects.filter(section=self.section, assigned_group=None).exists())
+        sizes = sorted(g.students.count() for g in groups)
+        self.assertEqual(sizes, [5, 6, 6, 6])
+
+    def test_existing_groups_are_not_reshuffled(self):
+        make_students(self.section, 6)
+        generate_groups(self.section, 2)
+        before = list(Student.objects.order_by('id').values_list('assigned_group', flat=True))
+
+        generate_groups(self.section, 3)
+
+        self.assertEqual(Group.objects.filter(section=self.section).count(), 2)
+        after = list(Student.objects.order_by('id').values_list('assigned_group', flat=True))
+        self.assertEqual(before, after)
+
+    def test_query_count_does_not_grow_with_section_size(self):
+        counts = []
+        for size in (10, 300):
+            section = Section.objects.create(name=f"S{size}", teacher=self.teacher)
+            make_students(section, size)
+            with CaptureQueriesContext(connection) as ctx:
+                generate_groups(section, 5)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        # exists() + student load + rules load + stored generation lookup + savepoint
+        # + INSERT groups + UPDATE students + INSERT group stats + version bump
+        # + version read + INSERT generation + release
+        self.assertEqual(counts[0], 12)
+
+    def test_every_engine_matches_the_golden_output(self):
+        for engine in ENGINES:
+            section = Section.objects.create(name=engine, teacher=self.teacher)
+            Student.objects.bulk_create([
+                Student(section=section, name=f"Student {i+1}", coding=c, design=d, writing=w, presenting=p)
+                for i, (c, d, w, p) in enumerate(GOLDEN_ROSTER)
+            ])
+            generate_groups(section, 4, engine=engine)
+
+            members = [
+                sorted(int(s.name.split()[1]) for s in group.students.all())
+                for group in Group.objects.filter(section=section).order_by('id')
+            ]
+            self.assertEqual(members, GOLDEN_GROUPS, engine)
+
+    def test_unit_weights_give_the_unweighted_result(self):
+        Student.objects.bulk_create([
+            Student(section=self.section, name=f"Student {i+1}", coding=c, design=d, writing=w, presenting=p)
+            for i, (c, d, w, p) in enumerate(GOLDEN_ROSTER)
+        ])
+        generate_groups(self.section, 4, weights={'c': 1, 'd': 1, 'w': 1, 'p': 1})
+
+        members = [
+            sorted(int(s.name.split()[1]) for s in group.students.all())
+            for group in Group.objects.filter(section=self.section).order_by('id')
+        ]
+        self.assertEqual(members, GOLDEN_GROUPS)
+
+    def test_view_passes_weights_to_the_weighted_scoring(self):
+        Student.objects.bulk_create([
+            Student(section=self.section, name=f"Student {i+1}", coding=c, design=d, writing=w, presenting=p)
+            for i, (c, d, w, p) in enumerate(GOLDEN_ROSTER)
+        ])
+        self.client.force_login(self.teacher)
+        self.client.post(reverse('generate_groups', args=[self.section.id]), {
+            'group_count': 4, 'weight_c': 5, 'weight_d': 1, 'weight_w': 1, 'weight_p': 3,
+        })
+        jobs.run_queued()
+
+        weights = {'c': 5, 'd': 1, 'w': 1, 'p': 3}
+        ranked = sorted(range(len(GOLDEN_ROSTER)),
+                        key=lambda i: score_rows([GOLDEN_ROSTER[i]], weights)[0][0], reverse=True)
+        expected = linear_engine([GOLDEN_ROSTER[i] for i in ranked], 4, weights)
+        groups = list(Group.objects.filter(section=self.section).order_by('id'))
+        for i, idx in zip(ranked, expected):
+            student = Student.objects.get(section=self.section, name=f"Student {i+1}")
+            self.assertEqual(student.assigned_group, groups[idx])
+
+
+class EngineEquivalenceTests(SimpleTestCase):
+    def test_heap_engine_matches_linear_engine(self):
+        rng = random.Random(42)
+        for _ in range(500):
+            k_value = rng.randint(1, 40)
+            rows = [tuple(rng.randint(1, 5) for _ in range(4)) for _ in range(rng.randint(0, 200))]
+            rows.sort(key=sum, reverse=True)
+            self.assertEqual(heap_engine(rows, k_value), linear_engine(rows, k_value))
+
+    def test_heap_engine_matches_linear_engine_with_weights(self):
+        rng = random.Random(43)
+        for _ in range(300):
+            k_value = rng.randint(1, 40)
+            weights = {key: rng.randint(0, 5) for key in 'cdwp'}
+            rows = [tuple(rng.randint(1, 5) for _ in range(4)) for _ in range(rng.randint(0, 200))]
+            self.assertEqual(heap_engine(rows, k_value, weights), linear_engine(rows, k_value, weights))
+
+    def test_scores_are_weighted(self):
+        powers, best_skills, clashes = score_rows([(4, 5, 1, 1)], {'c': 3, 'd': 1, 'w': 1, 'p': 1})
+        # coding 4*3=12 beats design 5*1=5, and a 4 is not an Expert level
+        self.assertEqual((powers, best_skills, clashes), ([19], [0], [0]))
+        powers, best_skills, clashes = score_rows([(5, 1, 1, 1)], {'c': 2, 'd': 1, 'w': 1, 'p': 1})
+        self.assertEqual((powers, best_skills, clashes), ([13], [0], [10]))
+
+    def test_rejects_zero_groups(self):
+        for engine in ENGINES.values():
+            with self.assertRaises(ValueError):
+                engine([(1, 1, 1, 1)], 0)
+
+
+class DiversityScoringTests(SimpleTestCase):
+    def random_rows(self, rng, n):
+        rows = [tuple(rng.randint(1, 5) for _ in range(4)) for _ in range(n)]
+        rows.sort(key=sum, reverse=True)
+        return rows
+
+    def test_each_student_joins_the_group_closest_to_the_mean(self):
+        # Brute force: among the smallest groups, the one whose squared distance from
+        # the mean (skill totals - size * section mean) grows least, lowest index on ties
+        rng = random.Random(7)
+        for _ in range(100):
+            k_value = rng.randint(1, 8)
+            weights = {key: rng.randint(1, 3) for key in 'cdwp'}
+            rows = self.random_rows(rng, rng.randint(1, 40))
+            vectors = np.array(rows, dtype=float) * [weights[key] for key in 'cdwp']
+            mean = vectors.mean(axis=0)
+            members = [[] for _ in range(k_value)]
+            for j, g in enumerate(diversity_engine(rows, k_value, weights)):
+                size = min(len(m) for m in members)
+                growth = {}
+                for i, m in enumerate(members):
+                    if len(m) == size:
+                        before = vectors[m].sum(axis=0) - len(m) * mean
+                        after = before + vectors[j] - mean
+                        growth[i] = float((after ** 2).sum() - (before ** 2).sum())
+                best = min(growth.values())
+                self.assertEqual(g, min(i for i, d in growth.items() if d - best < 1e-6))
+                members[g].append(j)
+
+    def test_spreads_every_skill_more_evenly_than_power_scoring(self):
+        rng = random.Random(8)
+        rows = self.random_rows(rng, 500)
+        skills = np.array(rows, dtype=np.int8)
+        diverse = skill_spread(skills, np.array(diversity_engine(rows, 100)), 100)
+        balanced = skill_spread(skills, np.array(heap_engine(rows, 100)), 100)
+        self.assertTrue((diverse < balanced / 2).all())
+        self.assertEqual(Counter(diversity_engine(rows, 100)), Counter({g: 5 for g in range(100)}))
+
+    def test_rejects_zero_groups(self):
+        with self.assertRaises(ValueError):
+            diversity_engine([(1, 1, 1, 1)], 0)
+
+    def test_skill_spread(self):
+        skills = np.array([[5, 1, 1, 1], [1, 5, 1, 1], [3, 3, 1, 1], [3, 3, 1, 1]], dtype=np.int8)
+        self.assertEqual(skill_spread(skills, np.array([0, 0, 1, 1]), 2).tolist(), [0, 0, 0, 0])
+        # Groups of means (5, 1) and (2, 4): variance 2.25 for both skills; group 2 is empty
+        self.assertEqual(skill_spread(skills, np.array([0, 1, 1, -1]), 3).tolist(), [2.25, 2.25, 0, 0])
+
+    def test_quality_report(self):
+        results = diversity.run(students=60, groups=12)
+        by_mode = {(r['roster'], r['scoring']): r for r in results}
+        for shape in diversity.ROSTERS:
+            self.assertLess(by_mode[shape, 'diversity']['worst_skill_variance'],
+                            by_mode[shape, 'power']['worst_skill_variance'])
+
+    def test_rules_keep_power_scoring(self):
+        matrix = SectionMatrix.from_rows((i, None, *row) for i, row in enumerate(GOLDEN_ROSTER, 1))
+        rules = Rules(apart=[(1, 2)])
+        plan = plan_matrix(matrix, 4, rules=rules, scoring='diversity')
+        power_plan = plan_matrix(matrix, 4, rules=rules)
+        self.assertEqual(plan.assignment, power_plan.assignment)
+        # Recorded as what ran, with a note saying why
+        self.assertEqual((plan.scoring, plan.fingerprint), ('power', power_plan.fingerprint))
+        self.assertIn('grouping rules', plan.notes[0])
+        self.assertEqual(power_plan.notes, [])
+
+    def test_diversity_scoring_skips_the_optimizer(self):
+        matrix = SectionMatrix.from_rows((i, None, *row) for i, row in enumerate(GOLDEN_ROSTER, 1))
+        plan = plan_matrix(matrix, 4, scoring='diversity', optimize=True)
+        self.assertEqual((plan.scoring, plan.optimize, plan.optimization), ('diversity', False, None))
+        self.assertIn('optimizer', plan.notes[0])
+        self.assertEqual(plan.fingerprint, plan_matrix(matrix, 4, scoring='diversity').fingerprint)
+
+
+class ConstraintSolverTests(SimpleTestCase):
+    def sorted_case(self, n, seed=0):
+        students = suite.make_students(n, seed)
+        matrix = SectionMatrix.from_rows((sid, None, c, d, w, p) for sid, c, d, w, p in students)
+        order = strongest_first(matrix.skills)
+        return students, matrix.ids[order].tolist(), matrix.skills[order].tolist()
+
+    def assert_rules_hold(self, ids, assignment, rules):
+        group = dict(zip(ids, assignment))
+        for a, b in rules.together:
+            self.assertEqual(group[a], group[b], (a, b))
+        for a, b in rules.apart:
+            self.assertNotEqual(group[a], group[b], (a, b))
+        sizes = Counter(assignment).values()
+        if rules.min_size:
+            self.assertGreaterEqual(min(sizes), rules.min_size)
+        if rules.max_size:
+            self.assertLessEqual(max(sizes), rules.max_size)
+
+    def test_without_rules_it_is_the_heap_engine(self):
+        rng = random.Random(44)
+        for _ in range(200):
+            k_value = rng.randint(1, 40)
+            weights = rng.choice([None, {key: rng.randint(0, 5) for key in 'cdwp'}])
+            rows = [tuple(rng.randint(1, 5) for _ in range(4)) for _ in range(rng.randint(0, 200))]
+            ids = list(range(1, len(rows) + 1))
+            self.assertEqual(solve(rows, ids, k_value, weights), heap_engine(rows, k_value, weights))
+
+    def test_keep_together_sets_are_merged(self):
+        _, ids, rows = self.sorted_case(40)
+        # 1-2, 2-3 and 3-4 chain into one set of four
+        rules = Rules(together=[(1, 2), (3, 2), (3, 4), (10, 20)])
+        self.assertEqual(sorted(len(m) for m in blocks(ids, rules)[1] if len(m) > 1), [2, 4])
+        assignment = solve(rows, ids, 8, rules=rules)
+        self.assert_rules_hold(ids, assignment, rules)
+
+    def test_thousands_of_rules_on_5000_students(self):
+        # Timed by the 'constraints' benchmark (benchmarks/suite.py), not here
+        students, ids, rows = self.sorted_case(5000, seed=1)
+        rules = suite.make_rules(students, seed=1)
+        self.assertGreaterEqual(len(rules.together) + len(rules.apart), 3000)
+        self.assert_rules_hold(ids, solve(rows, ids, 1000, rules=rules), rules)
+
+    def test_impossible_rules_are_reported(self):
+        _, ids, rows = self.sorted_case(12)
+        cases = [
+            (Rules(together=[(1, 2), (2, 3)], apart=[(1, 3)]), 'same keep-together set'),
+            (Rules(together=[(1, 2), (2, 3), (3, 4), (4, 5)], max_size=4), 'set of 5'),
+            (Rules(max_size=2), "can't hold 12"),
+            (Rules(min_size=5), "can't fill 3 groups"),
+            (Rules(together=[(1, 2), (2, 3), (3, 4), (4, 5), (5, 6)], min_size=4), 'at least 4 students in every group'),
+            (Rules(apart=[(1, 2), (1, 3), (2, 3), (1, 4), (2, 4), (3, 4)]), 'kept apart from'),
+        ]
+        for rules, message in cases:
+            with self.assertRaisesMessage(ConstraintError, message):
+                solve(rows, ids, 3, rules=rules)
+        with self.assertRaisesMessage(ConstraintError, 'same keep-together set'):
+            check(cases[0][0])
+
+    def test_satisfiable_rules_are_not_rejected(self):
+        # Placed in id order, 3 would find both groups taken by 1 and 2
+        ids, rows = [1, 2, 3, 4, 5, 6], [(3, 3, 3, 3)] * 6
+        cases = [
+            Rules([], [(1, 3), (2, 3)]),
+            Rules([(1, 2)], [(3, 4), (4, 1)]),
+            # The greedy pass gets stuck on the size cap: only the repair search finds it
+            Rules([], [(1, 6), (2, 3), (3, 5), (4, 6)], max_size=3),
+        ]
+        for rules in cases:
+            self.assert_rules_hold(ids, solve(rows, ids, 2, rules=rules), rules)
+        # Greedy placement leaves a group short of min_size: {3,4},{1,5},{2,6} is the only way
+        rules = Rules([(3, 4)], [(1, 2), (2, 5), (4, 6)], min_size=2, max_size=4)
+        self.assert_rules_hold(ids, solve(rows, ids, 3, rules=rules), rules)
+
+    def test_optimizer_only_swaps_students_without_rules(self):
+        students, ids, rows = self.sorted_case(60)
+        matrix = SectionMatrix.from_rows((sid, None, c, d, w, p) for sid, c, d, w, p in students)
+        rules = Rules(together=[(1, 2), (3, 4)], apart=[(1, 3), (5, 6)], max_size=6)
+        plan = plan_matrix(matrix, 10, optimize=True, time_budget=5, rules=rules)
+        self.assert_rules_hold(plan.student_ids, plan.assignment, rules)
+        greedy = dict(zip(plan.student_ids, solve(rows, ids, 10, rules=rules)))
+        final = dict(zip(plan.student_ids, plan.assignment))
+        self.assertEqual([final[sid] for sid in rules.students], [greedy[sid] for sid in rules.students])
+        self.assertNotEqual(fingerprint(matrix, 10), fingerprint(matrix, 10, rules=rules))
+        self.assertEqual(fingerprint(matrix, 10), fingerprint(matrix, 10, rules=Rules()))
+
+    def test_rules_json_is_validated(self):
+        rules = Rules.from_dict({'together': [[2, 1]], 'apart': [[3, 4]], 'max_group_size': 5})
+        self.assertEqual(rules.as_dict(), {'together': [[1, 2]], 'apart': [[3, 4]],
+                                           'min_group_size': None, 'max_group_size': 5})
+        for bad in ([], {'together': [[1]]}, {'apart': [[1, 1]]}, {'together': [['1', 2]]},
+                    {'min_group_size': 0}, {'min_group_size': 4, 'max_group_size': 3}):
+            with self.assertRaises(ConstraintError):
+                Rules.from_dict(bad)
+
+
+class OptimizerTests(SimpleTestCase):
+    def random_case(self, rng, n, k_value):
+        rows = [tuple(rng.randint(1, 5) for _ in range(4)) for _ in range(n)]
+        rows.sort(key=sum, reverse=True)
+        return rows, heap_engine(rows, k_value)
+
+    def test_never_worse_than_greedy_and_keeps_group_sizes(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            k_value = rng.randint(2, 12)
+            rows, greedy = self.random_case(rng, rng.randint(0, 120), k_value)
+            result = optimizer.optimize(rows, greedy, k_value, max_iterations=2000, time_budget=10)
+
+            self.assertLessEqual(result.objective_after, result.objective_before)
+            self.assertEqual(sorted(result.assignment), sorted(greedy))
+            # The running total matches a from-scratch recomputation
+            self.assertAlmostEqual(result.objective_after,
+                                   optimizer.objective(rows, result.assignment, k_value))
+
+    def test_improves_a_small_section(self):
+        rows, greedy = self.random_case(random.Random(1), 30, 4)
+        result = optimizer.optimize(rows, greedy, 4, time_budget=10)
+        self.assertLess(result.objective_after, result.objective_before)
+        self.assertGreater(result.swaps, 0)
+
+    def test_is_reproducible_with_an_iteration_limit(self):
+        rows, greedy = self.random_case(random.Random(2), 80, 6)
+        first = optimizer.optimize(rows, greedy, 6, max_iterations=5000, time_budget=10, seed=3)
+        second = optimizer.optimize(rows, greedy, 6, max_iterations=5000, time_budget=10, seed=3)
+        self.assertEqual(first.assignment, second.assignment)
+
+    def test_stops_at_the_time_budget(self):
+        rows, greedy = self.random_case(random.Random(3), 2000, 50)
+        # The deadline, not the iteration cap or patience, ends the run (no wall-clock check)
+        unlimited = optimizer.optimize(rows, greedy, 50, max_iterations=20000, patience=10 ** 9, time_budget=10 ** 6)
+        result = optimizer.optimize(rows, greedy, 50, max_iterations=20000, patience=10 ** 9, time_budget=1e-9)
+        self.assertEqual(unlimited.iterations, 20000)
+        self.assertLess(result.iterations, unlimited.iterations)
+
+
+class PurePlanningTests(SimpleTestCase):
+    def test_plan_students_matches_the_golden_output(self):
+        # Shuffled input: the plan only depends on the ids, like generate_groups
+        students = [(i + 1, *skills) for i, skills in enumerate(GOLDEN_ROSTER)]
+        random.Random(5).shuffle(students)
+        assignment = plan_students(students, 4)
+        members = [sorted(sid for sid, idx in assignment.items() if idx == g) for g in range(4)]
+        self.assertEqual(members, GOLDEN_GROUPS)
+
+    def test_benchmark_suite_is_machine_readable(self):
+        report = suite.run(sizes=(50, 200), repeat=1)
+        json.dumps(report)
+        self.assertEqual({(r['benchmark'], r['students']) for r in report['results']},
+                         {(name, n) for name in suite.BENCHMARKS for n in (50, 200)})
+
+        slower = {'results': [dict(r, best_s=r['best_s'] * 2) for r in report['results']]}
+        self.assertEqual(suite.compare(report, report), [])
+        self.assertEqual(len(suite.compare(slower, report)), len(report['results']))
+
+    def test_benchmark_command_writes_json(self):
+        out = StringIO()
+        call_command('run_benchmarks', '--sizes', '100', '--repeat', '1', '--output', '-', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(len(report['results']), len(suite.BENCHMARKS))
+        self.assertIn('numpy', report['meta'])
+
+
+class SkillMatrixTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.rows = [(i + 1, 0, *(rng.randint(1, 5) for _ in range(4))) for i in range(300)]
+        self.matrix = SectionMatrix.from_rows(self.rows)
+        self.labels = np.array([i % 7 for i in range(300)])
+
+    def test_matrix_is_contiguous_int8(self):
+        self.assertEqual(self.matrix.skills.shape, (300, 4))
+        self.assertEqual(self.matrix.skills.dtype, np.int8)
+        self.assertTrue(self.matrix.skills.flags['C_CONTIGUOUS'])
+
+    def test_strongest_first_is_a_stable_sort_by_power(self):
+        expected = sorted(range(300), key=lambda i: sum(self.rows[i][2:]), reverse=True)
+        self.assertEqual(strongest_first(self.matrix.skills).tolist(), expected)
+
+    def test_group_stats_match_per_student_python(self):
+        powers = power(self.matrix.skills)
+        sums = group_sums(self.matrix.skills, self.labels, 7)
+        stdevs = group_stdev(powers, self.labels, 7)
+        outliers = group_outliers(powers, self.labels, 7)
+
+        for g in range(7):
+            members = [i for i in range(300) if i % 7 == g]
+            totals = [sum(self.rows[i][2:]) for i in members]
+            self.assertEqual(sums[g].tolist(), [sum(self.rows[i][2 + s] for i in members) for s in range(4)])
+            self.assertAlmostEqual(stdevs[g], statistics.stdev(totals))
+            mean = statistics.mean(totals)
+            self.assertEqual(outliers[g], max(members, key=lambda i: abs(sum(self.rows[i][2:]) - mean)))
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        self.client.force_login(self.teacher)
+        cache.clear()
+
+    def test_group_stats_and_outlier_suggestion(self):
+        Student.objects.bulk_create([
+            Student(section=self.section, name='Ace', coding=5, design=5, writing=5, presenting=5),
+            Student(section=self.section, name='Bea', coding=1, design=1, writing=1, presenting=1),
+            Student(section=self.section, name='Cy', coding=2, design=1, writing=1, presenting=1),
+        ])
+        generate_groups(self.section, 1)
+
+        response = self.client.get(reverse('dashboard', args=[self.section.id]))
+
+        self.assertEqual(response.status_code, 200)
+        item = response.context['group_data'][0]
+        self.assertEqual(item['skill_values'], [8, 7, 7, 7])
+        self.assertAlmostEqual(item['compatibility_score'], statistics.stdev([20, 4, 5]))
+        self.assertTrue(item['is_unbalanced'])
+        self.assertEqual(item['suggestion'], 'Try moving Ace')
+        self.assertEqual(item['weakness'], 'Design (7 pts)')
+
+    def test_query_count_does_not_grow_with_group_count(self):
+        for k_value in (5, 500):
+            section = Section.objects.create(name=f"K{k_value}", teacher=self.teacher)
+            make_students(section, 500)
+            generate_groups(section, k_value)
+            # session + user + section + annotated groups + students
+            with self.assertNumQueries(5):
+                response = self.client.get(reverse('dashboard', args=[section.id]))
+            self.assertEqual(len(response.context['group_data']), k_value)
+            self.assertEqual(sum(len(item['students']) for item in response.context['group_data']), 500)
+
+    def test_move_controls_do_not_repeat_the_group_list(self):
+        section = Section.objects.create(name='Big', teacher=self.teacher)
+        make_students(section, 200)
+        generate_groups(section, 40)
+
+        response = self.client.get(reverse('dashboard', args=[section.id]))
+        html = response.content.decode()
+        # One placeholder option per student; the groups are sent once, as JSON
+        self.assertEqual(html.count('<option'), 200)
+        options = json.loads(html.split('<script id="group-options" type="application/json">')[1].split('</script>')[0])
+        self.assertEqual(options, [[g.id, g.name] for g in Group.objects.filter(section=section).order_by('id')])
+
+    def test_render_benchmark(self):
+        result = dashboard_render.run(students=30, groups=6, repeat=1)
+        self.assertLess(result['after_bytes'], result['before_bytes'])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        make_students(self.section, 30)
+        generate_groups(self.section, 5)
+        self.async_client.force_login(self.teacher)
+        cache.clear()
+
+    def test_hot_views_are_async(self):
+        for view in (views.dashboard, views.section_list, views.trigger_generation):
+            self.assertTrue(asyncio.iscoroutinefunction(view), view.__name__)
+
+    async def test_dashboard_under_asgi(self):
+        url = reverse('dashboard', args=[self.section.id])
+        response = await self.async_client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['group_data']), 5)
+        self.assertContains(response, 'Group 5')
+        again = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    async def test_other_teachers_section_is_404(self):
+        other = await User.objects.acreate(username='other')
+        section = await Section.objects.acreate(name='Theirs', teacher=other)
+        response = await self.async_client.get(reverse('dashboard', args=[section.id]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_section_list_under_asgi(self):
+        response = await self.async_client.get(reverse('section_list'))
+        self.assertContains(response, 'BSCS-2A')
+        self.assertEqual(response.context['sections'][0].student_count, 30)
+
+    async def test_trigger_generation_under_asgi(self):
+        response = await self.async_client.post(
+            reverse('generate_groups', args=[self.section.id]),
+            {'group_count': 3}, headers={'Accept': 'application/json'},
+        )
+        self.assertEqual(response.status_code, 202)
+        job = await GenerationJob.objects.aget(id=response.json()['id'])
+        self.assertEqual((job.section_id, job.k_value), (self.section.id, 3))
+
+
+class DashboardCachingTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        self.students = make_students(self.section, 12)
+        generate_groups(self.section, 3)
+        self.url = reverse('dashboard', args=[self.section.id])
+        self.client.force_login(self.teacher)
+        cache.clear()
+
+    def get(self, etag=None):
+        return self.client.get(self.url, headers={'if-none-match': etag} if etag else {})
+
+    def assert_write_changes_etag(self, write):
+        etag = self.get()['ETag']
+        write()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_section_is_answered_with_304_without_rendering(self):
+        etag = self.get()['ETag']
+        # session + user + section only: no groups, students or template
+        with self.assertNumQueries(3):
+            response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_every_write_bumps_the_version(self):
+        group_ids = list(Group.objects.filter(section=self.section).values_list('id', flat=True))
+        student = self.students[0]
+        writes = [
+            lambda: self.client.post(reverse('add_student', args=[self.section.id]), {
+                'name': 'New', 'coding': 1, 'design': 2, 'writing': 3, 'presenting': 4}),
+            lambda: self.client.post(reverse('move_student', args=[self.section.id, student.id]), {
+                'new_group_id': next(g for g in group_ids if g != Student.objects.get(id=student.id).assigned_group_id)}),
+            lambda: self.client.post(reverse('delete_students', args=[self.section.id]), {
+                'student_ids': [self.students[1].id]}),
+            lambda: import_roster(self.section, StringIO("name,coding,design,writing,presenting\nZed,1,1,1,1\n")),
+            lambda: (self.client.post(reverse('generate_groups', args=[self.section.id]), {'group_count': 2}),
+                     jobs.run_queued()),
+            lambda: self.client.post(reverse('clear_data', args=[self.section.id])),
+        ]
+        for write in writes:
+            self.assert_write_changes_etag(write)
+        self.assertEqual(Section.objects.get(id=self.section.id).version, 1 + len(writes))
+
+    def test_job_banner_and_messages_are_never_cached(self):
+        self.assertNotIn('ETag', self.client.get(self.url + '?job=1'))
+        self.client.post(reverse('import_students', args=[self.section.id]))  # flashes an error
+        self.assertNotIn('ETag', self.get())
+
+    def test_group_cards_are_cached_per_version(self):
+        response = self.get()
+        section = Section.objects.get(id=self.section.id)
+        keys = [make_template_fragment_key('group_card', [g.id, section.version, response.context['csrf_key']])
+                for g in Group.objects.filter(section=section)]
+        self.assertTrue(all(cache.get(key) for key in keys))
+
+        # A cached card is served as is; a new version renders fresh ones
+        cache.set(keys[0], '<div>CACHED CARD</div>')
+        self.assertContains(self.get(), 'CACHED CARD')
+        section.bump_version()
+        self.assertNotContains(self.get(), 'CACHED CARD')
+
+
+class DashboardApiTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        make_students(self.section, 20)
+        generate_groups(self.section, 4)
+        self.groups = list(Group.objects.filter(section=self.section).order_by('id'))
+        self.client.force_login(self.teacher)
+
+    def move(self, student, group, **kwargs):
+        return self.client.post(reverse('api_move_student', args=[self.section.id, student.id]),
+                                {'new_group_id': group.id}, **kwargs)
+
+    def test_groups_endpoint_matches_the_dashboard(self):
+        data = self.client.get(reverse('api_groups', args=[self.section.id])).json()
+        cache.clear()
+        items = self.client.get(reverse('dashboard', args=[self.section.id])).context['group_data']
+
+        self.assertEqual(data['section'], self.section.id)
+        self.assertEqual([g['id'] for g in data['groups']], [item['group'].id for item in items])
+        for group, item in zip(data['groups'], items):
+            self.assertEqual(group['skill_values'], item['skill_values'])
+            self.assertEqual(group['weakness'], item['weakness'])
+            self.assertEqual(group['is_unbalanced'], item['is_unbalanced'])
+            self.assertAlmostEqual(group['compatibility'], item['compatibility_score'], places=2)
+
+    def test_move_returns_only_the_two_changed_groups(self):
+        student = Student.objects.filter(assigned_group=self.groups[0]).first()
+        data = self.move(student, self.groups[2]).json()
+
+        self.assertEqual(data['student'], {'id': student.id, 'group_id': self.groups[2].id,
+                                           'group_name': self.groups[2].name})
+        self.assertEqual([g['id'] for g in data['groups']], [self.groups[0].id, self.groups[2].id])
+        for group in data['groups']:
+            members = Student.objects.filter(assigned_group_id=group['id'])
+            self.assertEqual(group['count'], members.count())
+            self.assertEqual(group['power'], sum(s.coding + s.design + s.writing + s.presenting for s in members))
+        self.assertEqual(data['version'], Section.objects.get(id=self.section.id).version)
+        self.assertEqual(stats.verify(), [])
+
+    def test_move_cost_does_not_grow_with_the_section(self):
+        counts = []
+        for extra in (0, 400):
+            make_students(self.section, extra)
+            student = Student.objects.filter(assigned_group=self.groups[1]).first()
+            with CaptureQueriesContext(connection) as ctx:
+                self.move(student, self.groups[3])
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bad_requests(self):
+        student = Student.objects.first()
+        url = reverse('api_move_student', args=[self.section.id, student.id])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(url, {}).status_code, 400)
+
+        foreign = Section.objects.create(name='Other', teacher=User.objects.create_user('other'))
+        foreign_group = Group.objects.create(section=foreign, name='Group 1')
+        self.assertEqual(self.move(student, foreign_group).status_code, 404)
+
+
+class BatchMutationTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        make_students(self.section, 30)
+        generate_groups(self.section, 3)
+        self.groups = list(Group.objects.filter(section=self.section).order_by('id'))
+        self.students = list(Student.objects.filter(section=self.section).order_by('id'))
+        self.client.force_login(self.teacher)
+
+    def post(self, payload):
+        return self.client.post(reverse('api_batch', args=[self.section.id]),
+                                json.dumps(payload), content_type='application/json')
+
+    def test_moves_and_edits_in_one_request(self):
+        moved = self.students[:10]
+        payload = {
+            'moves': [{'student': s.id, 'group': self.groups[2].id} for s in moved],
+            'edits': [{'student': moved[0].id, 'coding': 5, 'design': 1},
+                      {'student': self.students[20].id, 'presenting': 2}],
+        }
+        response = self.post(payload)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['moved'], data['edited']), (10, 2))
+        self.assertTrue(all(s.assigned_group_id == self.groups[2].id
+                            for s in Student.objects.filter(id__in=[s.id for s in moved])))
+        first = Student.objects.get(id=moved[0].id)
+        self.assertEqual((first.coding, first.design, first.writing), (5, 1, moved[0].writing))
+        self.assertEqual(Student.objects.get(id=self.students[20].id).presenting, 2)
+        self.assertEqual(stats.verify(), [])
+        self.assertEqual({g['id'] for g in data['groups']} - {g.id for g in self.groups}, set())
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        counts = []
+        for size in (2, 30):
+            payload = {'moves': [{'student': s.id, 'group': self.groups[size % 3].id} for s in self.students[:size]],
+                       'edits': [{'student': s.id, 'writing': 3} for s in self.students[:size]]}
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.post(payload).status_code, 200)
+            # One stats UPDATE per affected group (at most 3 here), everything else is fixed
+            stat_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "grouping_groupstats"')]
+            self.assertLessEqual(len(stat_updates), 3)
+            counts.append(len(ctx.captured_queries) - len(stat_updates))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_one_bad_entry_rejects_the_whole_batch(self):
+        foreign = Section.objects.create(name='Other', teacher=User.objects.create_user('other'))
+        outsider = Student.objects.create(section=foreign, name='Out', coding=1, design=1, writing=1, presenting=1)
+        before = list(Student.objects.order_by('id').values_list('assigned_group_id', 'coding'))
+
+        for payload in (
+            {'moves': [{'student': self.students[0].id, 'group': self.groups[1].id},
+                       {'student': outsider.id, 'group': self.groups[1].id}]},
+            {'edits': [{'student': self.students[0].id, 'coding': 9}]},
+            {'edits': [{'student': self.students[0].id, 'name': 'X'}]},
+            {'moves': [{'student': self.students[0].id, 'group': 10 ** 6}]},
+            {'moves': 'all of them'},
+        ):
+            response = self.post(payload)
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertTrue(response.json()['errors'])
+        self.assertEqual(self.client.post(reverse('api_batch', args=[self.section.id]), 'nope',
+                                          content_type='application/json').status_code, 400)
+        self.assertEqual(list(Student.objects.order_by('id').values_list('assigned_group_id', 'coding')), before)
+
+
+class SectionListTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.client.force_login(self.teacher)
+
+    def make_sections(self, count):
+        return [Section.objects.create(name=f'S{i}', teacher=self.teacher) for i in range(count)]
+
+    def test_counts_and_average_power_are_annotated(self):
+        full, empty = self.make_sections(2)
+        students = make_students(full, 9)
+        generate_groups(full, 3)
+        Section.objects.create(name='Not mine', teacher=User.objects.create_user('other'))
+
+        response = self.client.get(reverse('section_list'))
+        sections = {s.name: s for s in response.context['sections']}
+        self.assertEqual(set(sections), {'S0', 'S1'})
+        self.assertEqual((sections['S0'].student_count, sections['S0'].group_count), (9, 3))
+        self.assertAlmostEqual(sections['S0'].avg_power,
+                               statistics.mean(s.coding + s.design + s.writing + s.presenting for s in students))
+        self.assertEqual((sections['S1'].student_count, sections['S1'].group_count), (0, 0))
+        self.assertIsNone(sections['S1'].avg_power)
+        self.assertContains(response, '9 Students')
+
+    def test_keyset_pages_cover_every_section_once(self):
+        sections = self.make_sections(views.SECTIONS_PER_PAGE * 2 + 3)
+        seen = []
+        url = reverse('section_list')
+        while url:
+            response = self.client.get(url)
+            seen += [s.id for s in response.context['sections']]
+            cursor = response.context['next_cursor']
+            url = f"{reverse('section_list')}?after={quote(cursor)}" if cursor else None
+        self.assertEqual(seen, [s.id for s in sections])
+
+    def test_query_count_does_not_grow_with_sections(self):
+        counts = []
+        for total in (3, 60):
+            self.make_sections(total)
+            for section in Section.objects.filter(teacher=self.teacher)[:3]:
+                make_students(section, 5)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse('section_list'))
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bad_cursor_shows_the_first_page(self):
+        self.make_sections(2)
+        response = self.client.get(reverse('section_list') + '?after=garbage')
+        self.assertEqual(len(response.context['sections']), 2)
+
+
+class GroupStatsTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        make_students(self.section, 40)
+        generate_groups(self.section, 4)
+        self.groups = Group.objects.filter(section=self.section)
+        self.client.force_login(self.teacher)
+
+    def test_generation_creates_correct_stats(self):
+        self.assertEqual(stats.verify(self.groups), [])
+        for group in self.groups:
+            totals = [s.coding + s.design + s.writing + s.presenting for s in group.students.all()]
+            self.assertEqual(group.stats.count, len(totals))
+            self.assertAlmostEqual(group.stats.variance, statistics.variance(totals))
+
+    def test_move_and_delete_keep_stats_in_sync(self):
+        first, second = self.groups.order_by('id')[:2]
+        student = first.students.first()
+        self.client.post(reverse('move_student', args=[self.section.id, student.id]),
+                         {'new_group_id': second.id})
+        self.assertEqual(GroupStats.objects.get(group=first).count, 9)
+        self.assertEqual(GroupStats.objects.get(group=second).count, 11)
+
+        doomed = list(Student.objects.filter(section=self.section).values_list('id', flat=True)[:7])
+        self.client.post(reverse('delete_students', args=[self.section.id]), {'student_ids': doomed})
+        self.assertEqual(stats.verify(self.groups), [])
+
+    def test_management_command_detects_and_repairs_drift(self):
+        GroupStats.objects.filter(group__in=self.groups[:1]).update(coding=999)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_group_stats', '--check', stdout=StringIO())
+
+        call_command('rebuild_group_stats', stdout=StringIO())
+        self.assertEqual(stats.verify(self.groups), [])
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        self.client.force_login(self.teacher)
+
+    def test_upload_imports_valid_rows_and_reports_bad_ones(self):
+        csv_file = SimpleUploadedFile('roster.csv', (
+            "Name,Coding,Design,Writing,Presenting\n"
+            "Ada,5,3,2,1\n"
+            "Bob,6,3,2,1\n"
+            ",1,1,1,1\n"
+            "Cy,2,x,2,2\n"
+            "Dee,1,2,3,4\n"
+        ).encode(), content_type='text/csv')
+
+        response = self.client.post(reverse('import_students', args=[self.section.id]),
+                                    {'roster': csv_file}, follow=True)
+
+        names = set(Student.objects.filter(section=self.section).values_list('name', flat=True))
+        self.assertEqual(names, {'Ada', 'Dee'})
+        shown = [str(m) for m in response.context['messages']]
+        self.assertIn("Imported 2 student(s).", shown)
+        self.assertIn("Line 3: coding must be between 1 and 5 (got 6)", shown)
+        self.assertIn("Line 4: name is empty", shown)
+        self.assertIn("Line 5: design must be a whole number (got 'x')", shown)
+
+    def test_missing_columns_import_nothing(self):
+        with self.assertRaises(RosterError):
+            import_roster(self.section, ["name,coding,design\n", "Ada,1,2\n"])
+        self.assertFalse(Student.objects.exists())
+
+    def test_streams_large_files_in_chunks_with_capped_error_list(self):
+        def lines():
+            yield "name,coding,design,writing,presenting\n"
+            for i in range(5000):
+                skill = 9 if i % 50 == 0 else 1 + i % 5
+                yield f"Student {i},{skill},{skill},{skill},{skill}\n"
+
+        result = import_roster(self.section, lines(), chunk_size=700)
+
+        self.assertEqual(result.created, 4900)
+        self.assertEqual(result.error_count, 100)
+        self.assertEqual(len(result.errors), MAX_REPORTED_ERRORS)
+        self.assertEqual(Student.objects.filter(section=self.section).count(), 4900)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS 2A', teacher=self.teacher)
+        self.empty = Section.objects.create(name='Empty', teacher=self.teacher)
+        make_students(self.section, 9)
+        generate_groups(self.section, 3)
+        Student.objects.create(section=self.section, name='Late', coding=1, design=1, writing=1, presenting=1)
+        other = User.objects.create_user('other', password='pw')
+        make_students(Section.objects.create(name='Not mine', teacher=other), 4)
+        self.client.force_login(self.teacher)
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_section_csv(self):
+        response = self.client.get(reverse('export_section_csv', args=[self.section.id]))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="bscs-2a.csv"')
+
+        rows = list(csv.DictReader(self.read(response).splitlines()))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual({r['group'] for r in rows}, {'Group 1', 'Group 2', 'Group 3', ''})
+        late = next(r for r in rows if r['name'] == 'Late')
+        self.assertEqual((late['coding'], late['power']), ('1', '4'))
+
+    def test_teacher_wide_json(self):
+        data = json.loads(self.read(self.client.get(reverse('export_all_json'))))
+
+        self.assertEqual([s['name'] for s in data['sections']], ['BSCS 2A', 'Empty'])
+        section, empty = data['sections']
+        self.assertEqual([g['name'] for g in section['groups']], ['Group 1', 'Group 2', 'Group 3'])
+        self.assertEqual(len(section['students']), 10)
+        self.assertEqual(sum(1 for s in section['students'] if s['group'] is None), 1)
+        self.assertEqual((empty['groups'], empty['students']), ([], []))
+
+    def test_cannot_export_another_teachers_section(self):
+        other_section = Section.objects.get(name='Not mine')
+        response = self.client.get(reverse('export_section_json', args=[other_section.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class GenerationJobTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        make_students(self.section, 30)
+        self.client.force_login(self.teacher)
+
+    def post_generate(self, k_value):
+        return self.client.post(reverse('generate_groups', args=[self.section.id]), {'group_count': k_value})
+
+    def test_post_queues_a_job_and_returns_immediately(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.post_generate(3)
+
+        job = GenerationJob.objects.get()
+        self.assertRedirects(response, reverse('dashboard', args=[self.section.id]) + f"?job={job.id}")
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(job.status, GenerationJob.QUEUED)
+        self.assertFalse(Group.objects.filter(section=self.section).exists())
+
+        self.assertTrue(jobs.run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress), (GenerationJob.DONE, 100))
+        self.assertEqual(Group.objects.filter(section=self.section).count(), 3)
+
+        status = self.client.get(reverse('job_status', args=[self.section.id, job.id])).json()
+        self.assertEqual(status['status'], 'done')
+
+    def test_regeneration_swaps_in_the_new_groups(self):
+        generate_groups(self.section, 2)
+        old_ids = set(Group.objects.filter(section=self.section).values_list('id', flat=True))
+
+        self.post_generate(5)
+        jobs.run_queued()
+
+        groups = Group.objects.filter(section=self.section)
+        self.assertEqual(groups.count(), 5)
+        self.assertFalse(old_ids & set(groups.values_list('id', flat=True)))
+        self.assertFalse(Student.objects.filter(section=self.section, assigned_group=None).exists())
+        self.assertEqual(stats.verify(groups), [])
+
+    def test_only_one_active_job_per_section(self):
+        self.post_generate(3)
+        self.post_generate(4)
+        self.assertEqual(GenerationJob.objects.count(), 1)
+
+    def test_roster_change_during_planning_aborts_the_swap(self):
+        generate_groups(self.section, 2)
+        plan = plan_groups(self.section, 3)
+        Student.objects.create(section=self.section, name='Late', coding=1, design=1, writing=1, presenting=1)
+
+        with self.assertRaises(RosterChanged):
+            save_groups(self.section, plan, replace=True)
+        self.assertEqual(Group.objects.filter(section=self.section).count(), 2)
+
+    def test_failures_are_recorded(self):
+        job = GenerationJob.objects.create(section=self.section, k_value=0)
+        with self.assertLogs('grouping.jobs', level='ERROR'):
+            jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.FAILED)
+        self.assertIn('k_value', job.error)
+
+    def test_optimized_job_stores_the_objective(self):
+        self.client.post(reverse('generate_groups', args=[self.section.id]),
+                         {'group_count': 4, 'optimize': 'on', 'time_budget': '0.5'})
+        jobs.run_queued()
+
+        job = GenerationJob.objects.get()
+        self.assertTrue(job.optimize)
+        self.assertEqual(job.time_budget, 0.5)
+        report = job.result['optimization']
+        self.assertLessEqual(report['objective_after'], report['objective_before'])
+        self.assertEqual(Group.objects.filter(section=self.section).count(), 4)
+        self.assertEqual(stats.verify(Group.objects.filter(section=self.section)), [])
+        # The finished job's banner reports the objective (the dashboard redirects once it's done)
+        response = self.client.get(reverse('dashboard', args=[self.section.id]), {'job': job.id})
+        self.assertContains(response, f"objective {report['objective_before']} &rarr; {report['objective_after']}")
+
+    def test_non_finite_time_budget_is_rejected(self):
+        url = reverse('generate_groups', args=[self.section.id])
+        for budget in ('nan', 'inf', '-inf', 'soon'):
+            response = self.client.post(url, {'group_count': 4, 'optimize': 'on', 'time_budget': budget})
+            self.assertRedirects(response, reverse('dashboard', args=[self.section.id]), fetch_redirect_response=False)
+        response = self.client.post(url, {'group_count': 4, 'time_budget': 'nan'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GenerationJob.objects.exists())
+
+    def run_generation(self, k_value, **data):
+        self.client.post(reverse('generate_groups', args=[self.section.id]), {'group_count': k_value, **data})
+        jobs.run_queued()
+        return GenerationJob.objects.order_by('-id').first()
+
+    def members(self):
+        return list(Student.objects.order_by('id').values_list('assigned_group__name', flat=True))
+
+    def test_identical_inputs_reuse_the_stored_result(self):
+        first = self.run_generation(3)
+        self.assertFalse(first.result['reused'])
+        group_ids = list(Group.objects.filter(section=self.section).values_list('id', flat=True))
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.run_generation(3)
+        self.assertTrue(second.result['unchanged'])
+        self.assertEqual(second.result['fingerprint'], first.result['fingerprint'])
+        self.assertFalse([q for q in ctx.captured_queries if 'UPDATE "grouping_student"' in q['sql']])
+        self.assertEqual(list(Group.objects.filter(section=self.section).values_list('id', flat=True)), group_ids)
+        self.assertEqual(Generation.objects.count(), 1)
+
+    def test_manual_changes_are_undone_from_the_stored_assignment(self):
+        self.run_generation(3)
+        expected = self.members()
+        student = Student.objects.first()
+        other = Group.objects.filter(section=self.section).exclude(id=student.assigned_group_id).first()
+        self.client.post(reverse('move_student', args=[self.section.id, student.id]), {'new_group_id': other.id})
+
+        job = self.run_generation(3)
+        self.assertEqual((job.result['reused'], job.result['unchanged']), (True, False))
+        self.assertEqual(self.members(), expected)
+        self.assertEqual(stats.verify(), [])
+
+    def test_different_inputs_are_recomputed(self):
+        first = self.run_generation(3)
+        weighted = self.run_generation(3, weight_c=4)
+        Student.objects.filter(id=Student.objects.order_by('id').first().id).update(coding=5)
+        edited = self.run_generation(3)
+        fingerprints = {first.result['fingerprint'], weighted.result['fingerprint'], edited.result['fingerprint']}
+        self.assertEqual(len(fingerprints), 3)
+        self.assertFalse(weighted.result['reused'] or edited.result['reused'])
+
+        stored = Generation.objects.get(id=edited.result['generation'])
+        self.assertEqual(stored.student_count, 30)
+        self.assertEqual(sorted(sid for sid, _ in stored.assignment),
+                         list(Student.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_fingerprint_ignores_equivalent_parameters(self):
+        matrix = SectionMatrix.load(self.section)
+        self.assertEqual(fingerprint(matrix, 3), fingerprint(matrix, 3, {'c': 1, 'd': 1, 'w': 1, 'p': 1}))
+        self.assertNotEqual(fingerprint(matrix, 3), fingerprint(matrix, 4))
+        self.assertNotEqual(fingerprint(matrix, 3), fingerprint(matrix, 3, optimize=True))
+        self.assertEqual(fingerprint(matrix, 3), fingerprint(matrix, 3, scoring='power'))
+        self.assertNotEqual(fingerprint(matrix, 3), fingerprint(matrix, 3, scoring='diversity'))
+        with self.assertRaises(ValueError):
+            fingerprint(matrix, 3, scoring='vibes')
+
+    def test_diversity_scoring_from_the_form(self):
+        power_job = self.run_generation(3)
+        job = self.run_generation(3, scoring='diversity')
+        self.assertEqual((job.status, job.scoring), (GenerationJob.DONE, 'diversity'))
+        self.assertNotEqual(job.result['fingerprint'], power_job.result['fingerprint'])
+
+        stored = Generation.objects.get(id=job.result['generation'])
+        self.assertEqual(stored.scoring, 'diversity')
+        matrix = SectionMatrix.load(self.section)
+        expected = plan_matrix(matrix, 3, scoring='diversity')
+        self.assertEqual(stored.assignment, [[sid, idx] for sid, idx in zip(expected.student_ids, expected.assignment)])
+
+        # Same inputs again: reused, and still a diversity plan
+        again = self.run_generation(3, scoring='diversity')
+        self.assertTrue(again.result['unchanged'])
+        self.assertEqual(Generation.objects.get(id=again.result['generation']).scoring, 'diversity')
+        # Unknown modes fall back to the default
+        self.assertEqual(self.run_generation(2, scoring='vibes').scoring, 'power')
+
+    def test_overridden_scoring_is_recorded_and_shown(self):
+        student_ids = list(Student.objects.order_by('id').values_list('id', flat=True))
+        save_rules(self.section, Rules(apart=[(student_ids[0], student_ids[1])]))
+        job = self.run_generation(3, scoring='diversity')
+
+        self.assertEqual(job.result['scoring'], 'power')
+        self.assertEqual(Generation.objects.get(id=job.result['generation']).scoring, 'power')
+        response = self.client.get(reverse('dashboard', args=[self.section.id]), {'job': job.id})
+        self.assertContains(response, 'Groups generated.')
+        self.assertContains(response, 'diversity scoring was not used')
+
+    def stale_job(self):
+        started = timezone.now() - timedelta(seconds=jobs.STALE_AFTER + 60)
+        job = GenerationJob.objects.create(section=self.section, k_value=3, status=GenerationJob.RUNNING,
+                                           progress=40, started_at=started)
+        GenerationJob.objects.filter(id=job.id).update(created_at=started)
+        return job
+
+    def test_stale_running_job_does_not_block_the_section(self):
+        fresh = GenerationJob.objects.create(section=self.section, k_value=3, status=GenerationJob.RUNNING,
+                                             started_at=timezone.now())
+        self.assertEqual(jobs.enqueue(self.section, 3), fresh)
+        fresh.delete()
+
+        stuck = self.stale_job()
+        job = jobs.enqueue(self.section, 3)
+        self.assertNotEqual(job, stuck)
+        stuck.refresh_from_db()
+        self.assertEqual(stuck.status, GenerationJob.FAILED)
+        self.assertIn('stopped responding', stuck.error)
+
+    def test_drain_command_reruns_stale_jobs(self):
+        stuck = self.stale_job()
+        out = StringIO()
+        call_command('run_generation_jobs', stdout=out)
+        self.assertIn('Requeued 1 stale', out.getvalue())
+        stuck.refresh_from_db()
+        self.assertEqual(stuck.status, GenerationJob.DONE)
+        self.assertEqual(Group.objects.filter(section=self.section).count(), 3)
+
+    def test_batch_does_not_treat_a_stale_job_as_busy(self):
+        self.stale_job()
+        result = batch.regenerate_all(Section.objects.all(), 3, workers=1)
+        self.assertEqual((result.regenerated, result.busy), ([self.section.id], []))
+
+    def test_status_is_private_to_the_teacher(self):
+        job = GenerationJob.objects.create(section=self.section, k_value=2)
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        response = self.client.get(reverse('job_status', args=[self.section.id, job.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchRegenerationTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.sections = [Section.objects.create(name=f'BSCS-{i}', teacher=self.teacher) for i in range(4)]
+        for i, section in enumerate(self.sections):
+            make_students(section, 10 + 7 * i)
+        generate_groups(self.sections[0], 2)
+
+    def expected(self, section, k_value):
+        plan = plan_groups(section, k_value)
+        return sorted(zip(plan.student_ids, plan.assignment))
+
+    def actual(self, section):
+        groups = list(Group.objects.filter(section=section).order_by('id').values_list('id', flat=True))
+        index = {gid: i for i, gid in enumerate(groups)}
+        return sorted((sid, index[gid]) for sid, gid in
+                      Student.objects.filter(section=section).values_list('id', 'assigned_group_id'))
+
+    def assert_regenerated(self, k_value):
+        for section in self.sections:
+            self.assertEqual(Group.objects.filter(section=section).count(), k_value)
+            self.assertEqual(self.actual(section), self.expected(section, k_value))
+        self.assertEqual(stats.verify(), [])
+
+    def test_matches_one_section_at_a_time(self):
+        result = batch.regenerate_all(Section.objects.all(), 3, workers=1, batch_size=3)
+        self.assertEqual(result.regenerated, [s.id for s in self.sections])
+        self.assert_regenerated(3)
+        self.assertEqual([s.version for s in Section.objects.order_by('id')], [2, 1, 1, 1])
+        self.assertEqual(Generation.objects.filter(section__in=self.sections).count(), 5)
+
+    def test_worker_processes_give_the_same_groups(self):
+        batch.regenerate_all(Section.objects.all(), 4, workers=2)
+        self.assert_regenerated(4)
+
+    def test_sections_with_a_running_job_are_left_alone(self):
+        busy = self.sections[0]
+        GenerationJob.objects.create(section=busy, k_value=5, status=GenerationJob.RUNNING)
+        result = batch.regenerate_all(Section.objects.all(), 3, workers=1)
+        self.assertEqual(result.busy, [busy.id])
+        self.assertEqual(Group.objects.filter(section=busy).count(), 2)
+
+    def test_changed_rosters_are_skipped(self):
+        sections = self.sections[:2]
+        matrices = batch.load_matrices([s.id for s in sections])
+        plans = batch.plan_all([(s.id, matrices[s.id], 3, None, None, None) for s in sections], 1)
+        Student.objects.create(section=sections[0], name='Late', coding=1, design=1, writing=1, presenting=1)
+
+        self.assertEqual(batch.save_batch(sections, plans), [sections[0].id])
+        self.assertEqual(Group.objects.filter(section=sections[0]).count(), 2)
+        self.assertEqual(Group.objects.filter(section=sections[1]).count(), 3)
+
+    def test_view_and_command(self):
+        other = User.objects.create_user('other', password='pw')
+        foreign = Section.objects.create(name='Other', teacher=other)
+        make_students(foreign, 5)
+
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('regenerate_all'), {'group_count': 3})
+        self.assertRedirects(response, reverse('section_list'))
+        # Queued as one background job per class, nothing planned in the request
+        self.assertEqual(GenerationJob.objects.filter(status=GenerationJob.QUEUED).count(), len(self.sections))
+        jobs.run_queued()
+        self.assertFalse(Group.objects.filter(section=foreign).exists())
+        self.assert_regenerated(3)
+
+        for bad in ('abc', '0'):
+            response = self.client.post(reverse('regenerate_all'), {'group_count': bad}, follow=True)
+            self.assertContains(response, "the number of groups must be a whole number")
+        self.assertFalse(GenerationJob.objects.filter(status=GenerationJob.QUEUED).exists())
+
+        out = StringIO()
+        call_command('regenerate_all', '2', '--teacher', 'other', '--workers', '1', stdout=out)
+        self.assertIn('Regenerated 1 section(s)', out.getvalue())
+        self.assertEqual(Group.objects.filter(section=foreign).count(), 2)
+
+
+class GroupingRulesTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        self.students = make_students(self.section, 24)
+        self.client.force_login(self.teacher)
+        self.url = reverse('api_constraints', args=[self.section.id])
+
+    def post(self, data):
+        return self.client.post(self.url, json.dumps(data), content_type='application/json')
+
+    def group_of(self):
+        return dict(Student.objects.filter(section=self.section).values_list('id', 'assigned_group_id'))
+
+    def test_rules_from_the_api_are_enforced(self):
+        s = [student.id for student in self.students]
+        response = self.post({'together': [[s[0], s[1]], [s[1], s[2]]], 'apart': [[s[0], s[3]]],
+                              'min_group_size': 5, 'max_group_size': 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url).json()['together'], [[s[0], s[1]], [s[1], s[2]]])
+
+        plan = generate_groups(Section.objects.get(id=self.section.id), 4)
+
+        group = self.group_of()
+        self.assertEqual(len({group[s[0]], group[s[1]], group[s[2]]}), 1)
+        self.assertNotEqual(group[s[0]], group[s[3]])
+        self.assertTrue(all(5 <= size <= 7 for size in Counter(group.values()).values()))
+        self.assertEqual(plan.fingerprint, Generation.objects.get(section=self.section).fingerprint)
+        self.assertEqual(stats.verify(), [])
+
+    def test_changed_rules_are_not_served_from_a_stored_generation(self):
+        generate_groups(self.section, 4)
+        s = [student.id for student in self.students]
+        self.post({'apart': [[a, b] for a in s[:4] for b in s[:4] if a < b]})
+
+        jobs.enqueue(self.section, 4)
+        jobs.run_queued()
+
+        job = GenerationJob.objects.get()
+        self.assertEqual(job.status, GenerationJob.DONE)
+        self.assertFalse(job.result['reused'])
+        group = self.group_of()
+        self.assertEqual(len({group[sid] for sid in s[:4]}), 4)
+
+    def test_invalid_rules_are_rejected(self):
+        other = Section.objects.create(name='Other', teacher=self.teacher)
+        stranger = Student.objects.create(section=other, name='X', coding=1, design=1, writing=1, presenting=1)
+        s = [student.id for student in self.students]
+        for data, message in [
+            ({'together': [[s[0], stranger.id]]}, 'Not students of this class'),
+            ({'together': [[s[0], s[1]]], 'apart': [[s[1], s[0]]]}, 'same keep-together set'),
+            ({'max_group_size': 'big'}, 'positive integer'),
+        ]:
+            response = self.post(data)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(message, response.json()['errors'][0])
+        self.assertFalse(StudentConstraint.objects.exists())
+
+    def test_impossible_rules_fail_the_job(self):
+        self.post({'max_group_size': 4})
+        jobs.enqueue(self.section, 3)
+        jobs.run_queued()
+        job = GenerationJob.objects.get()
+        self.assertEqual(job.status, GenerationJob.FAILED)
+        self.assertIn("can't hold 24 students", job.error)
+
+    def test_batch_skips_sections_whose_rules_cant_be_met(self):
+        ok = Section.objects.create(name='BSCS-2B', teacher=self.teacher)
+        make_students(ok, 10)
+        self.post({'max_group_size': 4})
+
+        result = batch.regenerate_all(Section.objects.all(), 3, workers=1)
+
+        self.assertEqual(result.regenerated, [ok.id])
+        self.assertIn("can't hold 24 students", result.failed[self.section.id])
+        self.assertFalse(Group.objects.filter(section=self.section).exists())
+
+
+class PlacementTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        self.students = make_students(self.section, 20)
+        self.client.force_login(self.teacher)
+
+    def late_student(self, skills=(1, 1, 1, 1), section=None):
+        c, d, w, p = skills
+        return Student.objects.create(section=section or self.section, name='Late', coding=c, design=d,
+                                      writing=w, presenting=p)
+
+    def test_late_student_gets_the_group_a_regeneration_would_give(self):
+        generate_groups(self.section, 4)
+        late = self.late_student()  # weakest, highest id: sorted last by a full regeneration
+        before = dict(Student.objects.exclude(id=late.id).values_list('id', 'assigned_group_id'))
+
+        result = place_unassigned(self.section)
+
+        matrix = SectionMatrix.load(self.section)
+        order = strongest_first(matrix.skills)
+        expected = linear_engine(matrix.skills[order].tolist(), 4)[-1]
+        groups = list(Group.objects.filter(section=self.section).order_by('id').values_list('id', flat=True))
+        self.assertEqual(matrix.ids[order][-1], late.id)
+        self.assertEqual(result.placed, {late.id: groups[expected]})
+        self.assertEqual(result.group_ids, [groups[expected]])
+        # Nobody else moved, and the running totals followed
+        self.assertEqual(dict(Student.objects.exclude(id=late.id).values_list('id', 'assigned_group_id')), before)
+        self.assertEqual(stats.verify(), [])
+
+    def test_cost_does_not_depend_on_the_section_size(self):
+        big = Section.objects.create(name='Big', teacher=self.teacher)
+        make_students(big, 400)
+        counts = []
+        for section in (self.section, big):
+            generate_groups(section, 4)
+            self.late_student(section=section)
+            with CaptureQueriesContext(connection) as queries:
+                place_unassigned(section)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_rules_are_respected(self):
+        s = [student.id for student in self.students]
+        generate_groups(self.section, 4)
+        group = dict(Student.objects.values_list('id', 'assigned_group_id'))
+        friend, rival, loner = self.late_student(), self.late_student(), self.late_student()
+        save_rules(self.section, Rules(together=[(friend.id, s[0])], apart=[(rival.id, s[1]), (rival.id, s[2])]))
+
+        result = place_unassigned(self.section)
+
+        self.assertEqual(result.placed[friend.id], group[s[0]])
+        self.assertNotIn(result.placed[rival.id], {group[s[1]], group[s[2]]})
+        self.assertIn(loner.id, result.placed)
+
+        # Every group full (23 students: 6, 6, 6, 5): the student stays unassigned
+        self.section.max_group_size = 5
+        self.section.save()
+        late = self.late_student()
+        result = place_unassigned(self.section)
+        self.assertEqual((result.placed, result.unplaced), ({}, [late.id]))
+        self.assertIsNone(Student.objects.get(id=late.id).assigned_group_id)
+
+    def test_late_student_follows_diversity_scoring(self):
+        generate_groups(self.section, 4, scoring='diversity')
+        late = self.late_student((5, 1, 1, 5))
+
+        result = place_unassigned(self.section)
+
+        # The group whose distance from the class mean grows least with the newcomer
+        matrix = SectionMatrix.load(self.section)
+        mean = matrix.skills.mean(axis=0)
+        newcomer = matrix.skills[matrix.ids == late.id][0]
+        growth = {}
+        for group in Group.objects.filter(section=self.section).order_by('id'):
+            members = matrix.skills[(matrix.group_ids == group.id) & (matrix.ids != late.id)]
+            before = members.sum(axis=0) - len(members) * mean
+            after = before + newcomer - mean
+            growth[group.id] = float((after ** 2).sum() - (before ** 2).sum())
+        self.assertEqual(result.placed, {late.id: min(growth, key=growth.get)})
+        self.assertEqual(stats.verify(), [])
+
+    def test_groups_without_stats_are_rebuilt_first(self):
+        generate_groups(self.section, 4)
+        first = Group.objects.filter(section=self.section).order_by('id').first()
+        GroupStats.objects.filter(group=first).delete()
+        late = self.late_student()
+
+        result = place_unassigned(self.section)
+
+        self.assertIn(late.id, result.placed)
+        self.assertTrue(GroupStats.objects.filter(group=first).exists())
+        self.assertEqual(stats.verify(), [])
+
+    def test_add_student_can_auto_place(self):
+        generate_groups(self.section, 4)
+        data = {'name': 'Late', 'coding': 3, 'design': 3, 'writing': 3, 'presenting': 3}
+
+        self.client.post(reverse('add_student', args=[self.section.id]), data)
+        self.assertIsNone(Student.objects.get(name='Late').assigned_group_id)
+
+        self.client.post(reverse('add_student', args=[self.section.id]), {**data, 'auto_place': 'on'})
+        self.assertEqual(Student.objects.filter(name='Late', assigned_group__isnull=False).count(), 1)
+        self.assertEqual(stats.verify(), [])
+
+    def test_place_endpoint(self):
+        url = reverse('place_students', args=[self.section.id])
+        # No groups yet: nobody can be placed
+        response = self.client.post(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['placed'], {})
+        self.assertEqual(len(response.json()['unplaced']), 20)
+
+        generate_groups(self.section, 4)
+        late = self.late_student()
+        version = Section.objects.get(id=self.section.id).version
+        response = self.client.post(url, HTTP_ACCEPT='application/json')
+        data = response.json()
+        group_id = Student.objects.get(id=late.id).assigned_group_id
+        self.assertEqual(data['placed'], {str(late.id): group_id})
+        self.assertEqual([g['id'] for g in data['groups']], [group_id])
+        self.assertEqual(data['version'], version + 1)
+
+        self.assertRedirects(self.client.post(url), reverse('dashboard', args=[self.section.id]),
+                             fetch_redirect_response=False)
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite's")
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw')
+        for i in range(3):
+            Section.objects.create(name=f'BSCS-{i}', teacher=self.teacher)
+        self.section = Section.objects.first()
+        make_students(self.section, 40)
+        generate_groups(self.section, 4)
+        self.client.force_login(self.teacher)
+
+    def plans(self, url):
+        """EXPLAIN QUERY PLAN of every SELECT the page runs, keyed by its SQL."""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if query['sql'].startswith('SELECT'):
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans[query['sql']] = ' | '.join(row[-1] for row in cursor.fetchall())
+        return plans
+
+    def plan_for(self, plans, table):
+        return next(plan for sql, plan in plans.items() if f'FROM "{table}"' in sql)
+
+    def test_dashboard_roster_is_read_in_name_order_from_the_index(self):
+        plans = self.plans(reverse('dashboard', args=[self.section.id]))
+        self.assertIn('student_section_name_idx', self.plan_for(plans, 'grouping_student'))
+        for sql, plan in plans.items():
+            self.assertNotIn('TEMP B-TREE', plan, sql)
+
+    def test_section_list_is_read_in_date_order_from_the_index(self):
+        plans = self.plans(reverse('section_list'))
+        self.assertIn('section_teacher_created_idx', self.plan_for(plans, 'grouping_section'))
+        for sql, plan in plans.items():
+            self.assertNotIn('TEMP B-TREE', plan, sql)
+
+    def test_group_members_use_the_section_group_index(self):
+        qs = Student.objects.filter(section=self.section, assigned_group=None)
+        self.assertIn('student_section_group_idx', qs.explain())
+
+
+@skipUnless(connection.vendor == 'sqlite', "SQLite connection settings")
+class SqliteConcurrencyTests(TestCase):
+    def test_connections_are_tuned_for_concurrent_writers(self):
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        self.assertGreater(connection.settings_dict['CONN_MAX_AGE'], 0)
+
+    def test_tuned_settings_keep_every_write_under_load(self):
+        stock, tuned = concurrency.run(writers=4, readers=2, ops=20, groups=5)
+
+        # Stock settings give up with "database is locked"; the tuned ones wait their turn
+        self.assertEqual(tuned['locked'], 0)
+        self.assertEqual(tuned['writes'], tuned['attempted_writes'])
+        self.assertGreater(tuned['writes_per_s'], stock['writes_per_s'])
+        # One connection per thread instead of one per request
+        self.assertEqual(tuned['connections'], 6)
+        self.assertGreater(stock['connections'], 6)
+
+
+@override_settings(GROUPING_PROFILING=True)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', password='pw', is_staff=True)
+        self.section = Section.objects.create(name='BSCS-2A', teacher=self.teacher)
+        make_students(self.section, 20)
+        self.client.force_login(self.teacher)
+        profiling.reset()
+
+    def test_server_timing_header_lists_the_dashboard_phases(self):
+        generate_groups(self.section, 4)
+        response = self.client.get(reverse('dashboard', args=[self.section.id]))
+
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+        for name in ('groups', 'roster', 'render'):
+            self.assertIn(f'desc="{name} (', timing)
+
+    def test_generation_phases_and_stats_endpoint(self):
+        generate_groups(self.section, 4)
+        data = self.client.get(reverse('profiling_stats')).json()['stats']
+
+        for name in ('load', 'sort', 'assign', 'persist'):
+            self.assertEqual(data[f'phase:{name}']['count'], 1, name)
+        self.assertGreaterEqual(data['phase:persist']['queries'], 4)
+        self.assertEqual(data['phase:sort']['queries'], 0)
+
+        self.client.post(reverse('profiling_stats'))
+        self.assertEqual(set(self.client.get(reverse('profiling_stats')).json()['stats']), {'view:profiling_stats'})
+
+    def test_stats_are_staff_only(self):
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.client.get(reverse('profiling_stats')).status_code, 404)
+
+    @override_settings(GROUPING_PROFILING=False)
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('section_list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.client.get(reverse('profiling_stats')).status_code, 404)
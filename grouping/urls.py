@@ -8,13 +8,30 @@ urlpatterns = [
     # Home / Section List
     path('', views.section_list, name='section_list'),
     path('add-section/', views.add_section, name='add_section'),
+    path('regenerate/', views.regenerate_all, name='regenerate_all'),
+    path('export.csv', views.export_all, {'fmt': 'csv'}, name='export_all_csv'),
+    path('export.json', views.export_all, {'fmt': 'json'}, name='export_all_json'),
 
     # Dashboard & Logic (Everything is now locked to a section_id)
     path('section/<int:section_id>/', views.dashboard, name='dashboard'),
     path('section/<int:section_id>/generate/', views.trigger_generation, name='generate_groups'),
+    path('section/<int:section_id>/jobs/<int:job_id>/', views.job_status, name='job_status'),
     path('section/<int:section_id>/add-student/', views.add_student, name='add_student'),
+    path('section/<int:section_id>/place/', views.place_students, name='place_students'),
+    path('section/<int:section_id>/import/', views.import_students, name='import_students'),
+    path('section/<int:section_id>/export.csv', views.export_section, {'fmt': 'csv'}, name='export_section_csv'),
+    path('section/<int:section_id>/export.json', views.export_section, {'fmt': 'json'}, name='export_section_json'),
     path('section/<int:section_id>/clear/', views.clear_data, name='clear_data'),
     path('section/<int:section_id>/move/<int:student_id>/', views.move_student, name='move_student'),
     path('section/<int:section_id>/delete/', views.delete_students, name='delete_students'),
+
+    # JSON API (in-place dashboard updates)
+    path('section/<int:section_id>/api/groups/', views.api_groups, name='api_groups'),
+    path('section/<int:section_id>/api/move/<int:student_id>/', views.api_move_student, name='api_move_student'),
+    path('section/<int:section_id>/api/batch/', views.api_batch, name='api_batch'),
+    path('section/<int:section_id>/api/constraints/', views.api_constraints, name='api_constraints'),
     path('delete_section/<int:section_id>/', views.delete_section, name='delete_section'),
+
+    # Timings (only with GROUPING_PROFILING)
+    path('profiling/', views.profiling_stats, name='profiling_stats'),
 ]
\ No newline at end of file
@@ -1,20 +1,143 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Sum
+import hashlib
+import io
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
+from django.utils.text import slugify
+from django.contrib import messages
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.contrib.auth import login
-from .models import Group, Student, Section
-from .services import generate_groups
-from .forms import StudentForm, SectionForm, TeacherSignUpForm  
-import statistics
+from .models import GenerationJob, Group, Student, Section
+from . import jobs
+from .skillmatrix import SectionMatrix, group_outliers, power
+from . import stats
+from .forms import StudentForm, SectionForm, TeacherSignUpForm, RosterImportForm
+from .roster import RosterError, import_roster
+from .exports import csv_rows, json_chunks
+from .mutations import BatchError, apply_batch, parse_batch
+from .constraints import ConstraintError, Rules
+from .engines import SCORING_MODES
+from .services import save_rules
+from .placement import place_unassigned
+from . import profiling
+from .profiling import phase
 
  
 
+SECTIONS_PER_PAGE = 24
+
+# dashboard, section_list and trigger_generation are async views: under ASGI their
+# queries go through the async ORM and don't hold a worker thread while waiting.
+# Their CPU-bound parts (the numpy pass, template rendering) run in this small pool
+# instead of on the event loop; at most ASYNC_CPU_WORKERS of them at once.
+_cpu_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ASYNC_CPU_WORKERS', 4),
+    thread_name_prefix='views-cpu',
+)
+
+def _cpu_bound(fn):
+    """fn as a coroutine function that runs in the bounded CPU pool (fn must not query the DB)."""
+    return sync_to_async(fn, thread_sensitive=False, executor=_cpu_executor)
+
+def _with_roster_stats(sections):
+    """
+    Annotates student_count, group_count and avg_power with correlated
+    subqueries, so the whole page is still one query and the counts are
+    not multiplied by a students x groups join.
+    """
+    students = Student.objects.filter(section=OuterRef('pk')).order_by().values('section')
+    groups = Group.objects.filter(section=OuterRef('pk')).order_by().values('section')
+    skill_sum = F('coding') + F('design') + F('writing') + F('presenting')
+    return sections.annotate(
+        student_count=Coalesce(Subquery(students.annotate(n=Count('id')).values('n')), 0),
+        group_count=Coalesce(Subquery(groups.annotate(n=Count('id')).values('n')), 0),
+        avg_power=Subquery(students.annotate(avg=Avg(skill_sum)).values('avg'),
+                           output_field=FloatField()),
+    )
+
+def _parse_cursor(value):
+    """'<created_at isoformat>|<id>' -> (datetime, id), or None if missing/invalid."""
+    try:
+        created_at, section_id = value.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(section_id)
+    except (AttributeError, ValueError):
+        return None
+
 @login_required
-def section_list(request):
+async def section_list(request):
     """Shows the list of classes created by the logged-in teacher."""
-    sections = Section.objects.filter(teacher=request.user)
+    # Resolved once here, so nothing below (the template included) loads it synchronously
+    request.user = await request.auser()
+    # Keyset pagination: each page starts right after the (created_at, id) of the
+    # previous page's last class, so any page costs the same (no OFFSET scan).
+    # Walks the (teacher, created_at) index: no sort step.
+    sections = Section.objects.filter(teacher=request.user).order_by('created_at', 'id')
+    cursor = _parse_cursor(request.GET.get('after'))
+    if cursor:
+        created_at, section_id = cursor
+        sections = sections.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=section_id))
+
+    # One query: the page plus one extra row to know if there is a next page
+    page = [s async for s in _with_roster_stats(sections)[:SECTIONS_PER_PAGE + 1]]
+    next_cursor = None
+    if len(page) > SECTIONS_PER_PAGE:
+        page = page[:SECTIONS_PER_PAGE]
+        next_cursor = f"{page[-1].created_at.isoformat()}|{page[-1].id}"
+
     form = SectionForm()
-    return render(request, 'grouping/section_list.html', {'sections': sections, 'form': form})
+    # Small page, but it shows flash messages (which may live in the session): thread-sensitive
+    return await sync_to_async(render)(request, 'grouping/section_list.html', {
+        'sections': page,
+        'form': form,
+        'next_cursor': next_cursor,
+        'is_first_page': cursor is None,
+    })
+
+@login_required
+def regenerate_all(request):
+    """
+    Regenerates the groups of every section of the teacher in one go.
+    Each class is queued as an ordinary background job (jobs.py), so the request
+    returns at once and no worker processes are forked from the web server
+    (the multi-process pipeline in batch.py is for `manage.py regenerate_all`).
+    """
+    if request.method == "POST":
+        try:
+            k_value = int(request.POST.get('group_count', 2))
+            if k_value < 1:
+                raise ValueError
+        except ValueError:
+            messages.error(request, "Regeneration failed: the number of groups must be a whole number of at least 1.")
+            return redirect('section_list')
+
+        sections = list(Section.objects.filter(teacher=request.user).order_by('id'))
+        # A job whose worker died doesn't keep its section busy
+        jobs.recover_stale()
+        busy = set(GenerationJob.objects
+                   .filter(section__in=sections, status__in=[GenerationJob.QUEUED, GenerationJob.RUNNING])
+                   .values_list('section_id', flat=True))
+        queued = [section for section in sections if section.id not in busy]
+        for section in queued:
+            jobs.enqueue(section, k_value)
+
+        messages.success(request, f"Regenerating {len(queued)} class(es) into {k_value} groups in the background.")
+        if busy:
+            messages.warning(request, f"{len(busy)} class(es) were skipped: a generation is already running.")
+    return redirect('section_list')
 
 @login_required
 def add_section(request):
@@ -35,101 +158,211 @@ def delete_section(request, section_id):
 
 # --- DASHBOARD & GROUPING ---
 
-@login_required
-def dashboard(request, section_id):
-    # Ensure the teacher owns this section
-    section = get_object_or_404(Section, id=section_id, teacher=request.user)
-    
-    # Filter groups and students by SECTION
-    groups = Group.objects.filter(section=section).prefetch_related('students')
-    all_students = Student.objects.filter(section=section).order_by('name')
-    form = StudentForm()
+def _groups_with_stats(section, ids=None):
+    """The section's groups (or just `ids`) with their GroupStats joined in (one query)."""
+    queryset = Group.objects.filter(section=section).select_related('stats').order_by('id')
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    groups = list(queryset)
+    missing = [g.id for g in groups if not hasattr(g, 'stats')]
+    if missing:
+        # e.g. groups created through the admin: compute their stats once
+        stats.rebuild(Group.objects.filter(id__in=missing))
+        groups = list(queryset.all())
+    return groups
+
+async def _agroups_with_stats(section):
+    """Async version of _groups_with_stats (whole section)."""
+    queryset = Group.objects.filter(section=section).select_related('stats').order_by('id')
+    groups = [g async for g in queryset]
+    if not all(hasattr(g, 'stats') for g in groups):
+        groups = await sync_to_async(_groups_with_stats)(section)
+    return groups
+
+# A group whose members' powers spread more than this is flagged as unbalanced
+UNBALANCED_STDEV = 4.0
+
+def _is_unbalanced(group_stats):
+    return group_stats.count > 1 and group_stats.stdev > UNBALANCED_STDEV
+
+# Template fragment cache lifetime of one group card (keys include section.version)
+GROUP_CARD_CACHE_SECONDS = 600
+
+def _csrf_key(request):
+    """Short fingerprint of the browser's CSRF secret, which is baked into every cached form."""
+    get_token(request)
+    return hashlib.sha1(request.META.get('CSRF_COOKIE', '').encode()).hexdigest()[:12]
+
+def _dashboard_etag(request, section):
+    """
+    The page only changes with the section's version, so (version, CSRF
+    secret) identifies it. None when the page shows one-off content
+    (a job banner or flash messages) that must not be answered with a 304.
+    """
+    # (Messages first: this loads them, so rendering won't have to)
+    if len(messages.get_messages(request)) or 'job' in request.GET:
+        return None
+    return quote_etag(f"s{section.id}-v{section.version}-{_csrf_key(request)}")
+
+def _group_data(groups, all_students):
+    """
+    Everything the group cards show, built in memory from the groups (with
+    stats) and the roster. Pure CPU work: no queries.
+    """
+    groups_by_id = {g.id: g for g in groups}
+    members = {g.id: [] for g in groups}
+    for s in sorted(all_students, key=lambda s: s.id):
+        # Reuse the loaded groups instead of one lookup per `s.assigned_group`
+        s.assigned_group = groups_by_id.get(s.assigned_group_id)
+        if s.assigned_group_id in members:
+            members[s.assigned_group_id].append(s)
+
+    # Only unbalanced groups need their members' powers (for the outlier),
+    # found for all of them in one vectorized pass over the skill matrix.
+    unbalanced = {g.id for g in groups if _is_unbalanced(g.stats)}
+    outlier_names = {}
+    if unbalanced:
+        matrix = SectionMatrix.from_rows(
+            (s.id, s.assigned_group_id, s.coding, s.design, s.writing, s.presenting)
+            for gid in unbalanced for s in members[gid]
+        )
+        order = sorted(unbalanced)
+        outliers = group_outliers(power(matrix.skills), matrix.labels_for(order), len(order))
+        names = {s.id: s.name for s in all_students}
+        for gid, row in zip(order, outliers.tolist()):
+            outlier_names[gid] = names[int(matrix.ids[row])]
 
     group_data = []
     for group in groups:
-        students = group.students.all()
+        group_stats = group.stats
 
         # 1. Stats for Charts
-        stats = students.aggregate(c=Sum('coding'), d=Sum('design'), w=Sum('writing'), p=Sum('presenting'))
-        skill_values = [stats['c'] or 0, stats['d'] or 0, stats['w'] or 0, stats['p'] or 0]
-        
+        skill_values = group_stats.skill_values
+
         # --- NEW SMART LOGIC: WEAKNESS DETECTION ---
-        skill_labels = ['Coding', 'Design', 'Writing', 'Speaking']
-        weakness = None # Default to None
-        
-        # Only calculate if there are students
-        if sum(skill_values) > 0:
-            min_score = min(skill_values)
-            max_score = max(skill_values)
-            
-            # LOGIC FIX: If all skills are equal (e.g. 5,5,5,5), don't show a weakness
-            if min_score < max_score: 
-                # Pair the scores: [('Coding', 10), ('Design', 5)...]
-                zipped_skills = list(zip(skill_labels, skill_values))
-                
-                # Find the skill with the minimum score
-                min_skill = min(zipped_skills, key=lambda x: x[1])
-                
-                weakness = f"{min_skill[0]} ({min_skill[1]} pts)"
-        # -------------------------------------
+        # (Lowest skill total, precomputed from GroupStats)
+        weakness = group_stats.weakness
 
         # 2. Conflict Detection Logic
-        student_totals = [s.coding + s.design + s.writing + s.presenting for s in students]
         compatibility_score = 0
         is_unbalanced = False
         suggestion = None
 
-        if len(student_totals) > 1:
-            compatibility_score = statistics.stdev(student_totals)
-            if compatibility_score > 4.0:
+        if group_stats.count > 1:
+            compatibility_score = group_stats.stdev
+            if group.id in unbalanced:
                 is_unbalanced = True
-                avg_skill = statistics.mean(student_totals)
-                outlier = max(students, key=lambda s: abs((s.coding+s.design+s.writing+s.presenting) - avg_skill))
-                suggestion = f"Try moving {outlier.name}"
+                suggestion = f"Try moving {outlier_names[group.id]}"
 
         group_data.append({
             'group': group,
+            'students': members[group.id],
             'skill_values': skill_values,
             'compatibility_score': compatibility_score,
             'is_unbalanced': is_unbalanced,
             'suggestion': suggestion,
             'weakness': weakness 
         })
-    
-    return render(request, 'grouping/dashboard.html', {
-        'section': section,
-        'group_data': group_data, 
-        'all_students': all_students,
-        'form': form  
-    })
+    return group_data
 
 @login_required
-def trigger_generation(request, section_id):
-    section = get_object_or_404(Section, id=section_id, teacher=request.user)
+async def dashboard(request, section_id):
+    # Resolved once here, so nothing below (the template included) loads it synchronously
+    request.user = await request.auser()
+    # Ensure the teacher owns this section
+    section = await aget_object_or_404(Section, id=section_id, teacher=request.user)
+
+    # Unchanged since the browser's copy? Answer 304 before any other query or rendering.
+    # (Flash messages may have to be read from the session: thread-sensitive)
+    etag = await sync_to_async(_dashboard_etag)(request, section)
+    if etag:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+    # Filter groups and students by SECTION
+    # Query 1: every group with its precomputed GroupStats (sums, size, variance).
+    with phase('groups'):
+        groups = await _agroups_with_stats(section)
+    # Query 2: the whole roster. Everything else is built from these two in memory.
+    with phase('roster'):
+        all_students = [s async for s in Student.objects.filter(section=section).order_by('name')]
+    form = StudentForm()
+
+    # Just queued a generation? Show its progress (only then costs a query).
+    job = None
+    if request.GET.get('job', '').isdigit():
+        job = await GenerationJob.objects.filter(id=request.GET['job'], section=section).afirst()
+
+    group_data = await _cpu_bound(_group_data)(groups, all_students)
+
+    with phase('render'):
+        response = await _cpu_bound(render)(request, 'grouping/dashboard.html', {
+            'section': section,
+            'group_data': group_data, 
+            'all_students': all_students,
+            'form': form,
+            'import_form': RosterImportForm(),
+            'job': job,
+            'group_options': [[g.id, g.name] for g in groups],
+            'csrf_key': _csrf_key(request),
+            'card_cache_seconds': GROUP_CARD_CACHE_SECONDS,
+        })
+    if etag:
+        response['ETag'] = etag
+        # Browsers must revalidate every time (cheap: usually a 304)
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@login_required
+async def trigger_generation(request, section_id):
+    section = await aget_object_or_404(Section, id=section_id, teacher=await request.auser())
     if request.method == "POST":
-        k_value = int(request.POST.get('group_count', 2))
-        weights = {
-            'c': int(request.POST.get('weight_c', 1)),
-            'd': int(request.POST.get('weight_d', 1)),
-            'w': int(request.POST.get('weight_w', 1)),
-            'p': int(request.POST.get('weight_p', 1)),
-        }
-        
-        # --- NEW LOGIC: FORCE RESET ---
-        # 1. Check if we already have groups.
-        existing_groups = Group.objects.filter(section=section)
-        
-        # 2. If the user is asking for a DIFFERENT number of groups (e.g., has 2, asks for 3)
-        #    OR if they clicked the button (implying they want a re-do),
-        #    we delete the old ones first.
-        if existing_groups.exists():
-            existing_groups.delete()  # <--- Force Delete old groups
-            
-        # 3. Now call the service (The Safety Check in services.py won't block us because we deleted them)
-        generate_groups(section, k_value, weights)
-        
+        try:
+            k_value = int(request.POST.get('group_count', 2))
+            weights = {
+                'c': int(request.POST.get('weight_c', 1)),
+                'd': int(request.POST.get('weight_d', 1)),
+                'w': int(request.POST.get('weight_w', 1)),
+                'p': int(request.POST.get('weight_p', 1)),
+            }
+            # Optional local-search pass, with a bounded runtime (0.1s - 10s).
+            # float() takes 'nan' and 'inf': clamping can't fix those, so they are refused too
+            time_budget = float(request.POST.get('time_budget', 1) or 1)
+            if not math.isfinite(time_budget):
+                raise ValueError(time_budget)
+        except ValueError:
+            error = "Generation failed: the group count, weights and time budget must be numbers."
+            if 'application/json' in request.headers.get('Accept', ''):
+                return JsonResponse({'error': error}, status=400)
+            messages.error(request, error)
+            return redirect('dashboard', section_id=section_id)
+        optimize = request.POST.get('optimize') == 'on'
+        time_budget = min(max(time_budget, 0.1), 10.0)
+        # 'power' (default) or 'diversity': balance all four skills per group
+        scoring = request.POST.get('scoring')
+        if scoring not in SCORING_MODES:
+            scoring = None
+
+        # --- NEW LOGIC: BACKGROUND JOB ---
+        # Generation runs in a worker; the old groups are swapped for the new ones
+        # in one transaction when it finishes, so this request returns right away.
+        # (enqueue is two short queries plus an on_commit hook: kept sync, run thread-sensitive;
+        # the planning itself runs in the jobs' own bounded pool, GENERATION_WORKERS)
+        job = await sync_to_async(jobs.enqueue)(section, k_value, weights,
+                                                optimize=optimize, time_budget=time_budget, scoring=scoring)
+        if 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse(job.as_dict(), status=202)
+        return redirect(f"{reverse('dashboard', args=[section_id])}?job={job.id}")
+
     return redirect('dashboard', section_id=section_id)
 
+@login_required
+def job_status(request, section_id, job_id):
+    """Progress of a generation job, polled by the dashboard."""
+    job = get_object_or_404(GenerationJob, id=job_id, section__id=section_id, section__teacher=request.user)
+    return JsonResponse(job.as_dict())
+
 @login_required
 def add_student(request, section_id):
     section = get_object_or_404(Section, id=section_id, teacher=request.user)
@@ -138,7 +371,63 @@ def add_student(request, section_id):
         if form.is_valid():
             student = form.save(commit=False)
             student.section = section
-            student.save()
+            with transaction.atomic():
+                student.save()
+                section.bump_version()
+            # "Auto-place": join the best existing group instead of waiting for a regeneration
+            if request.POST.get('auto_place') == 'on':
+                _report_placement(request, place_unassigned(section, student_ids=[student.id]))
+    return redirect('dashboard', section_id=section_id)
+
+def _report_placement(request, result):
+    if result.placed:
+        messages.success(request, f"Placed {len(result.placed)} student(s) into the existing groups.")
+    if result.unplaced:
+        messages.warning(request, f"{len(result.unplaced)} student(s) could not be placed "
+                                  "(no groups yet, or none the grouping rules allow).")
+
+@login_required
+@require_POST
+def place_students(request, section_id):
+    """
+    Puts every unassigned student into the existing groups, one at a time, without
+    regenerating (see placement.py). JSON callers get the placements and changed groups.
+    """
+    section = get_object_or_404(Section, id=section_id, teacher=request.user)
+    result = place_unassigned(section)
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({
+            'version': Section.objects.values_list('version', flat=True).get(id=section.id),
+            **result.as_dict(),
+            'groups': [_group_json(g) for g in _groups_with_stats(section, ids=result.group_ids)],
+        })
+    _report_placement(request, result)
+    return redirect('dashboard', section_id=section_id)
+
+@login_required
+def import_students(request, section_id):
+    """Bulk roster upload: one CSV file instead of one POST per student."""
+    section = get_object_or_404(Section, id=section_id, teacher=request.user)
+    if request.method == "POST":
+        form = RosterImportForm(request.POST, request.FILES)
+        if not form.is_valid():
+            messages.error(request, "Please choose a CSV file to import.")
+            return redirect('dashboard', section_id=section_id)
+
+        # Decode the upload lazily, line by line (large uploads stay on disk)
+        lines = io.TextIOWrapper(form.cleaned_data['roster'].file, encoding='utf-8-sig', newline='')
+        try:
+            result = import_roster(section, lines)
+        except RosterError as exc:
+            messages.error(request, f"Import failed: {exc}")
+            return redirect('dashboard', section_id=section_id)
+
+        messages.success(request, f"Imported {result.created} student(s).")
+        for line, error in result.errors:
+            messages.warning(request, f"Line {line}: {error}")
+        hidden = result.error_count - len(result.errors)
+        if hidden:
+            messages.warning(request, f"...and {hidden} more invalid row(s).")
     return redirect('dashboard', section_id=section_id)
 
 @login_required
@@ -146,10 +435,22 @@ def clear_data(request, section_id):
     section = get_object_or_404(Section, id=section_id, teacher=request.user)
     if request.method == "POST":
         # Only delete data for THIS section
-        Student.objects.filter(section=section).delete()
-        Group.objects.filter(section=section).delete()
+        with transaction.atomic():
+            Student.objects.filter(section=section).delete()
+            Group.objects.filter(section=section).delete()
+            section.bump_version()
     return redirect('dashboard', section_id=section_id)
 
+def _move(section, student, new_group):
+    """Moves one student: row update + two GroupStats deltas + version bump, in one transaction."""
+    old_group_id = student.assigned_group_id
+    with transaction.atomic():
+        student.assigned_group = new_group
+        student.save(update_fields=['assigned_group'])
+        stats.move_student(student, old_group_id, new_group.id)
+        section.bump_version()
+    return old_group_id
+
 @login_required
 def move_student(request, section_id, student_id):
     section = get_object_or_404(Section, id=section_id, teacher=request.user)
@@ -158,8 +459,7 @@ def move_student(request, section_id, student_id):
         new_group_id = request.POST.get('new_group_id')
         if new_group_id:
             new_group = get_object_or_404(Group, id=new_group_id, section=section)
-            student.assigned_group = new_group
-            student.save()
+            _move(section, student, new_group)
     return redirect('dashboard', section_id=section_id)
 
 @login_required
@@ -167,9 +467,148 @@ def delete_students(request, section_id):
     section = get_object_or_404(Section, id=section_id, teacher=request.user)
     if request.method == "POST":
         student_ids = request.POST.getlist('student_ids')
-        Student.objects.filter(id__in=student_ids, section=section).delete()
+        doomed = Student.objects.filter(id__in=student_ids, section=section)
+        with transaction.atomic():
+            stats.remove_students(doomed.values_list(
+                'assigned_group_id', 'coding', 'design', 'writing', 'presenting'))
+            doomed.delete()
+            section.bump_version()
     return redirect('dashboard', section_id=section_id)
 
+# --- JSON API ---
+# The dashboard updates itself in place from these instead of reloading the page.
+
+def _group_json(group):
+    """Compact numbers of one group, straight from its GroupStats row (no member scan)."""
+    group_stats = group.stats
+    return {
+        'id': group.id,
+        'name': group.name,
+        'count': group_stats.count,
+        'skill_values': group_stats.skill_values,
+        'power': group_stats.power,
+        'weakness': group_stats.weakness,
+        'compatibility': round(group_stats.stdev, 2),
+        'is_unbalanced': _is_unbalanced(group_stats),
+    }
+
+@login_required
+def api_groups(request, section_id):
+    """Every group's chart data, weakness and compatibility (one query for the groups)."""
+    section = get_object_or_404(Section, id=section_id, teacher=request.user)
+    return JsonResponse({
+        'section': section.id,
+        'version': section.version,
+        'groups': [_group_json(g) for g in _groups_with_stats(section)],
+    })
+
+@login_required
+@require_POST
+def api_move_student(request, section_id, student_id):
+    """
+    Moves a student and returns only what changed: the student and the two
+    affected groups. The cost is independent of the section size.
+    """
+    section = get_object_or_404(Section, id=section_id, teacher=request.user)
+    student = get_object_or_404(Student, id=student_id, section=section)
+    new_group_id = request.POST.get('new_group_id', '')
+    if not new_group_id.isdigit():
+        return JsonResponse({'error': "new_group_id is required."}, status=400)
+    new_group = get_object_or_404(Group, id=new_group_id, section=section)
+
+    old_group_id = _move(section, student, new_group)
+    changed = _groups_with_stats(section, ids=[old_group_id, new_group.id])
+    return JsonResponse({
+        'version': Section.objects.values_list('version', flat=True).get(id=section.id),
+        'student': {'id': student.id, 'group_id': new_group.id, 'group_name': new_group.name},
+        'groups': [_group_json(g) for g in changed],
+    })
+
+@login_required
+@require_POST
+def api_batch(request, section_id):
+    """
+    Many moves and skill edits in one request, applied all-or-nothing
+    (payload format in mutations.py). Returns the changed groups.
+    """
+    section = get_object_or_404(Section, id=section_id, teacher=request.user)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'errors': ["The body must be valid JSON."]}, status=400)
+    try:
+        moves, edits = parse_batch(data)
+        result = apply_batch(section, moves, edits)
+    except BatchError as exc:
+        return JsonResponse({'errors': exc.errors}, status=400)
+
+    return JsonResponse({
+        'version': Section.objects.values_list('version', flat=True).get(id=section.id),
+        'moved': result.moved,
+        'edited': result.edited,
+        'groups': [_group_json(g) for g in _groups_with_stats(section, ids=result.group_ids)],
+    })
+
+@login_required
+def api_constraints(request, section_id):
+    """
+    The section's grouping rules (GET), or replace them all (POST, same JSON:
+    together / apart pairs of student ids, min / max group size).
+    They apply from the next generation on.
+    """
+    section = get_object_or_404(Section, id=section_id, teacher=request.user)
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'errors': ["The body must be valid JSON."]}, status=400)
+        try:
+            rules = Rules.from_dict(data)
+            save_rules(section, rules)
+        except ConstraintError as exc:
+            return JsonResponse({'errors': [str(exc)]}, status=400)
+    else:
+        rules = Rules.load(section)
+    return JsonResponse(rules.as_dict())
+
+# --- PROFILING ---
+
+@login_required
+def profiling_stats(request):
+    """Per-view and per-phase timings since startup (GET), or reset them (POST). Staff only."""
+    if not profiling.enabled() or not request.user.is_staff:
+        raise Http404("Profiling is disabled.")
+    if request.method == "POST":
+        profiling.reset()
+    return JsonResponse({'stats': profiling.snapshot()})
+
+# --- EXPORTS ---
+
+EXPORT_FORMATS = {
+    'csv': (csv_rows, 'text/csv'),
+    'json': (json_chunks, 'application/json'),
+}
+
+def _export_response(sections, fmt, filename):
+    """Streams the export: bytes start flowing before the whole roster is read."""
+    generate, content_type = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(generate(sections), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+@login_required
+def export_section(request, section_id, fmt):
+    """One class: its groups and members as CSV or JSON."""
+    section = get_object_or_404(Section, id=section_id, teacher=request.user)
+    sections = Section.objects.filter(id=section.id)
+    return _export_response(sections, fmt, slugify(section.name) or f"section-{section.id}")
+
+@login_required
+def export_all(request, fmt):
+    """Every class of the logged-in teacher in one file."""
+    sections = Section.objects.filter(teacher=request.user)
+    return _export_response(sections, fmt, "all-sections")
+
 # --- AUTHENTICATION ---
 
 def signup(request):
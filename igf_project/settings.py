@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'grouping.profiling.TimingMiddleware',  # only active with GROUPING_PROFILING
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,13 +76,46 @@ WSGI_APPLICATION = 'igf_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite connections are set up for several teachers writing at once:
+#   - WAL journal: readers no longer block the writer (and vice versa)
+#   - synchronous=NORMAL: no fsync per commit, still durable in WAL mode
+#   - transaction_mode IMMEDIATE: a transaction takes the write lock when it
+#     starts, so two read-then-write transactions can't deadlock (that fails
+#     straight away with "database is locked", the busy timeout doesn't help)
+#   - timeout: wait up to 20 s for the lock instead of failing
+# The PRAGMAs run on every new connection (init_command).
+SQLITE_OPTIONS = {
+    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+}
+
+# Keep connections open between requests (seconds); checked before reuse
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# GROUPING_DB=postgres switches to PostgreSQL (needs psycopg installed)
+if os.environ.get('GROUPING_DB') == 'postgres':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'igf'),
+        'USER': os.environ.get('POSTGRES_USER', 'igf'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -122,4 +157,15 @@ STATIC_URL = 'static/'
 LOGIN_REDIRECT_URL = '/' 
 
 # Redirect to home page after logout
-LOGOUT_REDIRECT_URL = '/accounts/login/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/accounts/login/'
+
+# Background group generation (grouping/jobs.py): threads per process
+GENERATION_WORKERS = 2
+# Seconds after which a queued/running generation job is presumed dead (see grouping/jobs.py)
+GENERATION_STALE_AFTER = 600
+
+# Async views (grouping/views.py): threads for their CPU-bound parts (rendering, numpy)
+ASYNC_CPU_WORKERS = 4
+
+# Request / service timing (grouping/profiling.py): Server-Timing headers + /profiling/
+GROUPING_PROFILING = os.environ.get('GROUPING_PROFILING') == '1'